@@ -1,4 +1,5 @@
 from django.shortcuts import redirect
+from turfzone.fastjson import JsonResponse
 from django.contrib import messages
 from functools import wraps
 
@@ -12,4 +13,17 @@ def admin_required(view_func):
             messages.error(request, 'Access denied. Admin privileges required.')
             return redirect('user-dashboard')
         return view_func(request, *args, **kwargs)
-    return _wrapped_view
\ No newline at end of file
+    return _wrapped_view
+
+def api_login_required(view_func):
+    """
+    For async JSON views. Anonymous requests get the same 403 response as
+    the DRF endpoints instead of a redirect to the login page.
+    """
+    @wraps(view_func)
+    async def _wrapped_view(request, *args, **kwargs):
+        user = await request.auser()
+        if not user.is_authenticated:
+            return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=403)
+        return await view_func(request, *args, **kwargs)
+    return _wrapped_view
@@ -0,0 +1,62 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def normalize_phone_number(value):
+    """
+    accounts.utils.normalize_phone_number as of this migration, frozen so
+    later changes to it don't change what the migration writes
+    """
+    country_code = getattr(settings, 'PHONE_DEFAULT_COUNTRY_CODE', '91')
+    national_length = getattr(settings, 'PHONE_NATIONAL_NUMBER_LENGTH', 10)
+    value = (value or '').strip()
+    is_international = value.startswith('+')
+    digits = ''.join(filter(str.isdigit, value))
+    if not is_international and digits.startswith('00'):
+        digits = digits[2:]
+        is_international = True
+    elif not is_international:
+        digits = digits.lstrip('0')
+
+    if not digits:
+        return ''
+    if not is_international:
+        if len(digits) == national_length:
+            digits = country_code + digits
+        elif not (len(digits) == len(country_code) + national_length and digits.startswith(country_code)):
+            return ''
+    if len(digits) > 15:
+        return ''
+    return f'+{digits}'
+
+
+def backfill_phone_number_normalized(apps, schema_editor):
+    User = apps.get_model('accounts', 'User')
+    users = User.objects.using(schema_editor.connection.alias)
+    batch = []
+    for user in users.exclude(phone_number='').only('id', 'phone_number').iterator(chunk_size=2000):
+        user.phone_number_normalized = normalize_phone_number(user.phone_number)
+        batch.append(user)
+        if len(batch) >= 2000:
+            users.bulk_update(batch, ['phone_number_normalized'])
+            batch = []
+    if batch:
+        users.bulk_update(batch, ['phone_number_normalized'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0003_playerprofile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='phone_number_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=16),
+        ),
+        migrations.RunPython(backfill_phone_number_normalized, migrations.RunPython.noop),
+    ]
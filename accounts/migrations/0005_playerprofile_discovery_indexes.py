@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_user_phone_number_normalized'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['preferred_sport', 'playing_side'], name='profile_sport_side_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['preferred_sport', 'batting_style', 'bowling_style'], name='profile_sport_batting_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['preferred_sport', 'bowling_style'], name='profile_sport_bowling_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['preferred_sport', 'is_wicketkeeper'], name='profile_sport_keeper_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['preferred_sport', 'football_position', 'football_style'], name='profile_sport_position_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='playerprofile',
+            index=models.Index(fields=['preferred_sport', 'football_style'], name='profile_sport_fstyle_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from .utils import normalize_phone_number
 
 class PlayerProfile(models.Model):
     SPORT_CHOICES = [
@@ -59,6 +60,18 @@ class PlayerProfile(models.Model):
     football_position = models.CharField(max_length=20, choices=FOOTBALL_POSITION, null=True, blank=True)
     football_style = models.CharField(max_length=20, choices=FOOTBALL_STYLE, null=True, blank=True)
 
+    class Meta:
+        # Player discovery always filters on preferred_sport first, so each
+        # index leads with it and covers the common attribute combinations
+        indexes = [
+            models.Index(fields=['preferred_sport', 'playing_side'], name='profile_sport_side_idx'),
+            models.Index(fields=['preferred_sport', 'batting_style', 'bowling_style'], name='profile_sport_batting_idx'),
+            models.Index(fields=['preferred_sport', 'bowling_style'], name='profile_sport_bowling_idx'),
+            models.Index(fields=['preferred_sport', 'is_wicketkeeper'], name='profile_sport_keeper_idx'),
+            models.Index(fields=['preferred_sport', 'football_position', 'football_style'], name='profile_sport_position_idx'),
+            models.Index(fields=['preferred_sport', 'football_style'], name='profile_sport_fstyle_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}'s Player Profile"
 
@@ -85,6 +98,8 @@ class PlayerProfile(models.Model):
 
 class User(AbstractUser):
     phone_number = models.CharField(max_length=15, blank=True)
+    # E.164 form of phone_number, kept in sync on save and used for lookups
+    phone_number_normalized = models.CharField(max_length=16, blank=True, db_index=True, editable=False)
     address = models.TextField(blank=True)
     profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
     is_admin = models.BooleanField(default=False)
@@ -99,4 +114,8 @@ class User(AbstractUser):
         # If the user is a superuser, automatically make them an admin
         if self.is_superuser:
             self.is_admin = True
+        self.phone_number_normalized = normalize_phone_number(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'phone_number_normalized'}
         super().save(*args, **kwargs)
@@ -1,3 +1,64 @@
-from django.test import TestCase
+from importlib import import_module
+from django.test import SimpleTestCase
+from django.urls import reverse
+from turfzone.testing import QueryBudgetTestCase
+from .utils import normalize_phone_number, phone_prefix_range, phone_search_prefix
 
-# Create your tests here.
+
+class AdminQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_admin_dashboard(self):
+        self.assertQueryBudget(lambda: self.client.get(reverse('admin-dashboard')), queries=16, rows=25)
+
+    def test_admin_bookings(self):
+        # One page of bookings however many there are
+        self.assertQueryBudget(lambda: self.client.get(reverse('admin-bookings')), queries=4, rows=60)
+
+
+class PhoneNumberTests(SimpleTestCase):
+    NORMALIZED = [
+        ('9876543210', '+919876543210'),
+        ('09876543210', '+919876543210'),
+        ('919876543210', '+919876543210'),
+        ('+91 98765 43210', '+919876543210'),
+        ('+91-98765-43210', '+919876543210'),
+        ('0091 98765 43210', '+919876543210'),
+        (' 98765-43210 ', '+919876543210'),
+        ('(987) 654-3210', '+919876543210'),
+        ('+1 415 555 0100', '+14155550100'),
+        ('0044 20 7946 0958', '+442079460958'),
+        # Invalid
+        ('', ''),
+        (None, ''),
+        ('abc', ''),
+        ('+', ''),
+        ('98765', ''),
+        ('98765432101', ''),
+        ('819876543210', ''),
+        ('+1234567890123456', ''),
+    ]
+
+    def test_normalize_phone_number(self):
+        for value, expected in self.NORMALIZED:
+            with self.subTest(value=value):
+                self.assertEqual(normalize_phone_number(value), expected)
+
+    def test_migration_copy_matches(self):
+        migration = import_module('accounts.migrations.0004_user_phone_number_normalized')
+        for value, expected in self.NORMALIZED:
+            with self.subTest(value=value):
+                self.assertEqual(migration.normalize_phone_number(value), expected)
+
+    def test_phone_search_prefix(self):
+        for value, expected in [
+            ('98765', '+9198765'),
+            ('098 76', '+919876'),
+            ('+4420', '+4420'),
+            ('919876543210', '+919876543210'),
+            ('', ''),
+        ]:
+            with self.subTest(value=value):
+                self.assertEqual(phone_search_prefix(value), expected)
+        self.assertEqual(phone_prefix_range('+9198'), ('+9198', '+9198:'))
@@ -0,0 +1,83 @@
+from django.conf import settings
+
+# E.164 allows at most 15 digits after the leading '+'
+E164_MAX_DIGITS = 15
+
+
+def _split_phone_input(value):
+    """
+    Strip formatting from a phone number and work out whether it already
+    carries a country code. Returns (digits, is_international).
+    """
+    value = (value or '').strip()
+    is_international = value.startswith('+')
+    digits = ''.join(filter(str.isdigit, value))
+
+    if not is_international and digits.startswith('00'):
+        # International dialling prefix, e.g. 0091 98xxx
+        digits = digits[2:]
+        is_international = True
+    elif not is_international:
+        # Drop the national trunk prefix, e.g. 098xxx
+        digits = digits.lstrip('0')
+
+    return digits, is_international
+
+
+def normalize_phone_number(value):
+    """
+    Normalize a phone number to E.164, e.g. '+91 98765 43210', '9876543210'
+    and '09876543210' all become '+919876543210'.
+
+    Numbers without a country code get settings.PHONE_DEFAULT_COUNTRY_CODE.
+    Returns '' when the input cannot be a valid number.
+    """
+    country_code = settings.PHONE_DEFAULT_COUNTRY_CODE
+    national_length = settings.PHONE_NATIONAL_NUMBER_LENGTH
+    digits, is_international = _split_phone_input(value)
+
+    if not digits:
+        return ''
+
+    if not is_international:
+        if len(digits) == national_length:
+            digits = country_code + digits
+        elif not (len(digits) == len(country_code) + national_length and digits.startswith(country_code)):
+            return ''
+
+    if len(digits) > E164_MAX_DIGITS:
+        return ''
+
+    return f'+{digits}'
+
+
+def phone_search_prefix(value):
+    """
+    Normalize partially typed phone number input into an E.164 prefix for
+    typeahead search, e.g. '98765' becomes '+9198765'.
+    """
+    country_code = settings.PHONE_DEFAULT_COUNTRY_CODE
+    national_length = settings.PHONE_NATIONAL_NUMBER_LENGTH
+    digits, is_international = _split_phone_input(value)
+
+    if not digits:
+        return ''
+
+    if not is_international:
+        # Only treat the leading digits as a country code once the input is
+        # longer than a national number, otherwise '91...' is ambiguous
+        if not (len(digits) > national_length and digits.startswith(country_code)):
+            digits = country_code + digits
+
+    return f'+{digits[:E164_MAX_DIGITS]}'
+
+
+def phone_prefix_range(prefix):
+    """
+    Turn an E.164 prefix into a half-open (lower, upper) range so prefix
+    search can be expressed as phone_number_normalized__gte/__lt. Unlike
+    LIKE 'prefix%', a range comparison is always an index seek.
+    """
+    # Normalized numbers only contain digits after the '+', and ':' sorts
+    # directly after '9'
+    return prefix, prefix + ':'
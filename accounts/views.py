@@ -6,14 +6,18 @@ from django.views.decorators.http import require_http_methods
 from django.db.models import Count, Sum
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Q
 from .forms import CustomUserCreationForm, CustomUserChangeForm
 from django.contrib.auth.views import LoginView
 from django.urls import reverse_lazy
 from .decorators import admin_required
 from .models import User
+from bookings.archive import booking_models, include_archived
 from bookings.models import Booking
-from facilities.models import Facility
+from bookings.partitioning import count_across, fan_out, merge_ordered, sum_across, with_shared_related
+from facilities.models import Facility, FacilitySport
+
+# Rows per page on the admin bookings list
+ADMIN_BOOKINGS_PER_PAGE = 50
 
 class CustomLoginView(LoginView):
     template_name = 'accounts/login.html'
@@ -48,11 +52,21 @@ def user_dashboard(request):
     if request.user.is_admin:
         return redirect('admin-dashboard')
     
-    recent_bookings = request.user.bookings.all().order_by('-created_at')[:5]
-    upcoming_bookings = request.user.bookings.filter(
-        date__gte=timezone.now().date(),
-        status='confirmed'
-    ).order_by('date', 'time_slot__start_time')[:3]
+    bookings = Booking.objects.filter(user=request.user)
+    recent_bookings = merge_ordered(
+        bookings.order_by('-created_at'),
+        key=lambda booking: booking.created_at,
+        reverse=True,
+        limit=5
+    )
+    upcoming_bookings = merge_ordered(
+        bookings.filter(
+            date__gte=timezone.now().date(),
+            status='confirmed'
+        ).order_by('date', 'time_slot__start_time'),
+        key=lambda booking: booking.date,
+        limit=3
+    )
     
     context = {
         'recent_bookings': recent_bookings,
@@ -65,7 +79,11 @@ def user_bookings(request):
     if request.user.is_admin:
         return redirect('admin-bookings')
     
-    bookings = request.user.bookings.all().order_by('-created_at')
+    bookings = merge_ordered(
+        Booking.objects.filter(user=request.user).order_by('-created_at'),
+        key=lambda booking: booking.created_at,
+        reverse=True
+    )
     return render(request, 'accounts/bookings.html', {'bookings': bookings})
 
 @admin_required
@@ -77,33 +95,51 @@ def admin_dashboard(request):
     today_bookings = Booking.objects.filter(created_at__date=today)
     monthly_bookings = Booking.objects.filter(created_at__date__gte=thirty_days_ago)
     
+    # Booking aggregates fan out over the booking partitions (a single
+    # query each when partitioning is off)
     stats = {
-        'today_revenue': today_bookings.aggregate(Sum('total_price'))['total_price__sum'] or 0,
-        'monthly_revenue': monthly_bookings.aggregate(Sum('total_price'))['total_price__sum'] or 0,
-        'pending_bookings': Booking.objects.filter(status='pending').count(),
+        'today_revenue': sum_across(today_bookings, 'total_price'),
+        'monthly_revenue': sum_across(monthly_bookings, 'total_price'),
+        'pending_bookings': count_across(Booking.objects.filter(status='pending')),
         'active_users': User.objects.filter(is_active=True, is_admin=False).count(),
-        'total_bookings': today_bookings.count(),
-        'monthly_bookings': monthly_bookings.count(),
+        'total_bookings': count_across(today_bookings),
+        'monthly_bookings': count_across(monthly_bookings),
         'total_facilities': Facility.objects.count(),
     }
     
     # Get pending bookings
-    pending_bookings = (Booking.objects.filter(status='pending')
-                       .select_related('user', 'facility_sport__facility', 'time_slot')
-                       .order_by('-created_at')[:5])
+    pending_bookings = merge_ordered(
+        with_shared_related(Booking.objects.filter(status='pending'), 'user', 'facility_sport__facility', 'time_slot')
+        .order_by('-created_at'),
+        key=lambda booking: booking.created_at,
+        reverse=True,
+        limit=5
+    )
     
-    # Get facility revenue with percentages
-    total_revenue = Booking.objects.filter(status='confirmed').aggregate(
-        total=Sum('total_price'))['total'] or 1  # Avoid division by zero
+    # Get facility revenue with percentages. Revenue is all time, so with
+    # ?archived=1 it also counts bookings moved to the archive tables.
+    with_archived = include_archived(request)
+    total_revenue = sum(
+        sum_across(model.objects.filter(status='confirmed'), 'total_price')
+        for model in booking_models(with_archived)
+    ) or 1  # Avoid division by zero
     
-    facility_revenue = []
-    facilities = Facility.objects.annotate(
-        revenue=Sum('sports__bookings__total_price', 
-                   filter=Q(sports__bookings__status='confirmed'))
-    )
+    # Group by facility_sport_id in each partition, then roll up to facilities
+    # here since the partitions have no facility rows to join against
+    facility_of = dict(FacilitySport.objects.values_list('id', 'facility_id'))
+    revenue_by_facility = {}
+    for model in booking_models(with_archived):
+        confirmed_revenue = model.objects.filter(status='confirmed').values('facility_sport_id').annotate(
+            revenue=Sum('total_price')
+        ).order_by()
+        for partition_queryset in fan_out(confirmed_revenue):
+            for row in partition_queryset:
+                facility_id = facility_of.get(row['facility_sport_id'])
+                revenue_by_facility[facility_id] = revenue_by_facility.get(facility_id, 0) + row['revenue']
     
-    for facility in facilities:
-        revenue = facility.revenue or 0
+    facility_revenue = []
+    for facility in Facility.objects.all():
+        revenue = revenue_by_facility.get(facility.id, 0)
         facility_revenue.append({
             'name': facility.name,
             'revenue': revenue,
@@ -114,9 +150,12 @@ def admin_dashboard(request):
     recent_activities = []
     
     # Add recent bookings
-    recent_bookings = Booking.objects.select_related(
-        'user', 'facility_sport__facility'
-    ).order_by('-created_at')[:5]
+    recent_bookings = merge_ordered(
+        with_shared_related(Booking.objects, 'user', 'facility_sport__facility').order_by('-created_at'),
+        key=lambda booking: booking.created_at,
+        reverse=True,
+        limit=5
+    )
     
     for booking in recent_bookings:
         activity_type = booking.status.title()
@@ -138,22 +177,49 @@ def admin_dashboard(request):
         'stats': stats,
         'pending_bookings': pending_bookings,
         'facility_revenue': facility_revenue,
-        'recent_activities': sorted(recent_activities, key=lambda x: x['timestamp'], reverse=True)
+        'recent_activities': sorted(recent_activities, key=lambda x: x['timestamp'], reverse=True),
+        'include_archived': with_archived,
     }
     
     return render(request, 'accounts/admin/dashboard.html', context)
 
 @admin_required
 def admin_bookings(request):
-    bookings = Booking.objects.select_related('user', 'facility_sport__facility', 'time_slot').order_by('-created_at')
-    return render(request, 'accounts/admin/bookings.html', {'bookings': bookings})
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+    offset = (page - 1) * ADMIN_BOOKINGS_PER_PAGE
+
+    # One extra row tells whether there is a next page without counting
+    bookings = merge_ordered(
+        with_shared_related(
+            Booking.objects, 'user', 'facility_sport__facility', 'facility_sport__sport', 'time_slot'
+        ).order_by('-created_at'),
+        key=lambda booking: booking.created_at,
+        reverse=True,
+        limit=offset + ADMIN_BOOKINGS_PER_PAGE + 1
+    )[offset:]
+    return render(request, 'accounts/admin/bookings.html', {
+        'bookings': bookings[:ADMIN_BOOKINGS_PER_PAGE],
+        'page': page,
+        'has_previous': page > 1,
+        'has_next': len(bookings) > ADMIN_BOOKINGS_PER_PAGE,
+    })
 
 @admin_required
 def admin_users(request):
-    users = User.objects.filter(is_admin=False).annotate(
-        booking_count=Count('bookings')
-    ).order_by('-date_joined')
-    return render(request, 'accounts/admin/users.html', {'users': users})
+    users = list(User.objects.filter(is_admin=False).order_by('-date_joined'))
+    with_archived = include_archived(request)
+    booking_counts = {}
+    for model in booking_models(with_archived):
+        per_user = model.objects.values('user_id').annotate(total=Count('id')).order_by()
+        for partition_queryset in fan_out(per_user):
+            for row in partition_queryset:
+                booking_counts[row['user_id']] = booking_counts.get(row['user_id'], 0) + row['total']
+    for user in users:
+        user.booking_count = booking_counts.get(user.id, 0)
+    return render(request, 'accounts/admin/users.html', {'users': users, 'include_archived': with_archived})
 
 @admin_required
 def admin_facilities(request):
@@ -165,7 +231,12 @@ def admin_facilities(request):
 
 @login_required
 def profile(request):
-    bookings = request.user.bookings.all().order_by('-created_at')[:5]
+    bookings = merge_ordered(
+        Booking.objects.filter(user=request.user).order_by('-created_at'),
+        key=lambda booking: booking.created_at,
+        reverse=True,
+        limit=5
+    )
     return render(request, 'accounts/profile.html', {
         'user': request.user,
         'recent_bookings': bookings
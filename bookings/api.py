@@ -1,22 +1,37 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from django.http import JsonResponse
+from turfzone.fastjson import JsonResponse
 from django.utils import timezone
+from django.views.decorators.http import require_GET
 from datetime import datetime, timedelta
+import logging
+from django.db import transaction
 from django.db.models import Q
 from django.template.defaultfilters import timesince
+from accounts.decorators import api_login_required
 from facilities.models import FacilitySport, TimeSlot, Offer
 from .models import Booking
+from django.utils.cache import get_conditional_response
+from .partitioning import amerge_ordered, facility_bookings, partition_for_facility_sport, with_shared_related
+from turfzone.singleflight import SingleFlight
+from .tasks import schedule_expiry
+from .utils import aslots_etag
 
-@api_view(['GET'])
-def get_activities(request):
+logger = logging.getLogger(__name__)
+
+@require_GET
+@api_login_required
+async def get_activities(request):
     """Get recent booking activities"""
     recent_activities = []
-    recent_bookings = Booking.objects.select_related(
-        'user', 'facility_sport__facility'
-    ).filter(
-        created_at__gte=timezone.now() - timedelta(days=7)
-    ).order_by('-created_at')[:10]
+    recent_bookings = await amerge_ordered(
+        with_shared_related(Booking.objects, 'user', 'facility_sport__facility').filter(
+            created_at__gte=timezone.now() - timedelta(days=7)
+        ).order_by('-created_at'),
+        key=lambda booking: booking.created_at,
+        reverse=True,
+        limit=10
+    )
 
     for booking in recent_bookings:
         activity_type = booking.status.title()
@@ -34,7 +49,7 @@ def get_activities(request):
             'message': f"{booking.user.get_full_name() or booking.user.username} booked {booking.facility_sport.facility.name}"
         })
     
-    return Response(recent_activities)
+    return JsonResponse(recent_activities, safe=False)
 
 @api_view(['GET'])
 def get_weather(request):
@@ -52,88 +67,152 @@ from .models import Booking
 from facilities.models import FacilitySport, Offer, TimeSlot
 from reviews.models import Review
 
-@api_view(['GET'])
-def get_slots(request):
-    """Get available slots for a given date and optional facility"""
+class SlotData:
+    """What both versions of the slots response are built from"""
+
+    def __init__(self, facility_id, date, now, etag, facility_sports, time_slots, booked_slots, offers):
+        self.facility_id = facility_id
+        self.date = date
+        self.now = now
+        self.is_today = date == now.date()
+        self.etag = etag
+        self.facility_sports = facility_sports
+        self.time_slots = time_slots
+        self.booked_slots = booked_slots
+        self.offers = offers
+
+    def is_past(self, time_slot):
+        return self.is_today and self.now.time() > time_slot.start_time
+
+    def discount_percentage(self):
+        # The first active offer applies
+        return float(self.offers[0].discount_percentage) if self.offers else None
+
+async def load_slots(request):
+    """
+    Validate a slots request and load its data. Returns (response, None)
+    when the request is already answered (an error, or 304 if the client's
+    copy is current), and (None, SlotData) otherwise.
+    """
+    date_str = request.GET.get('date')
+    facility_id = request.GET.get('facility_id')
+
+    if not date_str:
+        return JsonResponse({'error': 'Date parameter is required'}, status=400), None
+
+    # Parse date
     try:
-        date_str = request.query_params.get('date')
-        facility_id = request.query_params.get('facility_id')
+        selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        return JsonResponse({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400), None
 
-        print(f"[DEBUG] get_slots called with date_str={date_str}, facility_id={facility_id}")
+    # Validate facility and get available sports
+    if not facility_id:
+        return JsonResponse({'error': 'Facility ID is required'}, status=400), None
+    try:
+        facility_id = int(facility_id)
+    except ValueError:
+        return JsonResponse({'error': 'Facility ID must be a number'}, status=400), None
 
-        if not date_str:
-            print("[DEBUG] Date parameter is missing")
-            return Response({'error': 'Date parameter is required'}, status=400)
+    # Today's slots turn past as the day goes on, so their tag changes every
+    # minute. Past slot checks use the time the tag was computed at.
+    now = timezone.localtime()
+    etag = await aslots_etag(
+        request, facility_id, selected_date,
+        now.strftime('%H:%M') if selected_date == now.date() else None
+    )
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response, None
 
-        # Parse date
-        try:
-            selected_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-            print(f"[DEBUG] Parsed selected_date={selected_date}")
-        except ValueError:
-            print(f"[DEBUG] Invalid date format: {date_str}")
-            return Response({'error': 'Invalid date format. Use YYYY-MM-DD'}, status=400)
-
-        # Validate facility and get available sports
-        if facility_id:
-            try:
-                facility_id = int(facility_id)
-            except ValueError:
-                print(f"[DEBUG] Invalid facility_id: {facility_id}")
-                return Response({'error': 'Facility ID must be a number'}, status=400)
-
-            facility_sports = FacilitySport.objects.filter(
-                facility_id=facility_id,
-                is_available=True
-            ).select_related('sport', 'facility')
-
-            print(f"[DEBUG] Found {facility_sports.count()} facility_sports for facility_id={facility_id}")
-
-            if not facility_sports.exists():
-                print("[DEBUG] No sports available for this facility")
-                return Response({
-                    'error': 'No sports available for this facility. Please contact the administrator.'
-                }, status=404)
-        else:
-            print("[DEBUG] Facility ID is missing")
-            return Response({'error': 'Facility ID is required'}, status=400)
-        
-        # Get current time for past slot checks
-        now = timezone.localtime()
-        is_today = selected_date == now.date()
-        
-        # Get all time slots
-        time_slots = TimeSlot.objects.all().order_by('start_time')
-        
-        # Query existing bookings for this facility and date
-        existing_bookings = Booking.objects.filter(
-            facility_sport__facility_id=facility_id,
-            date=selected_date,
-            status__in=['confirmed', 'payment_pending']
-        ).select_related('time_slot')
+    # Keyed on the ETag too, so a request never gets rows loaded before
+    # the version its ETag names
+    facility_sports, time_slots, booked_slots, offers = await slot_flights.ado(
+        (facility_id, selected_date, etag), lambda: _slot_rows(facility_id, selected_date)
+    )
+
+    if not facility_sports:
+        logger.info('No sports available at facility %s', facility_id, extra={'facility_id': facility_id})
+        return JsonResponse({
+            'error': 'No sports available for this facility. Please contact the administrator.'
+        }, status=404), None
+
+    logger.debug(
+        'get_slots facility=%s date=%s sports=%d booked=%d slots=%d offers=%d',
+        facility_id, selected_date, len(facility_sports), len(booked_slots), len(time_slots), len(offers),
+        extra={'facility_id': facility_id, 'date': selected_date, 'booked': len(booked_slots)}
+    )
+    return None, SlotData(facility_id, selected_date, now, etag, facility_sports, time_slots, booked_slots, offers)
+
+# Requests for the same facility and date that arrive together, e.g. when a
+# day's slots open, share one set of queries
+slot_flights = SingleFlight('slots')
+
+async def _slot_rows(facility_id, selected_date):
+    facility_sports = [
+        facility_sport async for facility_sport in FacilitySport.objects.filter(
+            facility_id=facility_id,
+            is_available=True
+        ).select_related('sport', 'facility')
+    ]
+    if not facility_sports:
+        return [], [], set(), []
+
+    # Get all time slots
+    time_slots = [time_slot async for time_slot in TimeSlot.objects.all().order_by('start_time')]
+
+    # Query existing bookings for this facility and date
+    existing_bookings = facility_bookings(
+        facility_id, [facility_sport.id for facility_sport in facility_sports]
+    ).filter(
+        date=selected_date,
+        status__in=['confirmed', 'payment_pending']
+    ).values_list('time_slot_id', 'facility_sport_id')
+
+    booked_slots = {row async for row in existing_bookings}
+
+    # Get active offers
+    offers = [
+        offer async for offer in Offer.objects.filter(
+            facility_id=facility_id,
+            start_date__lte=selected_date,
+            end_date__gte=selected_date,
+            is_active=True
+        ).order_by('pk')
+    ]
+    return facility_sports, time_slots, booked_slots, offers
 
-        print(f"[DEBUG] Found {existing_bookings.count()} existing bookings for facility_id={facility_id}, date={selected_date}")
+def is_lunch_break(time_slot):
+    return time_slot.slot_time == '12:00-13:00'
 
-        booked_slots = {(b.time_slot_id, b.facility_sport_id) for b in existing_bookings}
-        print(f"[DEBUG] Booked slots: {booked_slots}")
+def display_time(time_slot):
+    return f"{time_slot.start_time.strftime('%I:%M %p')} - {time_slot.end_time.strftime('%I:%M %p')}"
+
+@require_GET
+@api_login_required
+async def get_slots(request):
+    """Get available slots for a given date and optional facility"""
+    try:
+        response, data = await load_slots(request)
+        if response is not None:
+            return response
+
+        selected_date = data.date
 
         # Generate slots with availability for each sport
         slots = []
-        for time_slot in time_slots:
+        for time_slot in data.time_slots:
             # Check if slot is in the past
-            slot_start = datetime.combine(selected_date, time_slot.start_time)
-            is_past = is_today and now.time() > time_slot.start_time
-            
-            # Format display time
-            display_time = f"{time_slot.start_time.strftime('%I:%M %p')} - {time_slot.end_time.strftime('%I:%M %p')}"
+            is_past = data.is_past(time_slot)
             
             # Handle lunch break slot
-            if time_slot.slot_time == '12:00-13:00':
+            if is_lunch_break(time_slot):
                 slots.append({
                     'id': f"lunch_{time_slot.id}",
                     'start_time': time_slot.start_time.strftime('%H:%M'),
                     'end_time': time_slot.end_time.strftime('%H:%M'),
                     'slot_time': time_slot.slot_time,
-                    'display_time': display_time,
+                    'display_time': display_time(time_slot),
                     'is_past': is_past,
                     'is_lunch': True,
                     'is_available': False
@@ -141,16 +220,16 @@ def get_slots(request):
                 continue
             
             # For each available sport in the facility
-            for facility_sport in facility_sports:
+            for facility_sport in data.facility_sports:
                 slot_id = f"{selected_date.strftime('%Y-%m-%d')}_{time_slot.id}_{facility_sport.id}"
-                is_booked = (time_slot.id, facility_sport.id) in booked_slots
+                is_booked = (time_slot.id, facility_sport.id) in data.booked_slots
                 
                 slot = {
                     'id': slot_id,
                     'start_time': time_slot.start_time.strftime('%H:%M'),
                     'end_time': time_slot.end_time.strftime('%H:%M'),
                     'slot_time': time_slot.slot_time,
-                    'display_time': display_time,
+                    'display_time': display_time(time_slot),
                     'sport_name': facility_sport.sport.name,
                     'price': float(facility_sport.price_per_slot),
                     'is_past': is_past,
@@ -159,20 +238,10 @@ def get_slots(request):
                     'is_available': not is_past and not is_booked
                 }
                 slots.append(slot)
-        
-        # Get active offers
-        offers = Offer.objects.filter(
-            facility_id=facility_id,
-            start_date__lte=selected_date,
-            end_date__gte=selected_date,
-            is_active=True
-        )
 
         # Calculate discounted prices for slots if offers exist
-        if offers.exists():
-            offer = offers.first()  # Take the first active offer
-            discount_percentage = float(offer.discount_percentage)
-
+        discount_percentage = data.discount_percentage()
+        if discount_percentage is not None:
             for slot in slots:
                 if slot.get('price'):
                     original_price = slot['price']
@@ -180,28 +249,26 @@ def get_slots(request):
                     discounted_price = original_price - discount_amount
                     slot['discounted_price'] = round(discounted_price, 2)
 
-        offers_data = offers.values('title', 'discount_percentage')
-
-        print(f"[DEBUG] Generated {len(slots)} slots, {offers.count()} offers")
-        print(f"[DEBUG] Returning response with {len(slots)} slots")
+        offers_data = [
+            {'title': offer.title, 'discount_percentage': offer.discount_percentage} for offer in data.offers
+        ]
 
-        return JsonResponse({
+        response = JsonResponse({
             'available_slots': slots,
-            'offers': list(offers_data)
+            'offers': offers_data
         })
+        response['ETag'] = data.etag
+        return response
         
     except Exception as e:
-        import traceback
-        print("[ERROR] Error in get_slots:")
-        print(traceback.format_exc())
-        return Response({'error': str(e)}, status=500)
+        logger.exception('get_slots failed for facility %s on %s', request.GET.get('facility_id'), request.GET.get('date'))
+        return JsonResponse({'error': str(e)}, status=500)
+
 
 @api_view(['POST'])
 def book_slot(request):
     """Create a new booking for a slot"""
     try:
-        print("[INFO] Booking request received:", request.data)
-        
         # Extract data from request
         slot_id = request.data.get('slot_id')
         if not slot_id:
@@ -214,13 +281,12 @@ def book_slot(request):
             timeslot_id = int(timeslot_id)
             facility_sport_id = int(facility_sport_id)
         except (ValueError, AttributeError) as e:
-            print("[ERROR] Invalid slot ID format:", slot_id)
+            logger.info('Invalid slot id %r', slot_id)
             return Response({'error': 'Invalid slot ID format'}, status=400)
-            
-        print(f"[INFO] Parsed booking data: date={selected_date}, timeslot={timeslot_id}, facility_sport={facility_sport_id}")
         
         # Check if slot is already booked
-        existing_booking = Booking.objects.filter(
+        using = partition_for_facility_sport(facility_sport_id)
+        existing_booking = Booking.objects.using(using).filter(
             date=selected_date,
             time_slot_id=timeslot_id,
             facility_sport_id=facility_sport_id,
@@ -228,18 +294,29 @@ def book_slot(request):
         ).exists()
         
         if existing_booking:
-            print("[ERROR] Slot already booked")
+            logger.info(
+                'Slot already booked: facility_sport=%s date=%s time_slot=%s', facility_sport_id, selected_date, timeslot_id,
+                extra={'facility_sport_id': facility_sport_id, 'date': selected_date, 'time_slot_id': timeslot_id}
+            )
             return Response({'error': 'Booking with this Facility sport, Date and Time slot already exists.'}, status=400)
         
-        # Create booking
-        booking = Booking.objects.create(
-            user=request.user,
-            facility_sport_id=facility_sport_id,
-            date=selected_date,
-            time_slot_id=timeslot_id,
-            status='payment_pending'
+        # Create the booking with its expiry job, so an unpaid booking
+        # always frees its slot. Jobs live on the default database; a
+        # booking in a partition commits right after its job.
+        with transaction.atomic(using=using), transaction.atomic():
+            booking = Booking.objects.using(using).create(
+                user=request.user,
+                facility_sport_id=facility_sport_id,
+                date=selected_date,
+                time_slot_id=timeslot_id,
+                status='payment_pending'
+            )
+            schedule_expiry(booking)
+        logger.info(
+            'Booking %s created: user=%s facility_sport=%s date=%s time_slot=%s',
+            booking.id, request.user.pk, facility_sport_id, selected_date, timeslot_id,
+            extra={'booking_id': booking.id, 'user_id': request.user.pk, 'facility_sport_id': facility_sport_id}
         )
-        print(f"[INFO] Booking created successfully: {booking.id}")
         
         # Calculate payment deadline (15 minutes from now)
         payment_deadline = timezone.now() + timedelta(minutes=15)
@@ -253,7 +330,5 @@ def book_slot(request):
         })
         
     except Exception as e:
-        import traceback
-        print("[ERROR] Error in book_slot:")
-        print(traceback.format_exc())
+        logger.exception('book_slot failed')
         return Response({'error': str(e)}, status=500)
@@ -0,0 +1,79 @@
+"""
+Version 2 of the slots API: the same data as bookings.api.get_slots in a
+columnar layout. Each time slot and each sport is described once, instead
+of once per (slot, sport) object:
+
+    {
+        "version": 2,
+        "date": "2025-06-01",
+        "slots": {"id": [...], "start": ["06:00", ...], "end": [...], "display": [...]},
+        "lunch": [index, ...],            # slots that are lunch breaks
+        "past": 3,                        # the first 3 slots have started
+        "sports": {"id": [...], "name": [...], "price": [...], "discounted_price": [...] or null},
+        "booked": ["0100", ...],          # per slot, one character per sport
+        "offers": [{"title": ..., "discount_percentage": ...}]
+    }
+
+Slots are ordered by start time, so the past ones are always a prefix.
+A slot is bookable if it isn't past or a lunch break and its character
+for the sport is "0"; the id book_slot expects is "<date>_<slot id>_<sport
+id>". Prices are per sport only, as they don't vary by slot. Payloads grow
+with slots + sports rather than slots x sports.
+"""
+import logging
+from django.views.decorators.http import require_GET
+from accounts.decorators import api_login_required
+from turfzone.fastjson import JsonResponse
+from .api import display_time, is_lunch_break, load_slots
+
+logger = logging.getLogger(__name__)
+
+
+@require_GET
+@api_login_required
+async def get_slots(request):
+    """Get slot availability for a facility on a date, in the columnar v2 format"""
+    try:
+        response, data = await load_slots(request)
+        if response is not None:
+            return response
+
+        time_slots = data.time_slots
+        facility_sports = data.facility_sports
+        booked = data.booked_slots
+        prices = [float(facility_sport.price_per_slot) for facility_sport in facility_sports]
+        discount_percentage = data.discount_percentage()
+
+        response = JsonResponse({
+            'version': 2,
+            'date': data.date.isoformat(),
+            'slots': {
+                'id': [time_slot.id for time_slot in time_slots],
+                'start': [time_slot.start_time.strftime('%H:%M') for time_slot in time_slots],
+                'end': [time_slot.end_time.strftime('%H:%M') for time_slot in time_slots],
+                'display': [display_time(time_slot) for time_slot in time_slots],
+            },
+            'lunch': [index for index, time_slot in enumerate(time_slots) if is_lunch_break(time_slot)],
+            'past': sum(1 for time_slot in time_slots if data.is_past(time_slot)),
+            'sports': {
+                'id': [facility_sport.id for facility_sport in facility_sports],
+                'name': [facility_sport.sport.name for facility_sport in facility_sports],
+                'price': prices,
+                'discounted_price': None if discount_percentage is None else [
+                    round(price - price * (discount_percentage / 100), 2) for price in prices
+                ],
+            },
+            'booked': [
+                ''.join('1' if (time_slot.id, facility_sport.id) in booked else '0' for facility_sport in facility_sports)
+                for time_slot in time_slots
+            ],
+            'offers': [
+                {'title': offer.title, 'discount_percentage': offer.discount_percentage} for offer in data.offers
+            ],
+        })
+        response['ETag'] = data.etag
+        return response
+
+    except Exception as e:
+        logger.exception('get_slots v2 failed for facility %s on %s', request.GET.get('facility_id'), request.GET.get('date'))
+        return JsonResponse({'error': str(e)}, status=500)
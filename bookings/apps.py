@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
 
 
 class BookingsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'bookings'
+
+    def ready(self):
+        from .partitioning import disable_partition_foreign_keys
+        connection_created.connect(disable_partition_foreign_keys, dispatch_uid='bookings_partition_foreign_keys')
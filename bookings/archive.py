@@ -0,0 +1,112 @@
+"""
+Hot/cold split of booking data.
+
+Bookings that are finished (BOOKING_ARCHIVE_STATUSES) and were played more
+than BOOKING_ARCHIVE_AFTER_MONTHS months ago are moved, with their live
+activity and payment, into ArchivedBooking, ArchivedLiveActivity and
+ArchivedPayment. Rows keep their ids and stay in the same database (the
+facility partition, when partitioning is on), so the hot tables only hold
+recent and open bookings and their indexes stay small enough to be cached.
+
+Each batch is copied and deleted in one transaction on its database, so a
+booking is always in exactly one of the two tables. The hot rows are
+deleted with plain SQL rather than Model.delete(): the reviews and match
+requests that point at an archived booking keep its id instead of being
+set to NULL.
+
+Slot availability, user pages and the booking API only read the hot
+tables. Reports that cover old data pass include_archived and read both,
+see booking_models().
+"""
+import calendar
+import logging
+from django.conf import settings
+from django.db import connections, transaction
+from django.utils import timezone
+from payments.models import ArchivedPayment, Payment
+from .models import ArchivedBooking, ArchivedLiveActivity, Booking, LiveActivity
+from .partitioning import booking_databases
+
+logger = logging.getLogger(__name__)
+
+# Hot model -> archive model, bookings first so the copies' foreign keys
+# resolve, and the column tying each row to its booking
+ARCHIVED_MODELS = [
+    (Booking, ArchivedBooking, 'id'),
+    (LiveActivity, ArchivedLiveActivity, 'booking_id'),
+    (Payment, ArchivedPayment, 'booking_id'),
+]
+
+
+def archive_cutoff(today=None):
+    """Bookings dated before this are old enough to archive"""
+    today = today or timezone.localdate()
+    month = today.month - settings.BOOKING_ARCHIVE_AFTER_MONTHS
+    year = today.year + (month - 1) // 12
+    month = (month - 1) % 12 + 1
+    return today.replace(year=year, month=month, day=min(today.day, calendar.monthrange(year, month)[1]))
+
+
+def archivable_bookings(alias, cutoff):
+    return Booking.objects.using(alias).filter(date__lt=cutoff, status__in=settings.BOOKING_ARCHIVE_STATUSES)
+
+
+def archive_batch(alias, booking_ids):
+    """Move these bookings with their activity and payments into the archive"""
+    with transaction.atomic(using=alias):
+        for model, archived_model, column in ARCHIVED_MODELS:
+            rows = model.objects.using(alias).filter(**{f'{column}__in': booking_ids}).order_by().values()
+            archived_model.objects.using(alias).bulk_create(
+                [archived_model(**row) for row in rows], ignore_conflicts=True
+            )
+        placeholders = ', '.join(['%s'] * len(booking_ids))
+        with connections[alias].cursor() as cursor:
+            for model, archived_model, column in reversed(ARCHIVED_MODELS):
+                cursor.execute(
+                    f'DELETE FROM {model._meta.db_table} WHERE {column} IN ({placeholders})', booking_ids
+                )
+
+
+def archive_bookings(cutoff=None, batch_size=None, limit=None):
+    """
+    Archive every archivable booking dated before cutoff, batch_size at a
+    time, stopping after limit bookings per database. Returns the number
+    archived on each database.
+    """
+    cutoff = cutoff or archive_cutoff()
+    batch_size = batch_size or settings.BOOKING_ARCHIVE_BATCH_SIZE
+    archived = {}
+    for alias in booking_databases():
+        archived[alias] = 0
+        while limit is None or archived[alias] < limit:
+            size = batch_size if limit is None else min(batch_size, limit - archived[alias])
+            booking_ids = list(
+                archivable_bookings(alias, cutoff).order_by('id').values_list('id', flat=True)[:size]
+            )
+            if not booking_ids:
+                break
+            archive_batch(alias, booking_ids)
+            archived[alias] += len(booking_ids)
+        if archived[alias]:
+            logger.info('Archived %d bookings on %s', archived[alias], alias,
+                        extra={'database': alias, 'bookings': archived[alias], 'cutoff': cutoff.isoformat()})
+    return archived
+
+
+def include_archived(request):
+    """The reports' 'include archived' switch, ?archived=1"""
+    return request.GET.get('archived') == '1'
+
+
+def booking_models(include_archived=False):
+    """
+    Booking, plus ArchivedBooking for reports that include archived data.
+    Both have the same booking fields, so the same filters and aggregates
+    apply to each:
+
+        sum(sum_across(model.objects.filter(status='completed'), 'total_price')
+            for model in booking_models(include_archived(request)))
+    """
+    if include_archived:
+        return [Booking, ArchivedBooking]
+    return [Booking]
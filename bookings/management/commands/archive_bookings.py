@@ -0,0 +1,34 @@
+from datetime import date
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from bookings.archive import archivable_bookings, archive_bookings, archive_cutoff
+from bookings.partitioning import booking_databases
+
+class Command(BaseCommand):
+    help = 'Move finished bookings older than BOOKING_ARCHIVE_AFTER_MONTHS, with their payments and activity, to the archive tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--before', type=date.fromisoformat,
+                            help='Archive bookings dated before this day (YYYY-MM-DD) instead of the configured age')
+        parser.add_argument('--batch-size', type=int, default=settings.BOOKING_ARCHIVE_BATCH_SIZE,
+                            help='Bookings moved per transaction')
+        parser.add_argument('--limit', type=int,
+                            help='Stop after this many bookings per database, to spread a large backlog over several runs')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Only count the bookings that would be archived')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        cutoff = options['before'] or archive_cutoff()
+
+        if options['dry_run']:
+            for alias in booking_databases():
+                count = archivable_bookings(alias, cutoff).count()
+                self.stdout.write(f'{alias}: {count} bookings before {cutoff} to archive')
+            return
+
+        archived = archive_bookings(cutoff, options['batch_size'], options['limit'])
+        for alias, count in archived.items():
+            self.stdout.write(f'{alias}: archived {count} bookings before {cutoff}')
+        self.stdout.write(self.style.SUCCESS(f'Archived {sum(archived.values())} bookings'))
@@ -0,0 +1,82 @@
+from collections import defaultdict
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from bookings.models import ArchivedBooking, ArchivedLiveActivity, Booking, LiveActivity
+from bookings.partitioning import PARTITION_ID_SPACE, partition_for_facility_sport
+from payments.models import ArchivedPayment, Payment
+
+PARTITIONED_TABLES = [Booking._meta.db_table, LiveActivity._meta.db_table, Payment._meta.db_table]
+
+
+class Command(BaseCommand):
+    help = 'Create the booking partition databases and optionally copy existing bookings into them'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--move-existing', action='store_true',
+                            help='Copy bookings, activities and payments, hot and archived, from the default database into their partitions')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        aliases = settings.BOOKING_PARTITION_ALIASES
+        if not aliases:
+            raise CommandError('Partitioning is off. Set TURFZONE_BOOKING_PARTITIONS first.')
+
+        for index, alias in enumerate(aliases):
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias}: only SQLite partitions are supported')
+
+            call_command('migrate', database=alias, verbosity=0)
+            self.seed_id_range(alias, (index + 1) * PARTITION_ID_SPACE)
+            # Migrations turn foreign key checks back on; reconnecting lets
+            # the connection_created hook switch them off again
+            connections[alias].close()
+            self.stdout.write(f'{alias}: ready, ids from {(index + 1) * PARTITION_ID_SPACE}')
+
+        if options['move_existing']:
+            self.move_existing(options['batch_size'])
+
+    def seed_id_range(self, alias, first_id):
+        """Start the partition's AUTOINCREMENT counters at its own id range"""
+        with connections[alias].cursor() as cursor:
+            for table in PARTITIONED_TABLES:
+                cursor.execute('SELECT seq FROM sqlite_sequence WHERE name = %s', [table])
+                row = cursor.fetchone()
+                if row is None:
+                    cursor.execute('INSERT INTO sqlite_sequence (name, seq) VALUES (%s, %s)', [table, first_id - 1])
+                elif row[0] < first_id - 1:
+                    cursor.execute('UPDATE sqlite_sequence SET seq = %s WHERE name = %s', [first_id - 1, table])
+
+    def move_existing(self, batch_size):
+        """
+        Copy rows, keeping their ids, from the default database into the
+        partition of their facility. Ids from before partitioning are below
+        every partition's range, so they cannot collide. The default copies
+        are left in place and are no longer read once partitioning is on.
+        """
+        for booking_model, related_models in (
+            (Booking, (LiveActivity, Payment)),
+            (ArchivedBooking, (ArchivedLiveActivity, ArchivedPayment)),
+        ):
+            by_partition = defaultdict(list)
+            for booking in booking_model.objects.using(DEFAULT_DB_ALIAS).exclude(facility_sport__isnull=True).iterator(chunk_size=batch_size):
+                by_partition[partition_for_facility_sport(booking.facility_sport_id)].append(booking.id)
+
+            for alias, booking_ids in by_partition.items():
+                with transaction.atomic(using=alias):
+                    models = [(booking_model, 'id__in')] + [(model, 'booking_id__in') for model in related_models]
+                    for model, lookup in models:
+                        copied = 0
+                        for start in range(0, len(booking_ids), batch_size):
+                            chunk = booking_ids[start:start + batch_size]
+                            existing = set(model.objects.using(alias).filter(**{lookup: chunk}).values_list('id', flat=True))
+                            rows = [
+                                row for row in model.objects.using(DEFAULT_DB_ALIAS).filter(**{lookup: chunk})
+                                if row.id not in existing
+                            ]
+                            model.objects.using(alias).bulk_create(rows, batch_size=batch_size)
+                            copied += len(rows)
+                        self.stdout.write(f'{alias}: copied {copied} {model._meta.verbose_name_plural}')
+
+        self.stdout.write(self.style.SUCCESS('Existing booking data copied into partitions'))
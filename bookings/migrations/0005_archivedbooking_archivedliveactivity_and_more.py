@@ -0,0 +1,58 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:22
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_delete_review'),
+        ('facilities', '0006_alter_timeslot_slot_time'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedBooking',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('initiated', 'Initiated'), ('payment_pending', 'Payment Pending'), ('confirmed', 'Confirmed'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled'), ('completed', 'Completed'), ('expired', 'Expired')], max_length=20)),
+                ('total_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('base_price', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('discount_amount', models.DecimalField(decimal_places=2, default=0, max_digits=10)),
+                ('discount_code', models.CharField(blank=True, max_length=50, null=True)),
+                ('payment_deadline', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('notes', models.TextField(blank=True)),
+                ('archived_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('facility_sport', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='facilities.facilitysport')),
+                ('time_slot', models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to='facilities.timeslot')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_bookings', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-date', '-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedLiveActivity',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('action', models.CharField(max_length=50)),
+                ('timestamp', models.DateTimeField()),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='activity', to='bookings.archivedbooking')),
+            ],
+            options={
+                'verbose_name_plural': 'Archived Live Activities',
+                'ordering': ['-timestamp'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedbooking',
+            index=models.Index(fields=['date'], name='archived_booking_date_idx'),
+        ),
+    ]
@@ -3,7 +3,7 @@ from django.conf import settings
 from django.utils import timezone
 from facilities.models import Facility, FacilitySport, TimeSlot, Offer
 from datetime import datetime
-import pytz
+from turfzone.metrics import BOOKING_TRANSITIONS
 
 class Booking(models.Model):
     STATUS_CHOICES = [
@@ -34,9 +34,19 @@ class Booking(models.Model):
         ordering = ['-date', '-created_at']
         unique_together = ['facility_sport', 'date', 'time_slot']  # Prevent double bookings
 
+    # Status as loaded from the database, to count funnel transitions on save
+    _loaded_status = None
+
     def __str__(self):
         return f"{self.user.username} - {self.facility_sport.facility.name} - {self.facility_sport.sport.name} ({self.date})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'status' in field_names:
+            instance._loaded_status = values[field_names.index('status')]
+        return instance
+
     def save(self, *args, **kwargs):
         # Ensure facility_sport and time_slot are provided for new bookings
         if not self.id and (not self.facility_sport or not self.time_slot):
@@ -70,6 +80,10 @@ class Booking(models.Model):
         
         super().save(*args, **kwargs)
 
+        if self.status != self._loaded_status:
+            BOOKING_TRANSITIONS.inc(status=self.status)
+            self._loaded_status = self.status
+
 class LiveActivity(models.Model):
     booking = models.OneToOneField(Booking, on_delete=models.CASCADE, related_name='activity')
     action = models.CharField(max_length=50)  # e.g., "New Booking", "Booking Approved", etc.
@@ -78,3 +92,42 @@ class LiveActivity(models.Model):
     class Meta:
         ordering = ['-timestamp']
         verbose_name_plural = 'Live Activities'
+
+
+# Archive tables (bookings.archive). Finished bookings older than
+# BOOKING_ARCHIVE_AFTER_MONTHS move here with their activity and payment,
+# keeping their ids, so the hot tables and their indexes stay small.
+
+class ArchivedBooking(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_bookings')
+    facility_sport = models.ForeignKey(FacilitySport, on_delete=models.CASCADE, related_name='archived_bookings', null=True)
+    date = models.DateField()
+    time_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, related_name='archived_bookings', null=True)
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    total_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    base_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    discount_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
+    discount_code = models.CharField(max_length=50, blank=True, null=True)
+    payment_deadline = models.DateTimeField(null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    notes = models.TextField(blank=True)
+    archived_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-date', '-created_at']
+        indexes = [models.Index(fields=['date'], name='archived_booking_date_idx')]
+
+    def __str__(self):
+        return f"Archived booking {self.id} ({self.date}, {self.status})"
+
+class ArchivedLiveActivity(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    booking = models.OneToOneField(ArchivedBooking, on_delete=models.CASCADE, related_name='activity')
+    action = models.CharField(max_length=50)
+    timestamp = models.DateTimeField()
+
+    class Meta:
+        ordering = ['-timestamp']
+        verbose_name_plural = 'Archived Live Activities'
@@ -0,0 +1,237 @@
+"""
+Optional facility-based partitioning of booking data.
+
+With settings.BOOKING_PARTITION_COUNT > 0, Booking, LiveActivity and Payment
+rows (and their archived copies, see bookings.archive) live in one of the BOOKING_PARTITION_ALIASES databases, chosen by
+facility_id % BOOKING_PARTITION_COUNT, so facilities in different groups
+never contend for the same write lock. Everything else (users, facilities,
+time slots, teams, reviews) stays on the default database.
+
+Queries that know their facility go straight to its partition; admin and
+per-user views fan out over every partition and merge in Python. Partitions
+hold the full schema but only partitioned rows, so joins from a partition to
+a shared table come back empty: filter on *_id columns and use
+with_shared_related() instead of select_related().
+
+When partitioning is off, every helper resolves to the default database and
+the queries are the same as before.
+"""
+import heapq
+from functools import lru_cache
+from itertools import islice
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Sum
+from django.http import Http404
+from turfzone.metrics import register_collector
+
+# Models stored in the partitions, by Model._meta.label_lower
+PARTITIONED_MODELS = {
+    'bookings.booking', 'bookings.liveactivity', 'payments.payment',
+    # Archived rows stay in the partition their booking was in
+    'bookings.archivedbooking', 'bookings.archivedliveactivity', 'payments.archivedpayment',
+}
+
+# Each partition allocates primary keys from its own range, so an id alone
+# identifies the partition: partition i uses ids from (i + 1) * ID_SPACE
+PARTITION_ID_SPACE = 10 ** 12
+
+
+def partitioning_enabled():
+    return bool(settings.BOOKING_PARTITION_ALIASES)
+
+
+def booking_databases():
+    """Every database that holds booking rows"""
+    return list(settings.BOOKING_PARTITION_ALIASES) or [DEFAULT_DB_ALIAS]
+
+
+def partition_for_facility(facility_id):
+    aliases = settings.BOOKING_PARTITION_ALIASES
+    if not aliases:
+        return DEFAULT_DB_ALIAS
+    return aliases[int(facility_id) % len(aliases)]
+
+
+@lru_cache(maxsize=None)
+def _facility_id_for_facility_sport(facility_sport_id):
+    from facilities.models import FacilitySport
+    return FacilitySport.objects.using(DEFAULT_DB_ALIAS).values_list(
+        'facility_id', flat=True
+    ).get(pk=facility_sport_id)
+
+
+@register_collector
+def _facility_sport_cache_metrics():
+    # Hit ratio: hits / (hits + misses). Unused while partitioning is off
+    if not partitioning_enabled():
+        return
+    info = _facility_id_for_facility_sport.cache_info()
+    labels = ['facility_sport_partition']
+    yield ('turfzone_cache_hits_total', 'counter', 'Lookups served from an in-process cache',
+           ['cache'], [(labels, info.hits)])
+    yield ('turfzone_cache_misses_total', 'counter', 'Lookups that missed an in-process cache',
+           ['cache'], [(labels, info.misses)])
+
+
+def partition_for_facility_sport(facility_sport_id):
+    if not partitioning_enabled():
+        return DEFAULT_DB_ALIAS
+    return partition_for_facility(_facility_id_for_facility_sport(facility_sport_id))
+
+
+def partition_for_id(pk):
+    """
+    Partition that allocated this primary key, or None for ids from before
+    partitioning was enabled.
+    """
+    aliases = settings.BOOKING_PARTITION_ALIASES
+    if not aliases:
+        return DEFAULT_DB_ALIAS
+    index = int(pk) // PARTITION_ID_SPACE - 1
+    if 0 <= index < len(aliases):
+        return aliases[index]
+    return None
+
+
+def partition_for_instance(instance):
+    """Partition for a Booking, LiveActivity or Payment, or an archived one"""
+    if instance._meta.label_lower in ('bookings.booking', 'bookings.archivedbooking'):
+        if instance.facility_sport_id:
+            return partition_for_facility_sport(instance.facility_sport_id)
+        return partition_for_id(instance.pk) if instance.pk else None
+
+    # LiveActivity and Payment follow their booking. Only use a booking that
+    # is already loaded, since fetching it would route back through here.
+    booking = instance._state.fields_cache.get('booking')
+    if booking is not None:
+        if booking._state.db:
+            return booking._state.db
+        return partition_for_instance(booking)
+    if instance.booking_id:
+        return partition_for_id(instance.booking_id)
+    return None
+
+
+def facility_bookings(facility_id, facility_sport_ids=None):
+    """
+    Bookings of one facility, read from its partition. Filters on
+    facility_sport_id because the partition has no facility rows to join.
+    """
+    from facilities.models import FacilitySport
+    from .models import Booking
+    if facility_sport_ids is None:
+        facility_sport_ids = list(FacilitySport.objects.filter(facility_id=facility_id).values_list('id', flat=True))
+    return Booking.objects.using(partition_for_facility(facility_id)).filter(facility_sport_id__in=facility_sport_ids)
+
+
+def fan_out(queryset):
+    """The queryset once per booking database"""
+    return [queryset.using(alias) for alias in booking_databases()]
+
+
+def fan_out_list(queryset):
+    """Evaluate the queryset on every booking database and concatenate"""
+    rows = []
+    for partition_queryset in fan_out(queryset):
+        rows.extend(partition_queryset)
+    return rows
+
+
+def merge_ordered(queryset, key, reverse=False, limit=None):
+    """
+    Evaluate an ordered queryset on every booking database and merge the
+    results by key. With a limit each partition only returns its top rows.
+    """
+    querysets = fan_out(queryset)
+    if limit is not None:
+        querysets = [partition_queryset[:limit] for partition_queryset in querysets]
+    if len(querysets) == 1:
+        return list(querysets[0])
+    return list(islice(heapq.merge(*querysets, key=key, reverse=reverse), limit))
+
+
+async def amerge_ordered(queryset, key, reverse=False, limit=None):
+    """merge_ordered() for async views"""
+    querysets = fan_out(queryset)
+    if limit is not None:
+        querysets = [partition_queryset[:limit] for partition_queryset in querysets]
+    results = [[row async for row in partition_queryset] for partition_queryset in querysets]
+    if len(results) == 1:
+        return results[0]
+    return list(islice(heapq.merge(*results, key=key, reverse=reverse), limit))
+
+
+def count_across(queryset):
+    return sum(partition_queryset.count() for partition_queryset in fan_out(queryset))
+
+
+def sum_across(queryset, field):
+    total = 0
+    for partition_queryset in fan_out(queryset):
+        total += partition_queryset.aggregate(total=Sum(field))['total'] or 0
+    return total
+
+
+def with_shared_related(queryset, *lookups):
+    """
+    select_related() for relations to shared tables. Those tables are empty
+    in the partitions, so there they are fetched with prefetch_related(),
+    which the router sends to the default database.
+    """
+    if partitioning_enabled():
+        return queryset.prefetch_related(*lookups)
+    return queryset.select_related(*lookups)
+
+
+def get_booking(booking_id, **filters):
+    """Fetch a booking by id from whichever database holds it"""
+    from .models import Booking
+    aliases = booking_databases()
+    home = partition_for_id(booking_id)
+    if home in aliases:
+        # Check the partition that allocated the id first
+        aliases.remove(home)
+        aliases.insert(0, home)
+    for alias in aliases:
+        try:
+            return Booking.objects.using(alias).get(pk=booking_id, **filters)
+        except Booking.DoesNotExist:
+            continue
+    raise Booking.DoesNotExist(f"Booking {booking_id} does not exist")
+
+
+async def aget_booking(booking_id, **filters):
+    """get_booking() for async views"""
+    from .models import Booking
+    aliases = booking_databases()
+    home = partition_for_id(booking_id)
+    if home in aliases:
+        aliases.remove(home)
+        aliases.insert(0, home)
+    for alias in aliases:
+        try:
+            return await Booking.objects.using(alias).aget(pk=booking_id, **filters)
+        except Booking.DoesNotExist:
+            continue
+    raise Booking.DoesNotExist(f"Booking {booking_id} does not exist")
+
+
+def get_booking_or_404(booking_id, **filters):
+    from .models import Booking
+    try:
+        return get_booking(booking_id, **filters)
+    except (Booking.DoesNotExist, ValueError):
+        raise Http404('No Booking matches the given query.')
+
+
+def disable_partition_foreign_keys(sender, connection, **kwargs):
+    """
+    connection_created receiver. Rows in a partition reference users,
+    facility sports and time slots that only exist on the default database,
+    which SQLite cannot check across files, so foreign key enforcement is
+    turned off on partition connections.
+    """
+    if connection.vendor == 'sqlite' and connection.alias in settings.BOOKING_PARTITION_ALIASES:
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA foreign_keys = OFF')
@@ -0,0 +1,47 @@
+import logging
+from django.utils import timezone
+from jobs.queue import enqueue, job
+from turfzone.metrics import BOOKING_TRANSITIONS
+from .models import Booking
+from .partitioning import get_booking
+from .utils import send_booking_confirmation_to_user, send_booking_notification_to_admin
+
+logger = logging.getLogger(__name__)
+
+def _booking(booking_id):
+    try:
+        return get_booking(booking_id)
+    except Booking.DoesNotExist:
+        logger.info('Booking %s is gone, skipping its job', booking_id, extra={'booking_id': booking_id})
+        return None
+
+@job(priority=10)
+def email_admin_new_booking(booking_id):
+    """Tell the admin about a booking waiting for approval"""
+    booking = _booking(booking_id)
+    if booking is not None:
+        send_booking_notification_to_admin(booking)
+
+@job(priority=10)
+def email_booking_confirmation(booking_id):
+    """Tell the user their booking is confirmed"""
+    booking = _booking(booking_id)
+    if booking is not None:
+        send_booking_confirmation_to_user(booking)
+
+@job(priority=5)
+def expire_unpaid_booking(booking_id):
+    """Expire a booking still unpaid at its payment deadline, freeing its slot"""
+    booking = _booking(booking_id)
+    if booking is None:
+        return
+    # A conditional update, so a payment that lands meanwhile wins
+    now = timezone.now()
+    expired = Booking.objects.using(booking._state.db).filter(
+        pk=booking.pk, status__in=['initiated', 'payment_pending'], payment_deadline__lte=now
+    ).update(status='expired', updated_at=now)
+    if expired:
+        BOOKING_TRANSITIONS.inc(status='expired')
+
+def schedule_expiry(booking):
+    enqueue(expire_unpaid_booking, [booking.pk], run_at=booking.payment_deadline)
@@ -1,3 +1,124 @@
+from datetime import date, timedelta
+from unittest import mock
+from urllib.parse import urlencode
+from django.db.models import F
 from django.test import TestCase
+from django.urls import reverse
+from accounts.models import User
+from facilities.models import FacilitySport, TimeSlot
+from jobs.models import Job
+from payments.models import ArchivedPayment, Payment
+from reviews.models import Review
+from turfzone.testing import QueryBudgetTestCase, build_dataset
+from .archive import archive_bookings, archive_cutoff
+from .models import ArchivedBooking, ArchivedLiveActivity, Booking, LiveActivity
+from .tasks import expire_unpaid_booking
 
-# Create your tests here.
+
+class BookingQueryBudgetTests(QueryBudgetTestCase):
+    def test_home_slots(self):
+        self.assertQueryBudget(lambda: self.client.get(reverse('home-slots')), queries=9, rows=30)
+
+    def test_api_slots(self):
+        self.client.force_login(self.player)
+        params = {'date': (date.today() + timedelta(days=1)).isoformat(), 'facility_id': self.facility.pk}
+        self.assertQueryBudget(lambda: self.client.get(reverse('api-slots'), params), queries=11, rows=30)
+
+    def test_api_slots_v2(self):
+        self.client.force_login(self.player)
+        params = {'date': (date.today() + timedelta(days=1)).isoformat(), 'facility_id': self.facility.pk}
+        self.assertQueryBudget(lambda: self.client.get(reverse('api-slots-v2'), params), queries=11, rows=30)
+
+    def test_batch(self):
+        # The session and user are loaded once for both sub-requests
+        self.client.force_login(self.player)
+        params = {'date': (date.today() + timedelta(days=1)).isoformat(), 'facility_id': self.facility.pk}
+        urls = [reverse('api-slots-v2') + '?' + urlencode(params), reverse('get-activities')]
+        self.assertQueryBudget(lambda: self.client.get(reverse('api-batch'), {'url': urls}), queries=9, rows=40)
+
+    def test_api_slots_not_modified(self):
+        self.client.force_login(self.player)
+        params = {'date': (date.today() + timedelta(days=1)).isoformat(), 'facility_id': self.facility.pk}
+        # Session and user, then the facility's version and its bookings
+        self.assertNotModified(reverse('api-slots'), queries=4, data=params)
+
+
+class BookingArchiveTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(4)
+        # Everything played well over a year ago, keeping slots distinct
+        Booking.objects.update(date=F('date') - timedelta(days=400))
+
+    def test_archives_finished_bookings_with_their_rows(self):
+        finished = set(Booking.objects.exclude(status='payment_pending').values_list('id', flat=True))
+        reviewed = dict(Review.objects.filter(booking_id__in=finished).values_list('id', 'booking_id'))
+        payments = Payment.objects.count()
+
+        with self.assertLogs('bookings.archive', 'INFO'):
+            self.assertEqual(archive_bookings(batch_size=3), {'default': len(finished)})
+
+        self.assertEqual(set(ArchivedBooking.objects.values_list('id', flat=True)), finished)
+        self.assertEqual(set(ArchivedLiveActivity.objects.values_list('booking_id', flat=True)), finished)
+        self.assertEqual(ArchivedPayment.objects.count(), payments)
+        self.assertFalse(Booking.objects.filter(id__in=finished).exists())
+        self.assertFalse(LiveActivity.objects.filter(booking_id__in=finished).exists())
+        self.assertFalse(Payment.objects.exists())
+        self.assertTrue(Booking.objects.filter(status='payment_pending').exists())
+        # Reviews keep pointing at the archived booking's id
+        self.assertEqual(dict(Review.objects.filter(id__in=reviewed).values_list('id', 'booking_id')), reviewed)
+
+        # Nothing left to move
+        self.assertEqual(archive_bookings(), {'default': 0})
+
+    def test_leaves_recent_bookings(self):
+        self.assertEqual(archive_bookings(cutoff=date.today() - timedelta(days=500)), {'default': 0})
+        self.assertEqual(ArchivedBooking.objects.count(), 0)
+
+    def test_cutoff_months(self):
+        with self.settings(BOOKING_ARCHIVE_AFTER_MONTHS=6):
+            self.assertEqual(archive_cutoff(date(2026, 8, 31)), date(2026, 2, 28))
+            self.assertEqual(archive_cutoff(date(2026, 3, 15)), date(2025, 9, 15))
+
+    def test_reports_include_archived(self):
+        revenue = sum(Booking.objects.filter(status='confirmed').values_list('total_price', flat=True))
+        with self.assertLogs('bookings.archive', 'INFO'):
+            archive_bookings()
+        self.client.force_login(User.objects.get(username='budget_admin'))
+
+        response = self.client.get(reverse('admin-dashboard'))
+        self.assertEqual(sum(row['revenue'] for row in response.context['facility_revenue']), 0)
+        response = self.client.get(reverse('admin-dashboard'), {'archived': '1'})
+        self.assertEqual(sum(row['revenue'] for row in response.context['facility_revenue']), revenue)
+
+
+class BookSlotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users, _ = build_dataset(1)
+        cls.player = users[0]
+        day = (date.today() + timedelta(days=90)).isoformat()
+        cls.slot_id = f'{day}_{TimeSlot.objects.first().pk}_{FacilitySport.objects.first().pk}'
+
+    def setUp(self):
+        self.client.force_login(self.player)
+
+    def book(self):
+        return self.client.post(reverse('api-book-slot'), {'slot_id': self.slot_id}, content_type='application/json')
+
+    def test_booking_gets_its_expiry_job(self):
+        response = self.book()
+        self.assertEqual(response.status_code, 200)
+        booking = Booking.objects.get(pk=response.json()['booking_id'])
+        self.assertEqual(booking.status, 'payment_pending')
+        job = Job.objects.get(task=expire_unpaid_booking.task_name)
+        self.assertEqual(job.args, [booking.pk])
+        self.assertEqual(job.run_at, booking.payment_deadline)
+
+    def test_no_booking_without_its_expiry_job(self):
+        bookings = Booking.objects.count()
+        with mock.patch('bookings.api.schedule_expiry', side_effect=RuntimeError('queue unavailable')), \
+                self.assertLogs('bookings.api', 'ERROR'):
+            self.assertEqual(self.book().status_code, 500)
+        self.assertEqual(Booking.objects.count(), bookings)
+        self.assertFalse(Job.objects.exists())
@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from django.views.generic import TemplateView
-from . import views, api
+from . import views, api, api_v2
 
 router = DefaultRouter()
 router.register(r'api', views.BookingViewSet, basename='booking-api')
@@ -25,5 +25,6 @@ urlpatterns = [
     path('api/activities/', api.get_activities, name='get-activities'),
     path('api/weather/', api.get_weather, name='get-weather'),
     path('api/slots/', api.get_slots, name='api-slots'),
+    path('api/v2/slots/', api_v2.get_slots, name='api-slots-v2'),
     path('api/book/', api.book_slot, name='api-book-slot'),
 ]
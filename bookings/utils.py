@@ -1,6 +1,10 @@
 from django.core.mail import send_mail
 from django.conf import settings
 from django.template.loader import render_to_string
+from turfzone.conditional import achange_marker, api_etag, change_marker
+from turfzone.metrics import track_notification
+from facilities.models import FacilitySport
+from .partitioning import facility_bookings
 
 def send_booking_notification_to_admin(booking):
     """Send a notification email to admin when a new booking is made"""
@@ -8,14 +12,15 @@ def send_booking_notification_to_admin(booking):
     message = render_to_string('emails/admin_booking_notification.html', {
         'booking': booking,
     })
-    send_mail(
-        subject=subject,
-        message=message,
-        html_message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[settings.ADMIN_EMAIL],
-        fail_silently=False,
-    )
+    with track_notification('email'):
+        send_mail(
+            subject=subject,
+            message=message,
+            html_message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[settings.ADMIN_EMAIL],
+            fail_silently=False,
+        )
 
 def send_booking_confirmation_to_user(booking):
     """Send a confirmation email to user when their booking is confirmed"""
@@ -23,11 +28,31 @@ def send_booking_confirmation_to_user(booking):
     message = render_to_string('emails/user_booking_confirmation.html', {
         'booking': booking,
     })
-    send_mail(
-        subject=subject,
-        message=message,
-        html_message=message,
-        from_email=settings.DEFAULT_FROM_EMAIL,
-        recipient_list=[booking.user.email],
-        fail_silently=False,
-    )
\ No newline at end of file
+    with track_notification('email'):
+        send_mail(
+            subject=subject,
+            message=message,
+            html_message=message,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[booking.user.email],
+            fail_silently=False,
+        )
+
+def _facility_sports_changed(facility_id):
+    # The facility's updated_at covers its sports and offers (facilities.signals)
+    return FacilitySport.objects.filter(facility_id=facility_id).values_list('id', 'facility__updated_at')
+
+def slots_etag(request, facility_id, date, *parts):
+    """
+    ETag for a facility's slots on a date: the facility's version from the
+    default database and one aggregate over that day's bookings in its
+    partition
+    """
+    facility_sports = list(_facility_sports_changed(facility_id))
+    bookings = facility_bookings(facility_id, [pk for pk, _ in facility_sports]).filter(date=date)
+    return api_etag(request, facility_sports, change_marker(bookings), *parts)
+
+async def aslots_etag(request, facility_id, date, *parts):
+    facility_sports = [row async for row in _facility_sports_changed(facility_id)]
+    bookings = facility_bookings(facility_id, [pk for pk, _ in facility_sports]).filter(date=date)
+    return api_etag(request, facility_sports, await achange_marker(bookings), *parts)
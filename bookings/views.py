@@ -6,21 +6,24 @@ from django.views.generic import ListView, CreateView, DetailView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse
 from .models import Booking
+from .partitioning import (
+    facility_bookings, fan_out_list, get_booking_or_404, merge_ordered, partition_for_facility_sport, with_shared_related
+)
 from .serializers import BookingSerializer
 from reviews.models import Review
 from facilities.models import FacilitySport, TimeSlot, Offer, Facility, SportType
 from django.db.models import Avg, Count
 
-from django.http import JsonResponse
+from turfzone.fastjson import JsonResponse
+from turfzone.singleflight import SingleFlight
 from django.shortcuts import render
 from datetime import datetime, timedelta
-import pytz
 
 from django.db.models import Q
 from accounts.decorators import admin_required
 from django.utils.decorators import method_decorator
 from django.contrib.auth import get_user_model
-from .utils import send_booking_notification_to_admin, send_booking_confirmation_to_user
+from .tasks import email_admin_new_booking, email_booking_confirmation, schedule_expiry
 from django.utils.timesince import timesince
 import json
 
@@ -110,17 +113,21 @@ class BookingViewSet(viewsets.ModelViewSet):
         # Auto-confirm if user is admin
         initial_status = 'confirmed' if self.request.user.is_admin else 'pending'
         
-        booking = serializer.save(
-            user=self.request.user,
-            total_price=total_price,
-            status=initial_status
-        )
-        
-        # Send notifications
-        if initial_status == 'pending':
-            send_booking_notification_to_admin(booking)
-        else:
-            send_booking_confirmation_to_user(booking)
+        # The notification is queued with the booking and sent by a job
+        # worker once both are committed. Jobs live on the default database;
+        # a booking in a partition commits right after its job, and the job
+        # skips a booking that didn't make it.
+        using = partition_for_facility_sport(facility_sport.id)
+        with transaction.atomic(using=using), transaction.atomic():
+            booking = serializer.save(
+                user=self.request.user,
+                total_price=total_price,
+                status=initial_status
+            )
+            if initial_status == 'pending':
+                email_admin_new_booking.enqueue(booking.pk)
+            else:
+                email_booking_confirmation.enqueue(booking.pk)
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -149,11 +156,11 @@ class BookingViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        booking.status = 'confirmed'
-        booking.save()
-        
-        # Send confirmation email to user
-        send_booking_confirmation_to_user(booking)
+        # Queue the confirmation email to the user with the change
+        with transaction.atomic(using=booking._state.db), transaction.atomic():
+            booking.status = 'confirmed'
+            booking.save()
+            email_booking_confirmation.enqueue(booking.pk)
         
         return Response({"status": "booking approved"})
     
@@ -191,11 +198,16 @@ class UserBookingListView(LoginRequiredMixin, ListView):
     context_object_name = 'bookings'
 
     def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user).select_related(
-            'facility_sport__facility',
-            'facility_sport__sport',
-            'time_slot'
-        ).order_by('-date')
+        return merge_ordered(
+            with_shared_related(
+                Booking.objects.filter(user=self.request.user),
+                'facility_sport__facility',
+                'facility_sport__sport',
+                'time_slot'
+            ).order_by('-date'),
+            key=lambda booking: booking.date,
+            reverse=True
+        )
 
 from django.db import transaction
 from django.urls import reverse
@@ -236,14 +248,19 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
         return context
 
     def form_valid(self, form):
+        # The booking is written to its facility's partition, so the
+        # transaction has to be opened there
+        facility_sport = form.cleaned_data.get('facility_sport')
+        using = partition_for_facility_sport(facility_sport.id) if facility_sport else None
         try:
-            with transaction.atomic():
+            # The expiry job is written on the default database
+            with transaction.atomic(using=using), transaction.atomic():
                 # Get selected date and validate
                 selected_date = form.cleaned_data['date']
-                logger.info(f"Booking attempt started: user={self.request.user}, date={selected_date}")
+                logger.info('Booking attempt started: user=%s date=%s', self.request.user.pk, selected_date)
 
                 if selected_date < timezone.now().date():
-                    logger.warning(f"Booking failed: past date selected - {selected_date}")
+                    logger.info('Booking failed: past date selected - %s', selected_date)
                     form.add_error('date', 'Cannot book for past dates')
                     return self.form_invalid(form)
 
@@ -251,11 +268,9 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                 facility_sport = form.instance.facility_sport
                 time_slot = form.instance.time_slot
 
-                logger.info(f"Form data: facility_sport={form.data.get('facility_sport')}, time_slot={form.data.get('time_slot')}, date={form.data.get('date')}")
-
                 # Validate that facility_sport and time_slot exist
                 if not facility_sport:
-                    logger.error(f"Invalid facility_sport ID: {form.data.get('facility_sport')}")
+                    logger.info('Invalid facility_sport ID: %r', form.data.get('facility_sport'))
                     if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({
                             'status': 'error',
@@ -265,7 +280,7 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                     return self.form_invalid(form)
 
                 if not time_slot:
-                    logger.error(f"Invalid time_slot ID: {form.data.get('time_slot')}")
+                    logger.info('Invalid time_slot ID: %r', form.data.get('time_slot'))
                     if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({
                             'status': 'error',
@@ -274,11 +289,8 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                     form.add_error('time_slot', 'Invalid time slot selected')
                     return self.form_invalid(form)
 
-                # Log the booking attempt details for debugging
-                logger.info(f"Booking attempt: user={self.request.user}, facility_sport={facility_sport}, date={selected_date}, time_slot={time_slot}")
-
                 # Lock the time slot for concurrent booking prevention
-                existing_booking = Booking.objects.select_for_update().filter(
+                existing_booking = Booking.objects.using(using).select_for_update().filter(
                     facility_sport=facility_sport,
                     date=selected_date,
                     time_slot=time_slot,
@@ -286,7 +298,11 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                 ).exists()
 
                 if existing_booking:
-                    logger.warning(f"Booking failed: time slot already booked for facility_sport={facility_sport}, date={selected_date}, time_slot={time_slot}")
+                    logger.info(
+                        'Booking failed: slot already booked for facility_sport=%s date=%s time_slot=%s',
+                        facility_sport.pk, selected_date, time_slot.pk,
+                        extra={'facility_sport_id': facility_sport.pk, 'date': selected_date, 'time_slot_id': time_slot.pk}
+                    )
                     if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                         return JsonResponse({
                             'status': 'error',
@@ -300,12 +316,16 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                 form.instance.date = selected_date
                 form.instance.status = 'initiated'
 
-                logger.info(f"Saving booking: user={self.request.user}, facility_sport={facility_sport}, date={selected_date}, time_slot={time_slot}")
-
                 # Save booking - price calculation happens in model's save method
                 response = super().form_valid(form)
+                schedule_expiry(self.object)
 
-                logger.info(f"Booking saved successfully: id={self.object.id}, total_price={self.object.total_price}")
+                logger.info(
+                    'Booking %s saved: user=%s facility_sport=%s date=%s time_slot=%s total_price=%s',
+                    self.object.id, self.request.user.pk, facility_sport.pk, selected_date, time_slot.pk,
+                    self.object.total_price,
+                    extra={'booking_id': self.object.id, 'user_id': self.request.user.pk, 'facility_sport_id': facility_sport.pk}
+                )
 
                 if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                     return JsonResponse({
@@ -320,7 +340,7 @@ class BookingCreateView(LoginRequiredMixin, CreateView):
                 return response
 
         except Exception as e:
-            logger.error(f"Booking creation error: {str(e)}", exc_info=True)
+            logger.exception('Booking creation failed')
             if self.request.headers.get('X-Requested-With') == 'XMLHttpRequest':
                 return JsonResponse({
                     'status': 'error',
@@ -350,17 +370,17 @@ class BookingDetailView(LoginRequiredMixin, DetailView):
     template_name = 'bookings/booking_detail.html'
     context_object_name = 'booking'
 
-    def get_queryset(self):
-        return Booking.objects.filter(user=self.request.user)
+    def get_object(self, queryset=None):
+        return get_booking_or_404(self.kwargs['pk'], user=self.request.user)
 
 
 from django.contrib.auth.decorators import login_required
-from django.shortcuts import get_object_or_404, redirect
+from django.shortcuts import redirect
 from django.contrib import messages
 
 @login_required
 def review_booking(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    booking = get_booking_or_404(booking_id, user=request.user)
 
     # Check if booking is completed and hasn't been reviewed yet
     if booking.status != 'completed':
@@ -418,7 +438,7 @@ def review_booking(request, booking_id):
 
 @login_required
 def cancel_booking(request, pk):
-    booking = get_object_or_404(Booking, pk=pk)
+    booking = get_booking_or_404(pk)
 
     # Allow admins to cancel any booking, users can only cancel their confirmed bookings
     if not request.user.is_admin:
@@ -455,14 +475,18 @@ def get_slots(request):
         all_slots = TimeSlot.objects.all()
 
         # Get booked slots for the date
-        booked_slots = Booking.objects.filter(
-            date=date_obj,
-            status__in=['confirmed', 'pending'],
-        )
         if facility_id:
-            booked_slots = booked_slots.filter(facility_sport__facility_id=facility_id)
+            booked_slots = facility_bookings(facility_id).filter(
+                date=date_obj,
+                status__in=['confirmed', 'pending'],
+            ).values_list('time_slot_id', flat=True)
+        else:
+            booked_slots = fan_out_list(Booking.objects.filter(
+                date=date_obj,
+                status__in=['confirmed', 'pending'],
+            ).values_list('time_slot_id', flat=True))
 
-        booked_slot_ids = set(booked_slots.values_list('time_slot_id', flat=True))
+        booked_slot_ids = set(booked_slots)
 
         # Get active offers for the facility
         offers = []
@@ -536,7 +560,7 @@ def get_slots(request):
                     # Apply discount only for early bird slots (6-10am)
                     slot_hour = slot.start_time.hour
                     if active_offer and (slot_hour >= 6 and slot_hour < 10):
-                        discount = base_price * (active_offer.discount_percentage / 100)
+                        discount = base_price * float(active_offer.discount_percentage) / 100
                         discounted_price = base_price - discount
                         sport_slot['discounted_price'] = float(discounted_price)
                         sport_slot['discount_percentage'] = active_offer.discount_percentage
@@ -556,31 +580,34 @@ def get_slots(request):
         })
 
     except Exception as e:
-        logger.error(f"Error in get_slots: {str(e)}", exc_info=True)
+        logger.exception('get_slots failed')
         return JsonResponse({
             'error': 'Internal server error occurred while loading slots'
         }, status=500)
 
 
-def home_get_slots(request):
-    """
-    Returns preview slots for home page.
-    Shows slots for next 3 days for all facilities combined.
-    """
-    current_datetime = timezone.localtime(timezone.now())
-    today = current_datetime.date()
-    current_time = current_datetime.time()
-    dates = [today + timedelta(days=i) for i in range(3)]
-    
+preview_slot_flights = SingleFlight('preview_slots')
+
+def preview_slot_grid(dates, today, current_time):
     all_slots = TimeSlot.objects.all()
     date_slots = {}
+
+    # The early bird price is the same for every slot and date, so look it up once
+    base_sport = FacilitySport.objects.filter(is_available=True).first()
+    base_price = float(base_sport.price_per_slot) if base_sport else None
     
     for date in dates:
+        active_offer = Offer.objects.filter(
+            start_date__lte=date,
+            end_date__gte=date,
+            is_active=True
+        ).first()
+
         # Get booked slots for the date
-        booked_slots = Booking.objects.filter(
+        booked_slots = fan_out_list(Booking.objects.filter(
             date=date,
             status__in=['confirmed', 'pending'],
-        ).values_list('time_slot_id', flat=True)
+        ).values_list('time_slot_id', flat=True))
         
         booked_slot_ids = set(booked_slots)
         
@@ -611,28 +638,33 @@ def home_get_slots(request):
                 'discount_percentage': 0
             }
             # Early bird offer logic: only for slots starting between 6:00 and 10:00 IST
-            slot_time = timezone.localtime(datetime.combine(date, slot.start_time))
+            slot_time = timezone.localtime(timezone.make_aware(datetime.combine(date, slot.start_time)))
             slot_hour = slot_time.hour
-            active_offer = None
-            offers = Offer.objects.filter(
-                start_date__lte=date,
-                end_date__gte=date,
-                is_active=True
-            )
-            if offers.exists() and (slot_hour >= 6 and slot_hour < 10):
-                active_offer = offers.first()
-                base_price = None
-                sports = FacilitySport.objects.filter(is_available=True).select_related('sport')
-                if sports.exists():
-                    base_price = float(sports.first().price_per_slot)
-                if base_price:
-                    discount = base_price * (active_offer.discount_percentage / 100)
-                    discounted_price = base_price - discount
-                    slot_data['discounted_price'] = float(discounted_price)
-                    slot_data['discount_percentage'] = active_offer.discount_percentage
+            if active_offer and base_price and (slot_hour >= 6 and slot_hour < 10):
+                discount = base_price * float(active_offer.discount_percentage) / 100
+                discounted_price = base_price - discount
+                slot_data['discounted_price'] = float(discounted_price)
+                slot_data['discount_percentage'] = active_offer.discount_percentage
             available_slots.append(slot_data)
         date_slots[date] = available_slots
+    return date_slots
+
+def home_get_slots(request):
+    """
+    Returns preview slots for home page.
+    Shows slots for next 3 days for all facilities combined.
+    """
+    current_datetime = timezone.localtime(timezone.now())
+    today = current_datetime.date()
+    current_time = current_datetime.time()
+    dates = [today + timedelta(days=i) for i in range(3)]
     
+    # Slots only turn past on the minute, so requests in the same minute
+    # share one grid
+    date_slots = preview_slot_flights.do(
+        (today, current_time.strftime('%H:%M')), lambda: preview_slot_grid(dates, today, current_time)
+    )
+
     context = {
         'date_slots': date_slots,
         'dates': dates,
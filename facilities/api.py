@@ -1,7 +1,30 @@
-from django.http import JsonResponse
+from turfzone.fastjson import JsonResponse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response
 from .models import Facility, TimeSlot
-from bookings.models import Booking
+from bookings.partitioning import facility_bookings
+from bookings.utils import slots_etag
+from turfzone.singleflight import SingleFlight
+
+available_slot_flights = SingleFlight('available_slots')
+
+def available_slots(facility_id, date):
+    # Get booked slots for the date
+    booked_slots = set(facility_bookings(facility_id).filter(
+        date=date,
+        status__in=['pending', 'confirmed']
+    ).values_list('time_slot_id', flat=True))
+
+    # Get all time slots and check availability
+    slots = []
+    for slot in TimeSlot.objects.all().order_by('start_time'):
+        is_available = slot.id not in booked_slots
+        slots.append({
+            'id': slot.id,
+            'display_time': f'{slot.start_time.strftime("%I:%M %p")} - {slot.end_time.strftime("%I:%M %p")}',
+            'is_available': is_available
+        })
+    return slots
 
 def get_available_slots(request):
     """Get available time slots for a facility on a specific date."""
@@ -24,24 +47,17 @@ def get_available_slots(request):
         except ValueError:
             return JsonResponse({'error': 'Invalid date format'}, status=400)
 
-        # Get booked slots for the date
-        booked_slots = Booking.objects.filter(
-            facility=facility,
-            date=date,
-            status__in=['pending', 'confirmed']
-        ).values_list('time_slot_id', flat=True)
-
-        # Get all time slots and check availability
-        slots = []
-        for slot in TimeSlot.objects.all().order_by('start_time'):
-            is_available = slot.id not in booked_slots
-            slots.append({
-                'id': slot.id,
-                'display_time': f'{slot.start_time.strftime("%I:%M %p")} - {slot.end_time.strftime("%I:%M %p")}',
-                'is_available': is_available
-            })
-
-        return JsonResponse({'slots': slots})
+        etag = slots_etag(request, facility.id, date)
+        response = get_conditional_response(request, etag=etag)
+        if response is not None:
+            return response
+
+        # Keyed on the ETag too, so a request never gets a result computed
+        # from older data than the ETag it is sent with
+        slots = available_slot_flights.do((facility.id, date, etag), lambda: available_slots(facility.id, date))
+        response = JsonResponse({'slots': slots})
+        response['ETag'] = etag
+        return response
 
     except Exception as e:
         return JsonResponse({'error': str(e)}, status=500)
\ No newline at end of file
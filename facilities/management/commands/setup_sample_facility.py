@@ -9,13 +9,15 @@ from facilities.models import (
     TimeSlot,
     Offer
 )
-import requests
 from datetime import time, timedelta
 
 class Command(BaseCommand):
     help = 'Sets up a sample facility with images and related data'
 
     def handle(self, *args, **kwargs):
+        # Only needed to download the sample images
+        import requests
+
         # Create facility if none exists
         facility, created = Facility.objects.get_or_create(
             name="TurfZone Arena Mumbai Central",
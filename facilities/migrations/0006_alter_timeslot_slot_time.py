@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0005_facilitysport_max_players'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='timeslot',
+            name='slot_time',
+            field=models.CharField(choices=[('06:00-08:00', '6 AM - 8 AM IST'), ('08:00-10:00', '8 AM - 10 AM IST'), ('10:00-12:00', '10 AM - 12 PM IST'), ('12:00-13:00', 'Lunch Break'), ('14:00-16:00', '2 PM - 4 PM IST'), ('16:00-18:00', '4 PM - 6 PM IST'), ('18:00-20:00', '6 PM - 8 PM IST'), ('20:00-22:00', '8 PM - 10 PM IST'), ('22:00-00:00', '10 PM - 12 AM IST')], max_length=20),
+        ),
+    ]
@@ -18,5 +18,5 @@ class FacilitySerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Facility
-        fields = ['id', 'name', 'description', 'location', 'latitude', 'longitude', 
+        fields = ['id', 'name', 'description', 'location', 'google_maps_link',
                 'created_at', 'updated_at', 'sports', 'images']
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+Keep Facility.updated_at current for everything shown with a facility, so
+it can serve as the facility's ETag validator (see turfzone.conditional).
+Connected in FacilitiesConfig.ready().
+"""
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from .models import Facility, FacilityImage, FacilitySport, Offer, SiteSettings, SportType, TimeSlot
+
+
+def touch_facilities(facilities):
+    """Mark the facilities (a queryset) as changed without a full save"""
+    facilities.update(updated_at=timezone.now())
+
+
+def touch_facility(facility_id):
+    touch_facilities(Facility.objects.filter(pk=facility_id))
+
+
+def _child_changed(sender, instance, **kwargs):
+    touch_facility(instance.facility_id)
+
+
+def _sport_type_changed(sender, instance, **kwargs):
+    touch_facilities(Facility.objects.filter(sports__sport=instance))
+
+
+def _shared_changed(sender, instance, **kwargs):
+    # Time slots and site settings appear on every facility page
+    touch_facilities(Facility.objects.all())
+
+
+def _reply_changed(sender, instance, **kwargs):
+    touch_facilities(Facility.objects.filter(facility_reviews__pk=instance.review_id))
+
+
+def connect():
+    from reviews.models import Reply, Review
+    receivers = [
+        (FacilitySport, _child_changed),
+        (Offer, _child_changed),
+        (FacilityImage, _child_changed),
+        (SportType, _sport_type_changed),
+        (TimeSlot, _shared_changed),
+        (SiteSettings, _shared_changed),
+        (Review, _child_changed),
+        (Reply, _reply_changed),
+    ]
+    for model, receiver in receivers:
+        for signal, name in ((post_save, 'save'), (post_delete, 'delete')):
+            signal.connect(receiver, sender=model, dispatch_uid=f'touch_facility_{name}_{model._meta.label_lower}')
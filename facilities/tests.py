@@ -1,3 +1,87 @@
-from django.test import TestCase
+import threading
+from datetime import date, timedelta
+from unittest import mock
+from django.db import connection
+from django.test import TransactionTestCase
+from django.urls import reverse
+from bookings.models import Booking
+from reviews.models import Review
+from turfzone.testing import QueryBudgetTestCase, build_dataset
+from . import api
+from .models import Facility, FacilitySport, TimeSlot
 
-# Create your tests here.
+
+class FacilityQueryBudgetTests(QueryBudgetTestCase):
+    def test_home(self):
+        self.assertQueryBudget(lambda: self.client.get(reverse('home')), queries=14, rows=40)
+
+    def test_facility_detail(self):
+        url = reverse('facility-detail', args=[self.facility.pk])
+        self.assertQueryBudget(lambda: self.client.get(url), queries=5, rows=15)
+
+    def test_review_list(self):
+        self.client.force_login(self.player)
+        self.assertQueryBudget(lambda: self.client.get(reverse('review-list')), queries=7, rows=30)
+
+    def test_facility_detail_not_modified(self):
+        self.assertNotModified(reverse('facility-detail', args=[self.facility.pk]), queries=1)
+
+    def test_facility_detail_changes_with_reviews(self):
+        url = reverse('facility-detail', args=[self.facility.pk])
+        etag = self.client.get(url)['ETag']
+        Review.objects.create(user=self.player, facility=self.facility, rating=4, review_text='Good turf')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_review_list_not_modified(self):
+        self.client.force_login(self.player)
+        # Session and user, then the validator
+        self.assertNotModified(reverse('review-list'), queries=3)
+
+
+class SlotFlightTests(TransactionTestCase):
+    def test_write_during_flight_is_not_shared(self):
+        users, _ = build_dataset(1)
+        facility = Facility.objects.get()
+        slot = TimeSlot.objects.order_by('start_time').first()
+        params = {'facility_id': facility.pk, 'date': (date.today() + timedelta(days=90)).isoformat()}
+        # reverse('get-slots') finds the bookings API's URL of the same name
+        url = '/facilities/get-slots/'
+        leader_computed = threading.Event()
+        release = threading.Event()
+        responses = {}
+        available_slots = api.available_slots
+
+        def hold_leader(facility_id, day):
+            slots = available_slots(facility_id, day)
+            if not leader_computed.is_set():
+                leader_computed.set()
+                release.wait(5)
+            return slots
+
+        def get(name):
+            responses[name] = self.client.get(url, params)
+            connection.close()
+
+        with mock.patch.object(api, 'available_slots', side_effect=hold_leader, autospec=True):
+            leader = threading.Thread(target=get, args=['leader'])
+            leader.start()
+            self.assertTrue(leader_computed.wait(5))
+            # The slot is booked after the leader loaded the slots, but before
+            # the follower asks for them
+            Booking.objects.create(
+                user=users[0], facility_sport=FacilitySport.objects.first(), status='confirmed',
+                date=params['date'], time_slot=slot
+            )
+            follower = threading.Thread(target=get, args=['follower'])
+            follower.start()
+            follower.join(2)
+            release.set()
+            follower.join()
+            leader.join()
+
+        def available(response):
+            return {row['id']: row['is_available'] for row in response.json()['slots']}[slot.id]
+
+        self.assertTrue(available(responses['leader']))
+        self.assertFalse(available(responses['follower']))
+        self.assertNotEqual(responses['leader']['ETag'], responses['follower']['ETag'])
@@ -6,13 +6,17 @@ from django.views.generic import ListView, DetailView, TemplateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import get_object_or_404
-from django.http import JsonResponse
-from django.views.decorators.http import require_POST
+from turfzone.fastjson import JsonResponse
+from django.views.decorators.http import etag, require_POST
 from django.core.files.storage import default_storage
 from django.utils.decorators import method_decorator
 from django.db import transaction
 from django.core.exceptions import ValidationError
+from django.db.models import Avg, Count
 from accounts.decorators import admin_required
+from turfzone.conditional import api_etag, change_marker, page_etag
+from turfzone.db_routers import ReplicaReadMixin
+from turfzone.singleflight import SingleFlight
 from .models import (
     Facility, FacilitySport, SportType, Offer, 
     TimeSlot, SiteSettings, FacilityImage
@@ -21,7 +25,23 @@ from reviews.models import Review
 from .serializers import FacilitySerializer, FacilitySportSerializer
 from .forms import FacilityForm, SportTypeForm, FacilitySportForm, SportManagementForm
 
-class FacilityListView(ListView):
+# Reviews listed on a facility page; the rating summary covers all of them
+FACILITY_REVIEWS_SHOWN = 10
+
+def facility_changed(pk):
+    # Touched whenever anything shown with the facility changes (facilities.signals)
+    return Facility.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+
+def facility_list_page_etag(request):
+    return page_etag(request, change_marker(Facility.objects.all()))
+
+def facility_page_etag(request, pk):
+    changed = facility_changed(pk)
+    # The date picker on the page starts at today
+    return page_etag(request, changed, timezone.localdate()) if changed else None
+
+@method_decorator(etag(facility_list_page_etag), name='get')
+class FacilityListView(ReplicaReadMixin, ListView):
     model = Facility
     template_name = 'facilities/facility_list.html'
     context_object_name = 'facilities'
@@ -29,7 +49,24 @@ class FacilityListView(ListView):
     def get_queryset(self):
         return Facility.objects.all()
 
-class FacilityDetailView(DetailView):
+# Everyone opening a facility that was just shared or promoted asks for the
+# same reviews and stats at once; one request runs the queries for all
+facility_page_flights = SingleFlight('facility_page')
+
+def facility_page_data(facility):
+    # Get the latest reviews with user info
+    data = {}
+    reviews = Review.objects.filter(facility=facility)
+    data['reviews'] = list(reviews.select_related('user').order_by('-is_approved', '-created_at')[:FACILITY_REVIEWS_SHOWN])
+
+    # Calculate average rating over all reviews in the database
+    stats = reviews.aggregate(average_rating=Avg('rating'), rating_count=Count('id'))
+    data['average_rating'] = stats['average_rating'] or 0
+    data['rating_count'] = stats['rating_count']
+    return data
+
+@method_decorator(etag(facility_page_etag), name='get')
+class FacilityDetailView(ReplicaReadMixin, DetailView):
     model = Facility
     template_name = 'facilities/facility_detail.html'
     context_object_name = 'facility'
@@ -39,28 +76,20 @@ class FacilityDetailView(DetailView):
         
         # Get facility sports with prefetched relationships
         context['facility_sports'] = self.object.sports.select_related('sport').all()
-        
-        # Get reviews with user info
-        context['reviews'] = Review.objects.filter(facility=self.object)\
-            .select_related('user')\
-            .order_by('-is_approved', '-created_at')
-        
-        # Calculate average rating
-        reviews = context['reviews']
-        if reviews:
-            total_rating = sum(review.rating for review in reviews)
-            context['average_rating'] = total_rating / len(reviews)
-            context['rating_count'] = len(reviews)
-        else:
-            context['average_rating'] = 0
-            context['rating_count'] = 0
-        
+
+        # Keyed on the facility's version (what the ETag is computed from,
+        # read after it), so a request never gets data older than its ETag.
+        # The ETag itself also holds the user, which would stop sharing
+        context.update(facility_page_flights.do(
+            (self.object.pk, self.object.updated_at), lambda: facility_page_data(self.object)
+        ))
+
         # Add today's date for the date picker min value
         context['today'] = timezone.now().date()
-        
+
         # Get available time slots for today
         context['time_slots'] = TimeSlot.objects.all()
-        
+
         return context
 
 class AdminSettingsView(TemplateView):
@@ -632,6 +661,15 @@ def manage_facility_sports(request, facility_id):
                 'message': str(e)
             }, status=400)
 
+def facility_list_api_etag(request, *args, **kwargs):
+    return api_etag(request, change_marker(Facility.objects.all()))
+
+def facility_api_etag(request, pk, *args, **kwargs):
+    changed = facility_changed(pk)
+    return api_etag(request, changed) if changed else None
+
+@method_decorator(etag(facility_list_api_etag), name='list')
+@method_decorator(etag(facility_api_etag), name='retrieve')
 class FacilityViewSet(viewsets.ModelViewSet):
     queryset = Facility.objects.all()
     serializer_class = FacilitySerializer
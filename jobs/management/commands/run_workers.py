@@ -0,0 +1,48 @@
+import multiprocessing
+import signal
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from jobs.worker import run_workers
+
+class Command(BaseCommand):
+    help = 'Run background job workers until stopped (SIGTERM/SIGINT let running jobs finish)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=settings.JOBS_WORKER_THREADS,
+                            help='Worker threads per process')
+        parser.add_argument('--processes', type=int, default=1,
+                            help='Worker processes, for CPU-bound tasks that threads cannot run in parallel')
+        parser.add_argument('--burst', action='store_true',
+                            help='Exit once no job is due instead of waiting for more')
+
+    def handle(self, *args, **options):
+        threads, processes = options['threads'], options['processes']
+        if threads < 1 or processes < 1:
+            raise CommandError('--threads and --processes must be at least 1')
+
+        if processes == 1:
+            run_workers(threads, options['burst'])
+            return
+
+        if 'fork' not in multiprocessing.get_all_start_methods():
+            raise CommandError('--processes needs fork(); run one run_workers per process instead')
+        # Children must open their own connections rather than share these
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        children = [
+            context.Process(target=run_workers, args=(threads, options['burst']), name=f'jobs-{index}')
+            for index in range(processes)
+        ]
+        for child in children:
+            child.start()
+
+        def stop(signum, frame):
+            for child in children:
+                if child.is_alive():
+                    child.terminate()  # SIGTERM: finish current jobs, then exit
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for child in children:
+            child.join()
@@ -0,0 +1,34 @@
+from django.db import models
+from django.utils import timezone
+
+class Job(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),      # Waiting for run_at and a free worker
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('dead', 'Dead'),          # Failed max_attempts times; retry from the admin
+    ]
+
+    task = models.CharField(max_length=200)  # Name registered with @job
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='queued')
+    priority = models.SmallIntegerField(default=0)  # Higher runs first
+    run_at = models.DateTimeField(default=timezone.now)  # Not before this
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)  # Worker running it
+    locked_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Workers claim by status, then priority and due time
+            models.Index(fields=['status', '-priority', 'run_at'], name='jobs_claim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.pk} ({self.status})"
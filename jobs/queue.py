@@ -0,0 +1,188 @@
+"""
+A job queue kept in the database.
+
+Register a function as a task with @job, in an app's tasks.py (they are
+imported when the app registry is ready), and queue calls to it:
+
+    @job(priority=10)
+    def email_booking_confirmation(booking_id): ...
+
+    with transaction.atomic():
+        booking.save()
+        email_booking_confirmation.enqueue(booking.pk)
+
+The job is a row written in the caller's transaction, so it exists exactly
+when the change it is about was committed. Arguments are stored as JSON:
+pass ids, not model instances. `manage.py run_workers` runs the jobs.
+
+Workers take the due job with the highest priority. On databases with
+SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL, MySQL 8) they claim jobs
+under row locks and skip the rows other workers hold. SQLite has no row
+locks; there each job is claimed with a conditional UPDATE that only one
+worker can win.
+
+A job that raises is retried after JOBS_RETRY_BACKOFF seconds, doubling on
+each attempt. After max_attempts it is marked dead, with the traceback in
+last_error, until it is retried from the admin. Jobs run at least once: a
+worker that dies mid-job leaves it running, and it is requeued after
+JOBS_LOCK_TIMEOUT. Tasks should be safe to run twice.
+"""
+import logging
+import random
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from turfzone.metrics import JOB_DURATION, JOBS, register_collector
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+_tasks = {}
+
+
+def job(name=None, priority=0, max_attempts=None):
+    """Register a function as a task; it gains enqueue(*args, **kwargs)"""
+    def register(func):
+        task_name = name or f'{func.__module__}.{func.__name__}'
+        _tasks[task_name] = func
+        func.task_name = task_name
+        func.priority = priority
+        func.max_attempts = max_attempts
+        func.enqueue = lambda *args, **kwargs: enqueue(func, args, kwargs)
+        return func
+    return register
+
+
+def enqueue(task, args=(), kwargs=None, priority=None, run_at=None, delay=None):
+    """
+    Queue task(*args, **kwargs). run_at or delay (a timedelta) schedule it
+    for later; priority overrides the task's.
+    """
+    if run_at is None:
+        run_at = timezone.now() + delay if delay else timezone.now()
+    return Job.objects.create(
+        task=task.task_name,
+        args=list(args),
+        kwargs=kwargs or {},
+        priority=task.priority if priority is None else priority,
+        max_attempts=task.max_attempts or settings.JOBS_MAX_ATTEMPTS,
+        run_at=run_at,
+    )
+
+
+def claim(worker, limit=1):
+    """Mark up to limit due jobs as running for this worker and return them"""
+    now = timezone.now()
+    due = Job.objects.filter(status='queued', run_at__lte=now).order_by('-priority', 'run_at', 'pk')
+    # An attempt counts from the claim, so a job that kills its worker
+    # still runs out of attempts
+    claimed = {'status': 'running', 'locked_by': worker, 'locked_at': now, 'attempts': F('attempts') + 1}
+    database = router.db_for_write(Job)
+
+    if connections[database].features.has_select_for_update_skip_locked:
+        with transaction.atomic(using=database):
+            jobs = list(due.select_for_update(skip_locked=True)[:limit])
+            Job.objects.filter(pk__in=[candidate.pk for candidate in jobs]).update(**claimed)
+    else:
+        # Another worker may claim a candidate first; its update then
+        # matches no row and the job is skipped
+        jobs = [
+            candidate for candidate in due[:limit]
+            if Job.objects.filter(pk=candidate.pk, status='queued').update(**claimed)
+        ]
+
+    for job_row in jobs:
+        job_row.status, job_row.locked_by, job_row.locked_at = 'running', worker, now
+        job_row.attempts += 1
+    return jobs
+
+
+def run(job_row):
+    """Run a claimed job and record the outcome"""
+    started = time.monotonic()
+    try:
+        task = _tasks.get(job_row.task)
+        if task is None:
+            raise LookupError(f'No task named {job_row.task}')
+        task(*job_row.args, **job_row.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job_row.attempts >= job_row.max_attempts:
+            outcome = 'dead'
+            logger.error(
+                'Job %s (%s) failed %d times, giving up', job_row.pk, job_row.task, job_row.attempts,
+                extra={'job_id': job_row.pk, 'task': job_row.task}
+            )
+            _finish(job_row, status='dead', last_error=error, finished_at=timezone.now())
+        else:
+            outcome = 'retry'
+            delay = retry_delay(job_row.attempts)
+            logger.warning(
+                'Job %s (%s) failed, retrying in %ds', job_row.pk, job_row.task, delay,
+                extra={'job_id': job_row.pk, 'task': job_row.task, 'attempts': job_row.attempts}
+            )
+            _finish(job_row, status='queued', last_error=error, run_at=timezone.now() + timedelta(seconds=delay))
+    else:
+        outcome = 'done'
+        _finish(job_row, status='done', finished_at=timezone.now())
+    JOBS.inc(task=job_row.task, outcome=outcome)
+    JOB_DURATION.observe(time.monotonic() - started, task=job_row.task)
+    return outcome
+
+
+def retry_delay(attempts):
+    delay = min(settings.JOBS_RETRY_BACKOFF * 2 ** (attempts - 1), settings.JOBS_RETRY_BACKOFF_MAX)
+    # Jitter, so jobs that failed together don't all retry together
+    return delay + random.uniform(0, delay / 10)
+
+
+def _finish(job_row, **fields):
+    # Only while this worker still holds the job; after JOBS_LOCK_TIMEOUT it
+    # may have been requeued and claimed by another
+    Job.objects.filter(pk=job_row.pk, status='running', locked_by=job_row.locked_by).update(
+        locked_by='', locked_at=None, **fields
+    )
+
+
+def requeue_stale():
+    """Requeue running jobs whose worker has gone quiet for JOBS_LOCK_TIMEOUT"""
+    now = timezone.now()
+    stale = Job.objects.filter(status='running', locked_at__lt=now - timedelta(seconds=settings.JOBS_LOCK_TIMEOUT))
+    lost = {'locked_by': '', 'locked_at': None, 'last_error': 'The worker running it stopped responding'}
+    dead = stale.filter(attempts__gte=F('max_attempts')).update(status='dead', finished_at=now, **lost)
+    requeued = stale.update(status='queued', **lost)
+    if dead or requeued:
+        logger.warning(
+            'Jobs from stopped workers: %d requeued, %d dead', requeued, dead,
+            extra={'requeued': requeued, 'dead': dead}
+        )
+    return requeued
+
+
+def prune_done():
+    """Delete jobs that finished successfully more than JOBS_KEEP_DONE_DAYS ago"""
+    cutoff = timezone.now() - timedelta(days=settings.JOBS_KEEP_DONE_DAYS)
+    deleted, _ = Job.objects.filter(status='done', finished_at__lt=cutoff).delete()
+    return deleted
+
+
+@register_collector(per_process=False)
+def _pending_job_metrics():
+    # Queue depth: due jobs waiting for a worker, queued jobs not due yet
+    # (mostly retries in backoff) and jobs being run
+    now = timezone.now()
+    counts = Job.objects.filter(status__in=['queued', 'running']).values('task').annotate(
+        due=Count('pk', filter=Q(status='queued', run_at__lte=now)),
+        scheduled=Count('pk', filter=Q(status='queued', run_at__gt=now)),
+        running=Count('pk', filter=Q(status='running')),
+    )
+    samples = []
+    for row in counts:
+        for state in ('due', 'scheduled', 'running'):
+            samples.append(([row['task'], state], row[state]))
+    yield ('turfzone_jobs_pending', 'gauge', 'Background jobs not finished yet by task and state',
+           ['task', 'state'], samples)
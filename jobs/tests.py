@@ -0,0 +1,69 @@
+from datetime import timedelta
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from .models import Job
+from .queue import claim, enqueue, job, requeue_stale, run
+
+calls = []
+
+
+@job(name='jobs.tests.record')
+def record(value):
+    calls.append(value)
+
+
+@job(name='jobs.tests.fail', max_attempts=2)
+def fail():
+    raise ValueError('broken')
+
+
+@override_settings(JOBS_RETRY_BACKOFF=30, JOBS_RETRY_BACKOFF_MAX=3600, JOBS_LOCK_TIMEOUT=600)
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_runs_by_priority_then_due_time(self):
+        record.enqueue('first')
+        enqueue(record, ['urgent'], priority=5)
+        enqueue(record, ['later'], delay=timedelta(hours=1))
+
+        while jobs := claim('test'):
+            run(jobs[0])
+
+        self.assertEqual(calls, ['urgent', 'first'])
+        self.assertEqual(Job.objects.get(args=['later']).status, 'queued')
+
+    def test_claimed_job_is_not_claimed_again(self):
+        record.enqueue('once')
+        self.assertEqual(len(claim('a')), 1)
+        self.assertEqual(claim('b'), [])
+
+    def test_retries_with_backoff_then_dead(self):
+        fail.enqueue()
+
+        [job_row] = claim('test')
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(run(job_row), 'retry')
+        job_row.refresh_from_db()
+        self.assertEqual(job_row.status, 'queued')
+        self.assertGreaterEqual(job_row.run_at, timezone.now() + timedelta(seconds=29))
+        self.assertIn('ValueError: broken', job_row.last_error)
+
+        Job.objects.update(run_at=timezone.now())
+        [job_row] = claim('test')
+        with self.assertLogs('jobs.queue', 'ERROR'):
+            self.assertEqual(run(job_row), 'dead')
+        job_row.refresh_from_db()
+        self.assertEqual((job_row.status, job_row.attempts), ('dead', 2))
+
+    def test_requeues_jobs_of_stopped_workers(self):
+        record.enqueue('lost')
+        claim('gone')
+        Job.objects.update(locked_at=timezone.now() - timedelta(seconds=601))
+
+        with self.assertLogs('jobs.queue', 'WARNING'):
+            self.assertEqual(requeue_stale(), 1)
+        [job_row] = claim('test')
+        self.assertEqual(job_row.attempts, 2)
+        run(job_row)
+        self.assertEqual(calls, ['lost'])
@@ -0,0 +1,84 @@
+"""
+Worker threads for `manage.py run_workers`.
+
+Each thread claims and runs one job at a time on its own database
+connection. Idle threads look for work every JOBS_POLL_INTERVAL seconds.
+The process's main thread requeues jobs lost with a stopped worker and
+prunes old finished jobs. On SIGTERM or SIGINT the threads finish the job
+they are running and exit.
+"""
+import logging
+import os
+import signal
+import socket
+import threading
+from django.conf import settings
+from django.db import close_old_connections, connections
+from turfzone import metrics
+from . import queue
+
+logger = logging.getLogger(__name__)
+
+
+class Worker(threading.Thread):
+    def __init__(self, index, stopping, burst=False):
+        super().__init__(name=f'jobs-worker-{index}', daemon=True)
+        self.worker_id = f'{socket.gethostname()}:{os.getpid()}:{index}'
+        self.stopping = stopping
+        self.burst = burst
+
+    def run(self):
+        try:
+            while not self.stopping.is_set():
+                # Like a request boundary: drop connections past CONN_MAX_AGE
+                # or left broken by the last job
+                close_old_connections()
+                try:
+                    jobs = queue.claim(self.worker_id)
+                except Exception:
+                    logger.exception('Claiming jobs failed')
+                    jobs = []
+                if not jobs:
+                    if self.burst:
+                        break
+                    self.stopping.wait(settings.JOBS_POLL_INTERVAL)
+                    continue
+                for job_row in jobs:
+                    queue.run(job_row)
+                metrics.flush()
+        finally:
+            connections.close_all()
+
+
+def run_workers(threads, burst=False):
+    """Run worker threads until a stop signal, or until the queue is empty with burst"""
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        logger.info('Stopping job workers after their current jobs')
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    maintain()
+    workers = [Worker(index, stopping, burst) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    logger.info('Started %d job worker threads', threads, extra={'threads': threads, 'pid': os.getpid()})
+
+    while not burst and not stopping.wait(settings.JOBS_MAINTENANCE_INTERVAL):
+        maintain()
+    for worker in workers:
+        worker.join()
+    metrics.flush(force=True)
+
+
+def maintain():
+    try:
+        queue.requeue_stale()
+        queue.prune_done()
+    except Exception:
+        logger.exception('Job queue maintenance failed')
+    finally:
+        connections.close_all()
@@ -1,5 +1,4 @@
 from django.core.management.base import BaseCommand
-import qrcode
 from pathlib import Path
 from django.conf import settings
 
@@ -7,6 +6,9 @@ class Command(BaseCommand):
     help = 'Generate sample payment QR code'
 
     def handle(self, *args, **kwargs):
+        # qrcode (and PIL) are only needed here, not by the rest of the project
+        import qrcode
+
         # Sample UPI ID
         upi_data = "upi://pay?pa=turfzone@upi&pn=TurfZone%20Sports&cu=INR"
         
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.6 on 2026-10-19 09:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0005_archivedbooking_archivedliveactivity_and_more'),
+        ('payments', '0004_alter_payment_options_payment_completion_date_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedPayment',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('payment_method', models.CharField(choices=[('qr', 'QR Code'), ('upi', 'UPI Direct'), ('gpay', 'Google Pay'), ('phonepe', 'PhonePe'), ('paytm', 'Paytm')], max_length=20)),
+                ('transaction_id', models.CharField(db_index=True, max_length=100)),
+                ('reference_id', models.CharField(blank=True, max_length=100, null=True)),
+                ('status', models.CharField(choices=[('initiated', 'Initiated'), ('processing', 'Processing'), ('completed', 'Completed'), ('failed', 'Failed'), ('refunded', 'Refunded'), ('expired', 'Expired')], max_length=20)),
+                ('payment_date', models.DateTimeField()),
+                ('completion_date', models.DateTimeField(null=True)),
+                ('last_updated', models.DateTimeField()),
+                ('failure_reason', models.TextField(blank=True)),
+                ('metadata', models.JSONField(default=dict)),
+                ('booking', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payment', to='bookings.archivedbooking')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_payments', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-payment_date'],
+            },
+        ),
+    ]
@@ -1,7 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
-from bookings.models import Booking
+from bookings.models import ArchivedBooking, Booking
 
 class PaymentSettings(models.Model):
     qr_code = models.ImageField(upload_to='payment_qr/', help_text="QR code image for payments")
@@ -83,3 +83,22 @@ class Payment(models.Model):
     
     def __str__(self):
         return f"{self.booking.user.username} - ₹{self.amount} ({self.status})"
+
+class ArchivedPayment(models.Model):
+    """A payment of an archived booking (bookings.archive)"""
+    id = models.BigIntegerField(primary_key=True)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_payments')
+    booking = models.OneToOneField(ArchivedBooking, on_delete=models.CASCADE, related_name='payment')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    payment_method = models.CharField(max_length=20, choices=Payment.PAYMENT_METHOD_CHOICES)
+    transaction_id = models.CharField(max_length=100, db_index=True)
+    reference_id = models.CharField(max_length=100, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=Payment.PAYMENT_STATUS_CHOICES)
+    payment_date = models.DateTimeField()
+    completion_date = models.DateTimeField(null=True)
+    last_updated = models.DateTimeField()
+    failure_reason = models.TextField(blank=True)
+    metadata = models.JSONField(default=dict)
+
+    class Meta:
+        ordering = ['-payment_date']
@@ -1,3 +1,80 @@
+import asyncio
+import time
+from unittest import mock
 from django.test import TestCase
+from django.urls import reverse
+from bookings.models import Booking
+from turfzone.testing import build_dataset
+from .models import Payment
 
-# Create your tests here.
+
+class PaymentStatusTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        users, _ = build_dataset(1)
+        cls.player = users[0]
+        cls.other_booking = Booking.objects.filter(user=build_dataset(1, prefix='other')[0][0]).first()
+        cls.booking = Booking.objects.get(user=cls.player, status='payment_pending')
+        cls.payment = Payment.objects.create(
+            user=cls.player, booking=cls.booking, amount=cls.booking.total_price, payment_method='upi',
+            transaction_id='status-test', status='processing'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.player)
+        self.url = reverse('payment-status', args=[self.booking.pk])
+
+    def test_answers_at_once_without_wait(self):
+        started = time.monotonic()
+        response = self.client.get(self.url, {'status': 'processing'})
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['payment_status'], 'processing')
+        self.assertEqual(response.json()['booking_status'], 'payment_pending')
+
+    def test_answers_at_once_when_status_already_changed(self):
+        started = time.monotonic()
+        response = self.client.get(self.url, {'status': 'initiated', 'wait': 20})
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.json()['payment_status'], 'processing')
+
+    def test_returns_when_status_changes(self):
+        polls = []
+
+        async def complete_payment(delay):
+            # Stands in for the payment completing while the request waits
+            polls.append(delay)
+            await Payment.objects.filter(pk=self.payment.pk).aupdate(status='completed')
+
+        with mock.patch('payments.views.asyncio.sleep', complete_payment):
+            response = self.client.get(self.url, {'status': 'processing', 'wait': 20})
+        self.assertEqual(len(polls), 1)
+        self.assertEqual(response.json()['payment_status'], 'completed')
+
+    def test_times_out_at_max_wait(self):
+        sleep = asyncio.sleep
+        waited = []
+
+        async def record_sleep(delay):
+            waited.append(delay)
+            await sleep(delay)
+
+        with self.settings(PAYMENT_STATUS_MAX_WAIT=0.2, PAYMENT_STATUS_POLL_INTERVAL=0.05), \
+                mock.patch('payments.views.asyncio.sleep', record_sleep):
+            started = time.monotonic()
+            response = self.client.get(self.url, {'status': 'processing', 'wait': 600})
+            elapsed = time.monotonic() - started
+        self.assertEqual(response.json()['payment_status'], 'processing')
+        self.assertGreaterEqual(elapsed, 0.2)
+        self.assertLess(elapsed, 2)
+        self.assertLessEqual(sum(waited), 0.25)
+
+    def test_rejects_bad_wait(self):
+        for wait in ('soon', 'nan', 'inf', '-inf'):
+            with self.subTest(wait=wait):
+                response = self.client.get(self.url, {'status': 'processing', 'wait': wait})
+                self.assertEqual(response.status_code, 400)
+
+    def test_other_users_booking(self):
+        response = self.client.get(reverse('payment-status', args=[self.other_booking.pk]))
+        self.assertEqual(response.status_code, 404)
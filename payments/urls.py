@@ -9,5 +9,6 @@ urlpatterns = [
     path('process/<int:booking_id>/', views.process_payment, name='payment-process'),
     path('success/<int:booking_id>/', views.payment_success, name='payment-success'),
     path('failure/<int:booking_id>/', views.payment_failure, name='payment-failure'),
+    path('status/<int:booking_id>/', views.payment_status, name='payment-status'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
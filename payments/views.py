@@ -1,18 +1,27 @@
 from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from django.conf import settings
+from django.http import Http404
+from turfzone.fastjson import JsonResponse
 from django.utils import timezone
 from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import login_required
+from django.views.decorators.http import require_GET
+import asyncio
+import math
+import time
 import uuid
 from .models import Payment
 from .serializers import PaymentSerializer
+from accounts.decorators import api_login_required
 from bookings.models import Booking
+from bookings.partitioning import aget_booking, get_booking_or_404
 
 @login_required
 def process_payment(request, booking_id):
     """Process payment for a booking"""
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
+    booking = get_booking_or_404(booking_id, user=request.user)
     
     if booking.status not in ['initiated', 'payment_pending']:
         return render(request, 'payments/failure.html', {
@@ -21,7 +30,7 @@ def process_payment(request, booking_id):
         })
     
     # Check if payment already exists
-    existing_payment = Payment.objects.filter(booking=booking).exists()
+    existing_payment = Payment.objects.using(booking._state.db).filter(booking=booking).exists()
     if existing_payment:
         return render(request, 'payments/failure.html', {
             'error_message': 'A payment already exists for this booking',
@@ -31,7 +40,7 @@ def process_payment(request, booking_id):
     if request.method == 'POST':
         try:
             # Create payment record
-            payment = Payment.objects.create(
+            payment = Payment.objects.using(booking._state.db).create(
                 user=request.user,
                 booking=booking,
                 amount=booking.total_price,
@@ -75,8 +84,8 @@ def process_payment(request, booking_id):
 
 @login_required
 def payment_success(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-    payment = get_object_or_404(Payment, booking=booking)
+    booking = get_booking_or_404(booking_id, user=request.user)
+    payment = get_object_or_404(Payment.objects.using(booking._state.db), booking=booking)
     
     if payment.status != 'completed':
         return render(request, 'payments/failure.html', {
@@ -91,8 +100,8 @@ def payment_success(request, booking_id):
 
 @login_required
 def payment_failure(request, booking_id):
-    booking = get_object_or_404(Booking, id=booking_id, user=request.user)
-    payment = Payment.objects.filter(booking=booking).last()
+    booking = get_booking_or_404(booking_id, user=request.user)
+    payment = Payment.objects.using(booking._state.db).filter(booking=booking).last()
     
     error_message = request.GET.get('error', 'Payment processing failed')
     
@@ -102,6 +111,50 @@ def payment_failure(request, booking_id):
         'payment': payment
     })
 
+@require_GET
+@api_login_required
+async def payment_status(request, booking_id):
+    """
+    Booking and payment status as JSON. With ?wait=<seconds> the response is
+    held until the payment status differs from ?status= (the last status
+    the client saw, empty for no payment) or the wait runs out, so clients
+    can long-poll instead of reloading.
+    """
+    user = await request.auser()
+    try:
+        booking = await aget_booking(booking_id, user=user)
+    except Booking.DoesNotExist:
+        raise Http404('No Booking matches the given query.')
+
+    try:
+        wait = float(request.GET.get('wait', 0))
+    except ValueError:
+        wait = None
+    # NaN would make the deadline unreachable
+    if wait is None or not math.isfinite(wait):
+        return JsonResponse({'error': 'wait must be a number of seconds'}, status=400)
+    wait = min(max(wait, 0), settings.PAYMENT_STATUS_MAX_WAIT)
+    known_status = request.GET.get('status')
+    deadline = time.monotonic() + wait
+
+    while True:
+        # Newest payment first (Payment.Meta.ordering)
+        payment = await Payment.objects.using(booking._state.db).filter(booking_id=booking.id).afirst()
+        payment_status = payment.status if payment else None
+        if known_status is None or (payment_status or '') != known_status or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(min(settings.PAYMENT_STATUS_POLL_INTERVAL, max(deadline - time.monotonic(), 0)))
+
+    await booking.arefresh_from_db(fields=['status'])
+    return JsonResponse({
+        'booking_id': booking.id,
+        'booking_status': booking.status,
+        'payment_status': payment_status,
+        'amount': float(booking.total_price),
+        'transaction_id': payment.transaction_id if payment else None,
+        'completion_date': payment.completion_date.isoformat() if payment and payment.completion_date else None,
+    })
+
 class PaymentViewSet(viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
@@ -1,4 +1,7 @@
 from django.contrib import admin
+from django.utils import timezone
+from facilities.models import Facility
+from facilities.signals import touch_facilities
 from .models import Review, Reply
 
 @admin.register(Review)
@@ -19,23 +22,30 @@ class ReviewAdmin(admin.ModelAdmin):
         return obj.user.email
     user_email.short_description = 'Email'
     
+    def update_reviews(self, queryset, **fields):
+        # update() skips auto_now and signals, which the review and facility ETags rely on
+        facility_ids = set(queryset.values_list('facility_id', flat=True))
+        updated = queryset.update(updated_at=timezone.now(), **fields)
+        touch_facilities(Facility.objects.filter(pk__in=facility_ids))
+        return updated
+
     def approve_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        updated = self.update_reviews(queryset, is_approved=True)
         self.message_user(request, f'{updated} reviews have been approved.')
     approve_reviews.short_description = "Approve selected reviews"
     
     def unapprove_reviews(self, request, queryset):
-        updated = queryset.update(is_approved=False)
+        updated = self.update_reviews(queryset, is_approved=False)
         self.message_user(request, f'{updated} reviews have been unapproved.')
     unapprove_reviews.short_description = "Unapprove selected reviews"
     
     def feature_reviews(self, request, queryset):
-        updated = queryset.update(is_featured=True)
+        updated = self.update_reviews(queryset, is_featured=True)
         self.message_user(request, f'{updated} reviews have been featured.')
     feature_reviews.short_description = "Feature selected reviews"
     
     def unfeature_reviews(self, request, queryset):
-        updated = queryset.update(is_featured=False)
+        updated = self.update_reviews(queryset, is_featured=False)
         self.message_user(request, f'{updated} reviews have been unfeatured.')
     unfeature_reviews.short_description = "Unfeature selected reviews"
 
@@ -46,12 +56,19 @@ class ReplyAdmin(admin.ModelAdmin):
     search_fields = ('user__email', 'user__first_name', 'user__last_name', 'reply_text')
     actions = ['approve_replies', 'unapprove_replies']
     
+    def update_replies(self, queryset, **fields):
+        # update() skips auto_now and signals, which the review and facility ETags rely on
+        facility_ids = set(queryset.values_list('review__facility_id', flat=True))
+        updated = queryset.update(updated_at=timezone.now(), **fields)
+        touch_facilities(Facility.objects.filter(pk__in=facility_ids))
+        return updated
+
     def approve_replies(self, request, queryset):
-        updated = queryset.update(is_approved=True)
+        updated = self.update_replies(queryset, is_approved=True)
         self.message_user(request, f'{updated} replies have been approved.')
     approve_replies.short_description = "Approve selected replies"
     
     def unapprove_replies(self, request, queryset):
-        updated = queryset.update(is_approved=False)
+        updated = self.update_replies(queryset, is_approved=False)
         self.message_user(request, f'{updated} replies have been unapproved.')
     unapprove_replies.short_description = "Unapprove selected replies"
\ No newline at end of file
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_delete_review'),
+        ('reviews', '0003_review_is_featured'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='review',
+            name='booking',
+            field=models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='booking_review', to='bookings.booking'),
+        ),
+    ]
@@ -14,7 +14,8 @@ class Review(models.Model):
     
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='user_reviews')
     facility = models.ForeignKey(Facility, on_delete=models.CASCADE, related_name='facility_reviews')
-    booking = models.OneToOneField(Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='booking_review')
+    # No database constraint: the booking may live in a facility partition
+    booking = models.OneToOneField(Booking, on_delete=models.SET_NULL, null=True, blank=True, related_name='booking_review', db_constraint=False)
     rating = models.IntegerField(choices=RATING_CHOICES)
     review_text = models.TextField(max_length=500)
     created_at = models.DateTimeField(auto_now_add=True)
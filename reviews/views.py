@@ -3,11 +3,14 @@ from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
-from django.http import JsonResponse
+from turfzone.fastjson import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import etag
 from .models import Review, Reply
 from .serializers import ReviewSerializer, ReplySerializer
 from facilities.models import Facility
 from bookings.models import Booking
+from turfzone.conditional import api_etag, change_marker
 
 @login_required
 def create_review(request):
@@ -67,6 +70,20 @@ class ReviewPermission(permissions.BasePermission):
             return True
         return obj.user == request.user or request.user.is_staff
 
+def review_list_etag(request, *args, **kwargs):
+    # Staff see unapproved reviews too, as in ReviewViewSet.get_queryset
+    reviews = Review.objects.all() if request.user.is_staff else Review.objects.filter(is_approved=True)
+    # Reviews are listed with their replies and facility names
+    return api_etag(request, request.user.is_staff, change_marker(reviews, 'replies', 'facility'))
+
+def facility_reviews_etag(request, *args, **kwargs):
+    facility_id = request.GET.get('facility_id')
+    if not facility_id:
+        return None
+    reviews = Review.objects.filter(facility_id=facility_id, is_approved=True)
+    return api_etag(request, change_marker(reviews, 'replies', 'facility'))
+
+@method_decorator(etag(review_list_etag), name='list')
 class ReviewViewSet(viewsets.ModelViewSet):
     serializer_class = ReviewSerializer
     permission_classes = [ReviewPermission]
@@ -76,9 +93,14 @@ class ReviewViewSet(viewsets.ModelViewSet):
     ordering = ['-created_at']
     
     def get_queryset(self):
+        reviews = self.serializer_queryset()
         if self.request.user.is_staff:
-            return Review.objects.all()
-        return Review.objects.filter(is_approved=True)
+            return reviews
+        return reviews.filter(is_approved=True)
+
+    def serializer_queryset(self):
+        # ReviewSerializer reads the user, facility and replies of every review
+        return Review.objects.select_related('user', 'facility').prefetch_related('replies__user')
     
     def perform_create(self, serializer):
         facility = get_object_or_404(Facility, pk=self.request.data.get('facility'))
@@ -86,17 +108,18 @@ class ReviewViewSet(viewsets.ModelViewSet):
         
     @action(detail=False, methods=['GET'])
     def my_reviews(self, request):
-        reviews = Review.objects.filter(user=request.user)
+        reviews = self.serializer_queryset().filter(user=request.user)
         serializer = self.get_serializer(reviews, many=True)
         return Response(serializer.data)
     
     @action(detail=False, methods=['GET'])
+    @method_decorator(etag(facility_reviews_etag))
     def facility_reviews(self, request):
         facility_id = request.query_params.get('facility_id')
         if not facility_id:
             return Response({'error': 'facility_id is required'}, status=400)
             
-        reviews = Review.objects.filter(facility_id=facility_id, is_approved=True)
+        reviews = self.serializer_queryset().filter(facility_id=facility_id, is_approved=True)
         serializer = self.get_serializer(reviews, many=True)
         return Response(serializer.data)
 
@@ -1,14 +1,20 @@
 from django.contrib import admin
 from django.utils.html import format_html
-from .models import Team, TeamMember, MatchRequest
+from .models import Team, TeamMember, MatchRequest, TeamAvailability, Tournament, MatchResult
 from .utils import notify_match_request
 
+class TeamAvailabilityInline(admin.TabularInline):
+    model = TeamAvailability
+    extra = 0
+
 @admin.register(Team)
 class TeamAdmin(admin.ModelAdmin):
-    list_display = ('name', 'captain', 'vice_captain', 'created_at')
+    list_display = ('name', 'captain', 'vice_captain', 'rating', 'matches_played', 'created_at')
     search_fields = ('name', 'captain__username', 'vice_captain__username')
+    readonly_fields = ('rating', 'matches_played')
     list_filter = ('created_at',)
     prepopulated_fields = {'slug': ('name',)}
+    inlines = [TeamAvailabilityInline]
 
 
 
@@ -20,9 +26,23 @@ class TeamMemberAdmin(admin.ModelAdmin):
     raw_id_fields = ('user', 'team')
     date_hierarchy = 'joined_at'
 
+@admin.register(Tournament)
+class TournamentAdmin(admin.ModelAdmin):
+    list_display = ('name', 'format', 'start_date', 'end_date', 'rest_days', 'created_by')
+    list_filter = ('format', 'start_date')
+    search_fields = ('name',)
+    filter_horizontal = ('teams',)
+
+@admin.register(MatchResult)
+class MatchResultAdmin(admin.ModelAdmin):
+    list_display = ('match_request', 'challenger_score', 'opponent_score', 'rating_change', 'recorded_by', 'recorded_at')
+    readonly_fields = ('challenger_rating_before', 'opponent_rating_before', 'rating_change', 'recorded_at')
+    raw_id_fields = ('match_request', 'recorded_by')
+
 @admin.register(MatchRequest)
 class MatchRequestAdmin(admin.ModelAdmin):
     list_display = ('get_match_teams', 'preferred_date', 'get_status_badge', 'get_facility_info', 'get_actions')
+    list_select_related = ('challenger', 'opponent', 'preferred_facility', 'preferred_time')
     list_filter = ('status', 'preferred_date', 'created_at')
     search_fields = ('challenger__name', 'opponent__name', 'message')
     readonly_fields = ('created_at', 'updated_at', 'get_status_badge', 'get_challenger_info', 'get_opponent_info')
@@ -63,7 +83,8 @@ class MatchRequestAdmin(admin.ModelAdmin):
             'accepted': 'success',
             'rejected': 'danger',
             'cancelled': 'secondary',
-            'rescheduled': 'info'
+            'rescheduled': 'info',
+            'completed': 'primary'
         }
         return format_html(
             '<span class="status-badge status-{}">{}</span>',
@@ -1,29 +1,31 @@
 from django import forms
 from django.contrib.auth import get_user_model
 from .models import Team, TeamMember
+from accounts.utils import normalize_phone_number
 
 User = get_user_model()
 
 class AddPlayerForm(forms.Form):
     phone_number = forms.CharField(
-        max_length=15,
+        max_length=20,
         widget=forms.TextInput(attrs={
             'class': 'form-control',
             'placeholder': 'Enter phone number',
             'type': 'tel',
-            'pattern': '[0-9]{10}',
-            'title': 'Enter a valid 10-digit phone number',
+            'pattern': '[0-9+ ()\\-]{4,20}',
+            'title': 'Enter a phone number, with or without country code',
             'autocomplete': 'off'  # Prevent browser autocomplete from interfering
         })
     )
 
     def clean_phone_number(self):
-        phone_number = self.cleaned_data['phone_number']
-        # Remove any spaces or special characters
-        phone_number = ''.join(filter(str.isdigit, phone_number))
+        # Normalize to E.164 so '+91 98xxx', '98xxx' and '098xxx' all match
+        phone_number = normalize_phone_number(self.cleaned_data['phone_number'])
+        if not phone_number:
+            raise forms.ValidationError('Enter a valid phone number.')
         
         try:
-            users = User.objects.filter(phone_number=phone_number)
+            users = User.objects.filter(phone_number_normalized=phone_number)
             if not users.exists():
                 raise forms.ValidationError('No user found with this phone number. Please check and try again.')
             if users.count() > 1:
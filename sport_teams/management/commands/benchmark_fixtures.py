@@ -0,0 +1,44 @@
+import time
+from datetime import date, time as dtime, timedelta
+from types import SimpleNamespace
+from django.core.management.base import BaseCommand
+from sport_teams.scheduling import round_robin_pairings, build_slot_grid, assign_fixtures
+
+class Command(BaseCommand):
+    help = 'Benchmark the tournament fixture scheduler on synthetic in-memory data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=64, help='Number of teams')
+        parser.add_argument('--days', type=int, default=180, help='Length of the season in days')
+        parser.add_argument('--facility-sports', type=int, default=8, help='Number of facility sports')
+        parser.add_argument('--rest-days', type=int, default=1)
+        parser.add_argument('--weekends-only', action='store_true', help='Only schedule on Saturdays and Sundays')
+        parser.add_argument('--repeat', type=int, default=3, help='Number of timed runs')
+
+    def handle(self, *args, **options):
+        # Plain objects with the attributes the scheduler reads, so the
+        # benchmark measures the algorithm rather than the database
+        facility = SimpleNamespace(opening_time=dtime(6, 0), closing_time=dtime(23, 0))
+        facility_sports = [SimpleNamespace(id=i, facility=facility, facility_id=1) for i in range(options['facility_sports'])]
+        time_slots = [SimpleNamespace(id=i, start_time=dtime(hour, 0)) for i, hour in enumerate(range(6, 22, 2))]
+        team_ids = list(range(1, options['teams'] + 1))
+        start_date = date(2025, 1, 1)
+        end_date = start_date + timedelta(days=options['days'] - 1)
+        weekdays = {5, 6} if options['weekends_only'] else None
+
+        timings = []
+        for _ in range(options['repeat']):
+            started = time.perf_counter()
+            rounds = round_robin_pairings(team_ids)
+            grid = build_slot_grid(start_date, end_date, facility_sports, time_slots, set(), weekdays)
+            fixtures, unscheduled = assign_fixtures(rounds, grid, options['rest_days'])
+            timings.append(time.perf_counter() - started)
+
+        matches = sum(len(pairs) for pairs in rounds)
+        self.stdout.write(
+            f"{options['teams']} teams, {matches} matches, {len(grid)} slot entries: "
+            f"{len(fixtures)} scheduled, {len(unscheduled)} unscheduled"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"best {min(timings) * 1000:.1f} ms, mean {sum(timings) / len(timings) * 1000:.1f} ms over {len(timings)} runs"
+        ))
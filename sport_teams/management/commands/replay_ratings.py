@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from sport_teams.ratings import replay_ratings
+
+class Command(BaseCommand):
+    help = 'Recompute all team ratings by replaying every recorded match result'
+
+    def handle(self, *args, **kwargs):
+        count = replay_ratings()
+        self.stdout.write(self.style.SUCCESS(f'Replayed {count} match results'))
@@ -0,0 +1,78 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth import get_user_model
+from facilities.models import FacilitySport, TimeSlot
+from sport_teams.models import Team
+from sport_teams.scheduling import schedule_tournament
+
+class Command(BaseCommand):
+    help = 'Generate tournament fixtures over facility slots and book them in bulk'
+
+    def add_arguments(self, parser):
+        parser.add_argument('name', help='Tournament name')
+        parser.add_argument('--start', required=True, help='First match date (YYYY-MM-DD)')
+        parser.add_argument('--end', required=True, help='Last match date (YYYY-MM-DD)')
+        parser.add_argument('--teams', nargs='*', type=int, help='Team IDs in seed order (default: all teams)')
+        parser.add_argument('--facility-sports', nargs='*', type=int, help='Eligible FacilitySport IDs (default: all available)')
+        parser.add_argument('--time-slots', nargs='*', type=int, help='Eligible TimeSlot IDs (default: all)')
+        parser.add_argument('--format', choices=['round_robin', 'knockout'], default='round_robin')
+        parser.add_argument('--rest-days', type=int, default=1, help='Minimum days between a team\'s matches')
+        parser.add_argument('--weekdays', nargs='*', type=int, help='Allowed weekdays, 0 = Monday (e.g. 5 6 for weekends)')
+        parser.add_argument('--organizer', help='Username the bookings are made under (default: first admin)')
+        parser.add_argument('--dry-run', action='store_true', help='Print the schedule without saving it')
+
+    def handle(self, *args, **options):
+        try:
+            start_date = datetime.strptime(options['start'], '%Y-%m-%d').date()
+            end_date = datetime.strptime(options['end'], '%Y-%m-%d').date()
+        except ValueError:
+            raise CommandError('Dates must be in YYYY-MM-DD format')
+        if end_date < start_date:
+            raise CommandError('--end must not be before --start')
+
+        teams = Team.objects.all()
+        if options['teams']:
+            teams_by_id = teams.in_bulk(options['teams'])
+            teams = [teams_by_id[team_id] for team_id in options['teams'] if team_id in teams_by_id]
+        teams = list(teams)
+        if len(teams) < 2:
+            raise CommandError('At least two teams are needed')
+
+        facility_sports = FacilitySport.objects.filter(is_available=True, facility__is_active=True).select_related('facility')
+        if options['facility_sports']:
+            facility_sports = facility_sports.filter(id__in=options['facility_sports'])
+
+        time_slots = TimeSlot.objects.all()
+        if options['time_slots']:
+            time_slots = time_slots.filter(id__in=options['time_slots'])
+
+        User = get_user_model()
+        if options['organizer']:
+            organizer = User.objects.filter(username=options['organizer']).first()
+        else:
+            organizer = User.objects.filter(is_admin=True).order_by('id').first()
+        if not organizer and not options['dry_run']:
+            raise CommandError('No organizer found. Pass --organizer or create an admin user.')
+
+        tournament, fixtures, unscheduled = schedule_tournament(
+            options['name'], teams, start_date, end_date, facility_sports, time_slots,
+            tournament_format=options['format'],
+            rest_days=options['rest_days'],
+            weekdays=set(options['weekdays']) if options['weekdays'] else None,
+            organizer=organizer,
+            dry_run=options['dry_run']
+        )
+
+        if options['dry_run']:
+            team_names = {team.id: team.name for team in teams}
+            for round_number, home, away, date, slot, facility_sport in fixtures:
+                self.stdout.write(
+                    f"R{round_number} {date} {slot.slot_time} {facility_sport.facility.name}: "
+                    f"{team_names[home]} vs {team_names[away]}"
+                )
+
+        self.stdout.write(self.style.SUCCESS(f'Scheduled {len(fixtures)} fixtures'))
+        if unscheduled:
+            self.stdout.write(self.style.WARNING(
+                f'{len(unscheduled)} fixtures could not be placed. Widen the date window or add facility sports.'
+            ))
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('facilities', '0006_alter_timeslot_slot_time'),
+        ('sport_teams', '0003_alter_matchrequest_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeamAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weekday', models.PositiveSmallIntegerField(choices=[(0, 'Monday'), (1, 'Tuesday'), (2, 'Wednesday'), (3, 'Thursday'), (4, 'Friday'), (5, 'Saturday'), (6, 'Sunday')])),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='availability', to='sport_teams.team')),
+                ('time_slot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_availability', to='facilities.timeslot')),
+            ],
+            options={
+                'verbose_name_plural': 'Team availability',
+                'ordering': ['weekday', 'time_slot__start_time'],
+                'unique_together': {('team', 'weekday', 'time_slot')},
+            },
+        ),
+    ]
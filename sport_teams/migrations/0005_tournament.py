@@ -0,0 +1,49 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_delete_review'),
+        ('sport_teams', '0004_teamavailability'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='matchrequest',
+            name='booking',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='match_request', to='bookings.booking'),
+        ),
+        migrations.AddField(
+            model_name='matchrequest',
+            name='round_number',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='Tournament',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('format', models.CharField(choices=[('round_robin', 'Round Robin'), ('knockout', 'Knockout')], default='round_robin', max_length=20)),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('rest_days', models.PositiveSmallIntegerField(default=1)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='organized_tournaments', to=settings.AUTH_USER_MODEL)),
+                ('teams', models.ManyToManyField(related_name='tournaments', to='sport_teams.team')),
+            ],
+            options={
+                'ordering': ['-start_date'],
+            },
+        ),
+        migrations.AddField(
+            model_name='matchrequest',
+            name='tournament',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='fixtures', to='sport_teams.tournament'),
+        ),
+    ]
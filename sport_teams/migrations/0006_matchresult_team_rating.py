@@ -0,0 +1,60 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sport_teams', '0005_tournament'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MatchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('challenger_score', models.PositiveIntegerField()),
+                ('opponent_score', models.PositiveIntegerField()),
+                ('challenger_rating_before', models.FloatField()),
+                ('opponent_rating_before', models.FloatField()),
+                ('rating_change', models.FloatField(default=0)),
+                ('recorded_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ['-recorded_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='matches_played',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='rating',
+            field=models.FloatField(default=1500.0),
+        ),
+        migrations.AlterField(
+            model_name='matchrequest',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('cancelled', 'Cancelled'), ('rescheduled', 'Rescheduled'), ('completed', 'Completed')], default='pending', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='team',
+            index=models.Index(fields=['-rating', 'id'], name='team_leaderboard_idx'),
+        ),
+        migrations.AddField(
+            model_name='matchresult',
+            name='match_request',
+            field=models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='result', to='sport_teams.matchrequest'),
+        ),
+        migrations.AddField(
+            model_name='matchresult',
+            name='recorded_by',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='recorded_results', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
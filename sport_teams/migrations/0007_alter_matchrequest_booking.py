@@ -0,0 +1,20 @@
+# Generated by Django 5.2.6 on 2026-10-19 07:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('bookings', '0004_delete_review'),
+        ('sport_teams', '0006_matchresult_team_rating'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='matchrequest',
+            name='booking',
+            field=models.OneToOneField(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='match_request', to='bookings.booking'),
+        ),
+    ]
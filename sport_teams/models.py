@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils.text import slugify
 from django.utils import timezone
@@ -21,6 +21,9 @@ class Team(models.Model):
         null=True,
         blank=True
     )
+    # Elo rating, updated incrementally as match results are recorded
+    rating = models.FloatField(default=1500.0)
+    matches_played = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -34,6 +37,10 @@ class Team(models.Model):
 
     class Meta:
         ordering = ['name']
+        indexes = [
+            # Serves the leaderboard's ORDER BY rating DESC, id
+            models.Index(fields=['-rating', 'id'], name='team_leaderboard_idx'),
+        ]
 
 class TeamMember(models.Model):
     ROLE_CHOICES = [
@@ -56,6 +63,58 @@ class TeamMember(models.Model):
         return f"{self.user.username} - {self.team.name} ({self.role})"
 
 
+class TeamAvailability(models.Model):
+    """A recurring weekly time slot in which a team is available to play"""
+    WEEKDAY_CHOICES = [
+        (0, 'Monday'),
+        (1, 'Tuesday'),
+        (2, 'Wednesday'),
+        (3, 'Thursday'),
+        (4, 'Friday'),
+        (5, 'Saturday'),
+        (6, 'Sunday'),
+    ]
+
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='availability')
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    time_slot = models.ForeignKey(TimeSlot, on_delete=models.CASCADE, related_name='team_availability')
+
+    class Meta:
+        unique_together = ['team', 'weekday', 'time_slot']
+        ordering = ['weekday', 'time_slot__start_time']
+        verbose_name_plural = 'Team availability'
+
+    def __str__(self):
+        return f"{self.team.name} - {self.get_weekday_display()} {self.time_slot}"
+
+
+class Tournament(models.Model):
+    FORMAT_CHOICES = [
+        ('round_robin', 'Round Robin'),
+        ('knockout', 'Knockout'),
+    ]
+
+    name = models.CharField(max_length=100)
+    format = models.CharField(max_length=20, choices=FORMAT_CHOICES, default='round_robin')
+    teams = models.ManyToManyField(Team, related_name='tournaments')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    rest_days = models.PositiveSmallIntegerField(default=1)  # Minimum days between a team's matches
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='organized_tournaments'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-start_date']
+
+    def __str__(self):
+        return f"{self.name} ({self.get_format_display()})"
+
+
 class MatchRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -63,6 +122,7 @@ class MatchRequest(models.Model):
         ('rejected', 'Rejected'),
         ('cancelled', 'Cancelled'),
         ('rescheduled', 'Rescheduled'),
+        ('completed', 'Completed'),
     ]
 
     challenger = models.ForeignKey(
@@ -99,6 +159,24 @@ class MatchRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     response_message = models.TextField(blank=True, null=True)
+    # Set for fixtures generated by the tournament scheduler
+    tournament = models.ForeignKey(
+        Tournament,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='fixtures'
+    )
+    round_number = models.PositiveSmallIntegerField(null=True, blank=True)
+    booking = models.OneToOneField(
+        'bookings.Booking',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='match_request',
+        # The booking may live in a facility partition (bookings.partitioning)
+        db_constraint=False
+    )
 
     class Meta:
         ordering = ['-created_at']
@@ -107,21 +185,48 @@ class MatchRequest(models.Model):
         return f"{self.challenger.name} vs {self.opponent.name} - {self.get_status_display()}"
 
     def accept(self):
-        self.status = 'accepted'
-        self.save()
         from .utils import notify_match_request
-        notify_match_request(self, 'accepted')
+        self.status = 'accepted'
+        with transaction.atomic():
+            self.save()
+            notify_match_request(self, 'accepted')
         return True
 
     def reject(self, message=None):
+        from .utils import notify_match_request
         self.status = 'rejected'
         if message:
             self.response_message = message
-        self.save()
-        from .utils import notify_match_request
-        notify_match_request(self, 'rejected')
+        with transaction.atomic():
+            self.save()
+            notify_match_request(self, 'rejected')
         return True
 
     def cancel(self):
         self.status = 'cancelled'
         self.save()
+
+
+class MatchResult(models.Model):
+    """Final score of a played match and the rating change it caused"""
+    match_request = models.OneToOneField(MatchRequest, on_delete=models.CASCADE, related_name='result')
+    challenger_score = models.PositiveIntegerField()
+    opponent_score = models.PositiveIntegerField()
+    # Ratings before the match and the change applied, kept so the history
+    # can be audited and replayed
+    challenger_rating_before = models.FloatField()
+    opponent_rating_before = models.FloatField()
+    rating_change = models.FloatField(default=0)  # Challenger's gain; the opponent's change is the negative
+    recorded_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        related_name='recorded_results'
+    )
+    recorded_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-recorded_at']
+
+    def __str__(self):
+        return f"{self.match_request.challenger.name} {self.challenger_score} - {self.opponent_score} {self.match_request.opponent.name}"
@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.db import transaction
+from .models import Team, MatchRequest, MatchResult
+
+
+def expected_score(rating, opponent_rating):
+    """Probability-like Elo expectation that a team rated `rating` wins"""
+    return 1.0 / (1.0 + 10 ** ((opponent_rating - rating) / 400.0))
+
+
+def actual_score(score, opponent_score):
+    """1 for a win, 0.5 for a draw and 0 for a loss"""
+    if score > opponent_score:
+        return 1.0
+    if score < opponent_score:
+        return 0.0
+    return 0.5
+
+
+def rating_change(challenger_rating, opponent_rating, challenger_score, opponent_score, k_factor=None):
+    """
+    Elo change for the challenger. The opponent's change is the negative,
+    so the total rating in the pool stays constant.
+    """
+    if k_factor is None:
+        k_factor = settings.TEAM_RATING_K_FACTOR
+    expected = expected_score(challenger_rating, opponent_rating)
+    return k_factor * (actual_score(challenger_score, opponent_score) - expected)
+
+
+def record_match_result(match_request, challenger_score, opponent_score, recorded_by=None):
+    """
+    Record the result of an accepted match and update both teams' ratings
+    incrementally. Only the two teams' rows are touched, so the cost does
+    not grow with match history. Raises ValueError if the match cannot take
+    a result.
+    """
+    with transaction.atomic():
+        # Lock the match and both teams so concurrent results apply in order
+        match_request = MatchRequest.objects.select_for_update().get(pk=match_request.pk)
+        if match_request.status != 'accepted':
+            raise ValueError('Results can only be recorded for accepted matches')
+        if MatchResult.objects.filter(match_request=match_request).exists():
+            raise ValueError('A result has already been recorded for this match')
+
+        teams = Team.objects.select_for_update().in_bulk([match_request.challenger_id, match_request.opponent_id])
+        challenger = teams[match_request.challenger_id]
+        opponent = teams[match_request.opponent_id]
+
+        change = rating_change(challenger.rating, opponent.rating, challenger_score, opponent_score)
+        result = MatchResult.objects.create(
+            match_request=match_request,
+            challenger_score=challenger_score,
+            opponent_score=opponent_score,
+            challenger_rating_before=challenger.rating,
+            opponent_rating_before=opponent.rating,
+            rating_change=change,
+            recorded_by=recorded_by
+        )
+
+        challenger.rating += change
+        challenger.matches_played += 1
+        challenger.save(update_fields=['rating', 'matches_played', 'updated_at'])
+        opponent.rating -= change
+        opponent.matches_played += 1
+        opponent.save(update_fields=['rating', 'matches_played', 'updated_at'])
+
+        match_request.status = 'completed'
+        match_request.save(update_fields=['status', 'updated_at'])
+
+    return result
+
+
+def replay_ratings(batch_size=2000):
+    """
+    Recompute every team's rating from scratch by replaying all results in
+    play order. Used after correcting a result or changing the K factor.
+    Returns the number of results replayed.
+    """
+    initial = settings.TEAM_RATING_INITIAL
+    with transaction.atomic():
+        ratings = {}
+        played = {}
+        updated_results = []
+        results = MatchResult.objects.select_related('match_request').only(
+            'id', 'challenger_score', 'opponent_score',
+            'match_request__challenger_id', 'match_request__opponent_id', 'match_request__preferred_date'
+        ).order_by('match_request__preferred_date', 'recorded_at', 'id')
+
+        for result in results.iterator(chunk_size=batch_size):
+            challenger_id = result.match_request.challenger_id
+            opponent_id = result.match_request.opponent_id
+            challenger_rating = ratings.get(challenger_id, initial)
+            opponent_rating = ratings.get(opponent_id, initial)
+            change = rating_change(challenger_rating, opponent_rating, result.challenger_score, result.opponent_score)
+
+            result.challenger_rating_before = challenger_rating
+            result.opponent_rating_before = opponent_rating
+            result.rating_change = change
+            updated_results.append(result)
+
+            ratings[challenger_id] = challenger_rating + change
+            ratings[opponent_id] = opponent_rating - change
+            played[challenger_id] = played.get(challenger_id, 0) + 1
+            played[opponent_id] = played.get(opponent_id, 0) + 1
+
+        MatchResult.objects.bulk_update(
+            updated_results,
+            ['challenger_rating_before', 'opponent_rating_before', 'rating_change'],
+            batch_size=batch_size
+        )
+
+        teams = list(Team.objects.only('id', 'rating', 'matches_played'))
+        for team in teams:
+            team.rating = ratings.get(team.id, initial)
+            team.matches_played = played.get(team.id, 0)
+        Team.objects.bulk_update(teams, ['rating', 'matches_played'], batch_size=batch_size)
+
+    return len(updated_results)
@@ -0,0 +1,416 @@
+from bisect import bisect_left
+from contextlib import ExitStack
+from datetime import timedelta
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from facilities.models import FacilitySport, TimeSlot
+from bookings.models import Booking
+from bookings.partitioning import fan_out_list, partition_for_facility
+from .models import TeamAvailability, MatchRequest, Tournament
+
+# Booking statuses that hold a slot (same set BookingCreateView checks)
+BLOCKING_BOOKING_STATUSES = ['initiated', 'payment_pending', 'confirmed']
+
+# Match request statuses that already commit a team to a date/time
+COMMITTED_MATCH_STATUSES = ['pending', 'accepted']
+
+LUNCH_SLOT = '12:00-13:00'
+
+
+def get_slot_bits(time_slots=None):
+    """
+    Assign each bookable TimeSlot a bit position, ordered by start time.
+    Returns (slots_by_bit, bit_by_slot_id).
+    """
+    if time_slots is None:
+        time_slots = TimeSlot.objects.exclude(slot_time=LUNCH_SLOT).order_by('start_time')
+    slots_by_bit = list(time_slots)
+    bit_by_slot_id = {slot.id: bit for bit, slot in enumerate(slots_by_bit)}
+    return slots_by_bit, bit_by_slot_id
+
+
+def get_team_weekly_masks(team_ids, bit_by_slot_id):
+    """
+    Build a 7-entry list of slot bitmasks (Monday first) per team from its
+    published recurring availability. Returns {team_id: [mask, ...]}.
+    """
+    masks = {team_id: [0] * 7 for team_id in team_ids}
+    rows = TeamAvailability.objects.filter(team_id__in=team_ids).values_list('team_id', 'weekday', 'time_slot_id')
+    for team_id, weekday, time_slot_id in rows:
+        bit = bit_by_slot_id.get(time_slot_id)
+        if bit is not None:
+            masks[team_id][weekday] |= 1 << bit
+    return masks
+
+
+def get_booked_masks(facility_sport_ids, start_date, end_date, bit_by_slot_id):
+    """
+    Build {(facility_sport_id, date): mask} of slots already held by
+    bookings, from a single query over the whole window.
+    """
+    booked = {}
+    rows = fan_out_list(Booking.objects.filter(
+        facility_sport_id__in=facility_sport_ids,
+        date__gte=start_date,
+        date__lte=end_date,
+        status__in=BLOCKING_BOOKING_STATUSES
+    ).values_list('facility_sport_id', 'date', 'time_slot_id'))
+    for facility_sport_id, date, time_slot_id in rows:
+        bit = bit_by_slot_id.get(time_slot_id)
+        if bit is not None:
+            key = (facility_sport_id, date)
+            booked[key] = booked.get(key, 0) | (1 << bit)
+    return booked
+
+
+def get_team_commitment_masks(team_ids, start_date, end_date, bit_by_slot_id, exclude_request_id=None):
+    """
+    Build {date: mask} of slots where any of the teams already has a pending
+    or accepted match. A request without a preferred time blocks nothing.
+    """
+    committed = {}
+    requests = MatchRequest.objects.filter(
+        Q(challenger_id__in=team_ids) | Q(opponent_id__in=team_ids),
+        preferred_date__gte=start_date,
+        preferred_date__lte=end_date,
+        preferred_time__isnull=False,
+        status__in=COMMITTED_MATCH_STATUSES
+    )
+    if exclude_request_id:
+        requests = requests.exclude(id=exclude_request_id)
+    for date, time_slot_id in requests.values_list('preferred_date', 'preferred_time_id'):
+        bit = bit_by_slot_id.get(time_slot_id)
+        if bit is not None:
+            committed[date] = committed.get(date, 0) | (1 << bit)
+    return committed
+
+
+def get_facility_open_mask(facility, slots_by_bit):
+    """Bitmask of slots that start within the facility's opening hours"""
+    mask = 0
+    for bit, slot in enumerate(slots_by_bit):
+        if facility.opening_time <= slot.start_time < facility.closing_time:
+            mask |= 1 << bit
+    return mask
+
+
+def find_common_free_slots(team, opponent, start_date=None, days=21, limit=10, sport_id=None, exclude_request_id=None):
+    """
+    Find the earliest slots in which both teams are available and a facility
+    sport is free, across all active facilities, for the next `days` days.
+
+    Availability is intersected as per-day bitsets over TimeSlot, so each
+    (date, facility sport) pair costs a couple of integer operations. Returns
+    at most `limit` suggestions ordered by date and start time.
+    """
+    now = timezone.localtime()
+    if start_date is None or start_date < now.date():
+        start_date = now.date()
+    end_date = start_date + timedelta(days=days - 1)
+
+    slots_by_bit, bit_by_slot_id = get_slot_bits()
+    if not slots_by_bit:
+        return []
+
+    team_masks = get_team_weekly_masks([team.id, opponent.id], bit_by_slot_id)
+    common_weekly = [a & b for a, b in zip(team_masks[team.id], team_masks[opponent.id])]
+    if not any(common_weekly):
+        return []
+
+    facility_sports = FacilitySport.objects.filter(
+        facility__is_active=True,
+        is_available=True
+    ).select_related('facility', 'sport').order_by('facility__name', 'sport__name')
+    if sport_id:
+        facility_sports = facility_sports.filter(sport_id=sport_id)
+    facility_sports = list(facility_sports)
+    if not facility_sports:
+        return []
+
+    open_masks = {}
+    for facility_sport in facility_sports:
+        if facility_sport.facility_id not in open_masks:
+            open_masks[facility_sport.facility_id] = get_facility_open_mask(facility_sport.facility, slots_by_bit)
+
+    booked = get_booked_masks([fs.id for fs in facility_sports], start_date, end_date, bit_by_slot_id)
+    committed = get_team_commitment_masks([team.id, opponent.id], start_date, end_date, bit_by_slot_id, exclude_request_id)
+
+    # Slots that have already started today
+    past_mask = 0
+    for bit, slot in enumerate(slots_by_bit):
+        if slot.start_time <= now.time():
+            past_mask |= 1 << bit
+
+    suggestions = []
+    for offset in range(days):
+        date = start_date + timedelta(days=offset)
+        wanted = common_weekly[date.weekday()] & ~committed.get(date, 0)
+        if date == now.date():
+            wanted &= ~past_mask
+        if not wanted:
+            continue
+
+        # Collect the free facility sports per slot bit for this date
+        free_by_bit = {}
+        for facility_sport in facility_sports:
+            free = wanted & open_masks[facility_sport.facility_id] & ~booked.get((facility_sport.id, date), 0)
+            while free:
+                low = free & -free
+                free_by_bit.setdefault(low.bit_length() - 1, []).append(facility_sport)
+                free ^= low
+
+        for bit in sorted(free_by_bit):
+            slot = slots_by_bit[bit]
+            for facility_sport in free_by_bit[bit]:
+                suggestions.append({
+                    'date': date.strftime('%Y-%m-%d'),
+                    'time_slot_id': slot.id,
+                    'display_time': slot.get_slot_time_display(),
+                    'facility_id': facility_sport.facility_id,
+                    'facility_name': facility_sport.facility.name,
+                    'facility_sport_id': facility_sport.id,
+                    'sport_name': facility_sport.sport.name,
+                    'price': float(facility_sport.price_per_slot),
+                })
+                if len(suggestions) >= limit:
+                    return suggestions
+
+    return suggestions
+
+
+def round_robin_pairings(team_ids):
+    """
+    Generate round-robin rounds with the circle method. Returns a list of
+    rounds, each a list of (home_id, away_id) pairs. With an odd number of
+    teams one team sits out each round.
+    """
+    teams = list(team_ids)
+    if len(teams) % 2:
+        teams.append(None)
+    n = len(teams)
+
+    rounds = []
+    for round_index in range(n - 1):
+        pairs = []
+        for i in range(n // 2):
+            home, away = teams[i], teams[n - 1 - i]
+            if home is None or away is None:
+                continue
+            # Alternate home/away so the fixed team doesn't always host
+            if round_index % 2:
+                home, away = away, home
+            pairs.append((home, away))
+        rounds.append(pairs)
+        teams = [teams[0], teams[-1]] + teams[1:-1]
+    return rounds
+
+
+def knockout_pairings(team_ids):
+    """
+    Generate the first knockout round, seeded in the given order (1 vs N,
+    2 vs N-1, ...). When the team count is not a power of two the top seeds
+    get byes. Later rounds depend on results, so only round one is paired.
+    """
+    teams = list(team_ids)
+    size = 1
+    while size < len(teams):
+        size *= 2
+    playing = teams[size - len(teams):]
+    pairs = [(playing[i], playing[-1 - i]) for i in range(len(playing) // 2)]
+    return [pairs]
+
+
+def build_slot_grid(start_date, end_date, facility_sports, time_slots, taken, weekdays=None):
+    """
+    Build the chronological list of (date, time_slot, [facility_sport, ...])
+    entries in the window, where each list holds the facility sports that
+    are open and not in `taken` (a set of (facility_sport_id, date,
+    time_slot_id)). Entries without any free facility sport are dropped.
+    """
+    time_slots = sorted(time_slots, key=lambda slot: slot.start_time)
+    grid = []
+    date = start_date
+    while date <= end_date:
+        if weekdays is None or date.weekday() in weekdays:
+            for slot in time_slots:
+                free = [
+                    fs for fs in facility_sports
+                    if fs.facility.opening_time <= slot.start_time < fs.facility.closing_time
+                    and (fs.id, date, slot.id) not in taken
+                ]
+                if free:
+                    grid.append((date, slot, free))
+        date += timedelta(days=1)
+    return grid
+
+
+def assign_fixtures(rounds, grid, rest_days=1, team_blocked=None):
+    """
+    Greedily place each pairing, round by round, in the earliest grid entry
+    that still has a free facility sport and respects both teams' rest gap.
+
+    Full grid entries are skipped with a union-find "next free entry"
+    pointer, so each placement is close to O(1) and a 64-team round robin
+    over a season schedules in well under a second.
+
+    `team_blocked` maps team_id to a set of (date, time_slot_id) the team
+    is already committed to. Returns (fixtures, unscheduled) where fixtures
+    are (round_number, home_id, away_id, date, time_slot, facility_sport).
+    """
+    team_blocked = team_blocked or {}
+    capacity = [len(free) for _, _, free in grid]
+    used = [0] * len(grid)
+    grid_dates = [date for date, _, _ in grid]
+    # next_free[i] points at the earliest entry >= i that may have capacity;
+    # len(grid) is a sentinel meaning "none left"
+    next_free = list(range(len(grid) + 1))
+
+    def find(index):
+        root = index
+        while next_free[root] != root:
+            root = next_free[root]
+        while next_free[index] != root:
+            next_free[index], index = root, next_free[index]
+        return root
+
+    # Earliest grid index each team may play at next
+    earliest = {}
+    fixtures = []
+    unscheduled = []
+
+    for round_number, pairs in enumerate(rounds, start=1):
+        for home, away in pairs:
+            index = find(max(earliest.get(home, 0), earliest.get(away, 0)))
+            blocked_home = team_blocked.get(home, ())
+            blocked_away = team_blocked.get(away, ())
+            while index < len(grid):
+                date, slot, _ = grid[index]
+                if (date, slot.id) not in blocked_home and (date, slot.id) not in blocked_away:
+                    break
+                index = find(index + 1)
+
+            if index >= len(grid):
+                unscheduled.append((round_number, home, away))
+                continue
+
+            date, slot, free = grid[index]
+            facility_sport = free[used[index]]
+            used[index] += 1
+            if used[index] == capacity[index]:
+                next_free[index] = index + 1
+
+            fixtures.append((round_number, home, away, date, slot, facility_sport))
+
+            # Next match no earlier than rest_days later, and never in the
+            # same or an earlier slot
+            rest_index = bisect_left(grid_dates, date + timedelta(days=rest_days))
+            next_index = max(rest_index, index + 1)
+            earliest[home] = next_index
+            earliest[away] = next_index
+
+    return fixtures, unscheduled
+
+
+def schedule_tournament(name, teams, start_date, end_date, facility_sports, time_slots,
+                        tournament_format='round_robin', rest_days=1, weekdays=None, organizer=None, dry_run=False):
+    """
+    Generate fixtures for the given teams over the date window and write
+    them as a Tournament with confirmed Bookings and accepted MatchRequests,
+    all inserted with bulk_create in one transaction.
+
+    Slots with any existing booking (whatever its status, since the booking
+    table is unique per facility sport, date and slot) and slots where a
+    team already has a pending or accepted match are skipped. Returns
+    (tournament, fixtures, unscheduled); tournament is None on a dry run.
+    """
+    teams = list(teams)
+    facility_sports = list(facility_sports)
+    time_slots = [slot for slot in time_slots if slot.slot_time != LUNCH_SLOT]
+    team_ids = [team.id for team in teams]
+
+    taken = set(fan_out_list(Booking.objects.filter(
+        facility_sport__in=facility_sports,
+        date__gte=start_date,
+        date__lte=end_date
+    ).values_list('facility_sport_id', 'date', 'time_slot_id')))
+
+    team_blocked = {}
+    commitments = MatchRequest.objects.filter(
+        Q(challenger_id__in=team_ids) | Q(opponent_id__in=team_ids),
+        preferred_date__gte=start_date,
+        preferred_date__lte=end_date,
+        preferred_time__isnull=False,
+        status__in=COMMITTED_MATCH_STATUSES
+    ).values_list('challenger_id', 'opponent_id', 'preferred_date', 'preferred_time_id')
+    for challenger_id, opponent_id, date, time_slot_id in commitments:
+        team_blocked.setdefault(challenger_id, set()).add((date, time_slot_id))
+        team_blocked.setdefault(opponent_id, set()).add((date, time_slot_id))
+
+    if tournament_format == 'knockout':
+        rounds = knockout_pairings(team_ids)
+    else:
+        rounds = round_robin_pairings(team_ids)
+
+    grid = build_slot_grid(start_date, end_date, facility_sports, time_slots, taken, weekdays)
+    fixtures, unscheduled = assign_fixtures(rounds, grid, rest_days, team_blocked)
+
+    if dry_run:
+        return None, fixtures, unscheduled
+
+    # bulk_create skips Booking.save(), so set the prices it would compute
+    bookings = [
+        Booking(
+            user=organizer,
+            facility_sport=facility_sport,
+            date=date,
+            time_slot=slot,
+            status='confirmed',
+            base_price=facility_sport.price_per_slot,
+            total_price=facility_sport.price_per_slot,
+            notes=f"Tournament fixture: {name}"
+        )
+        for _, _, _, date, slot, facility_sport in fixtures
+    ]
+    # One insert per booking partition ('default' only, when partitioning is off)
+    bookings_by_alias = {}
+    for booking in bookings:
+        alias = partition_for_facility(booking.facility_sport.facility_id)
+        bookings_by_alias.setdefault(alias, []).append(booking)
+
+    # A transaction on each partition written to, inside the default one, so
+    # a failure leaves no bookings without their fixtures
+    with transaction.atomic(), ExitStack() as stack:
+        for alias in bookings_by_alias:
+            stack.enter_context(transaction.atomic(using=alias))
+
+        tournament = Tournament.objects.create(
+            name=name,
+            format=tournament_format,
+            start_date=start_date,
+            end_date=end_date,
+            rest_days=rest_days,
+            created_by=organizer
+        )
+        tournament.teams.set(teams)
+
+        for alias, alias_bookings in bookings_by_alias.items():
+            Booking.objects.using(alias).bulk_create(alias_bookings, batch_size=500)
+
+        MatchRequest.objects.bulk_create([
+            MatchRequest(
+                challenger_id=home,
+                opponent_id=away,
+                preferred_date=date,
+                preferred_facility_id=facility_sport.facility_id,
+                preferred_time=slot,
+                status='accepted',
+                message=f"{name} - Round {round_number}",
+                tournament=tournament,
+                round_number=round_number,
+                booking=booking
+            )
+            for (round_number, home, away, date, slot, facility_sport), booking in zip(fixtures, bookings)
+        ], batch_size=500)
+
+    return tournament, fixtures, unscheduled
@@ -0,0 +1,8 @@
+from jobs.queue import job
+from .utils import send_whatsapp_message
+
+@job()
+def send_whatsapp(phone_number, message):
+    """Send one WhatsApp message; raising lets the queue retry it"""
+    if not send_whatsapp_message(phone_number, message):
+        raise RuntimeError(f'WhatsApp message to {phone_number} was not sent')
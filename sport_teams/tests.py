@@ -1,3 +1,441 @@
-from django.test import TestCase
+import json
+from datetime import date, time, timedelta
+from itertools import combinations
+from types import SimpleNamespace
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from accounts.models import PlayerProfile, User
+from bookings.models import Booking
+from facilities.models import Facility, FacilitySport, SportType, TimeSlot
+from turfzone.testing import QueryBudgetTestCase
+from .models import MatchRequest, MatchResult, Team, TeamAvailability, TeamMember, Tournament
+from .ratings import expected_score, rating_change, record_match_result, replay_ratings
+from .scheduling import (
+    assign_fixtures, find_common_free_slots, knockout_pairings, round_robin_pairings, schedule_tournament
+)
+from .utils import page_params
 
-# Create your tests here.
+
+class TeamQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        # The captain of self.team, which the grown dataset adds members and requests to
+        self.client.force_login(self.team.captain)
+
+    def test_match_requests(self):
+        url = reverse('sport_teams:match_requests')
+        self.assertQueryBudget(lambda: self.client.get(url), queries=5, rows=25)
+
+    def test_team_detail(self):
+        url = reverse('sport_teams:team_detail', args=[self.team.slug])
+        self.assertQueryBudget(lambda: self.client.get(url), queries=9, rows=35)
+
+
+class RatingMathTests(SimpleTestCase):
+    def test_expected_score(self):
+        self.assertEqual(expected_score(1500, 1500), 0.5)
+        # 400 points ahead is ten to one
+        self.assertAlmostEqual(expected_score(1900, 1500), 10 / 11)
+        self.assertAlmostEqual(expected_score(1500, 1900) + expected_score(1900, 1500), 1.0)
+
+    def test_rating_change(self):
+        self.assertEqual(rating_change(1500, 1500, 3, 1, k_factor=32), 16)
+        self.assertEqual(rating_change(1500, 1500, 1, 3, k_factor=32), -16)
+        self.assertEqual(rating_change(1500, 1500, 2, 2, k_factor=32), 0)
+        # Beating a much weaker team earns little
+        self.assertLess(rating_change(1900, 1500, 3, 1, k_factor=32), 3)
+
+
+class RatingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.teams = [
+            Team.objects.create(name=f'Rated Team {index}', captain=User.objects.create_user(f'rated{index}'))
+            for index in range(3)
+        ]
+
+    def play(self, challenger, opponent, challenger_score, opponent_score, day=1):
+        match_request = MatchRequest.objects.create(
+            challenger=challenger, opponent=opponent, preferred_date=date(2025, 1, day), status='accepted'
+        )
+        return record_match_result(match_request, challenger_score, opponent_score)
+
+    def ratings(self):
+        return {team.id: (team.rating, team.matches_played) for team in Team.objects.all()}
+
+    def test_result_is_zero_sum(self):
+        challenger, opponent, _ = self.teams
+        with self.settings(TEAM_RATING_K_FACTOR=32):
+            result = self.play(challenger, opponent, 3, 1)
+        self.assertEqual(result.rating_change, 16)
+        challenger.refresh_from_db()
+        opponent.refresh_from_db()
+        self.assertEqual((challenger.rating, challenger.matches_played), (1516, 1))
+        self.assertEqual((opponent.rating, opponent.matches_played), (1484, 1))
+        self.assertEqual(MatchRequest.objects.get(pk=result.match_request_id).status, 'completed')
+
+    def test_result_recorded_once(self):
+        result = self.play(self.teams[0], self.teams[1], 1, 0)
+        with self.assertRaises(ValueError):
+            record_match_result(result.match_request, 1, 0)
+
+    def test_replay_matches_incremental_updates(self):
+        first, second, third = self.teams
+        self.play(first, second, 2, 1, day=1)
+        self.play(second, third, 0, 0, day=2)
+        self.play(third, first, 4, 1, day=3)
+        incremental = self.ratings()
+        changes = list(MatchResult.objects.order_by('id').values_list('rating_change', flat=True))
+
+        self.assertEqual(replay_ratings(), 3)
+        replayed = self.ratings()
+        self.assertEqual(replay_ratings(), 3)
+        self.assertEqual(self.ratings(), replayed)
+        for team_id, (rating, played) in incremental.items():
+            self.assertAlmostEqual(replayed[team_id][0], rating)
+            self.assertEqual(replayed[team_id][1], played)
+        self.assertEqual(
+            list(MatchResult.objects.order_by('id').values_list('rating_change', flat=True)), changes
+        )
+        self.assertAlmostEqual(sum(rating for rating, _ in replayed.values()), 1500 * 3)
+
+
+class LeaderboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for index in range(3):
+            Team.objects.create(
+                name=f'Ranked Team {index}', captain=User.objects.create_user(f'ranked{index}'),
+                rating=1500 + index, matches_played=1
+            )
+
+    def test_limit_is_clamped(self):
+        url = reverse('sport_teams:leaderboard')
+        for limit, expected in [('-5', 1), ('0', 1), ('2', 2), ('1000', 3)]:
+            with self.subTest(limit=limit):
+                response = self.client.get(url, {'limit': limit})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(len(response.json()['teams']), expected)
+        self.assertEqual(self.client.get(url, {'limit': 'all'}).status_code, 400)
+
+
+class PageParamsTests(SimpleTestCase):
+    def test_page_params(self):
+        cases = [
+            ({}, (20, 0)),
+            ({'limit': '5', 'offset': '10'}, (5, 10)),
+            ({'limit': '-5', 'offset': '-10'}, (1, 0)),
+            ({'limit': '0'}, (1, 0)),
+            ({'limit': '1000'}, (100, 0)),
+        ]
+        for params, expected in cases:
+            with self.subTest(params=params):
+                self.assertEqual(page_params(params), expected)
+        with self.assertRaises(ValueError):
+            page_params({'offset': 'next'})
+
+
+class DiscoverPlayersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        captain = User.objects.create_user('discoverer')
+        cls.team = Team.objects.create(name='Discovering Team', captain=captain)
+        cls.players = {}
+        for username, sport, attributes in [
+            ('discoverer', 'cricket', {'playing_side': 'right', 'batting_style': 'opening'}),
+            ('opener', 'cricket', {'playing_side': 'right', 'batting_style': 'opening', 'bowling_style': 'fast'}),
+            ('leftie', 'cricket', {'playing_side': 'left', 'batting_style': 'opening', 'bowling_style': 'off_break'}),
+            ('keeper', 'cricket', {'playing_side': 'right', 'batting_style': 'middle_order', 'is_wicketkeeper': True}),
+            ('member', 'cricket', {'playing_side': 'right', 'batting_style': 'opening', 'bowling_style': 'fast'}),
+            ('striker', 'football', {'playing_side': 'right', 'football_position': 'forward'}),
+        ]:
+            user = captain if username == 'discoverer' else User.objects.create_user(username)
+            PlayerProfile.objects.create(user=user, preferred_sport=sport, **attributes)
+            cls.players[user.id] = username
+        TeamMember.objects.create(team=cls.team, user=User.objects.get(username='member'))
+
+    def setUp(self):
+        self.client.force_login(self.team.captain)
+        self.url = reverse('sport_teams:discover_players', args=[self.team.slug])
+
+    def discover(self, **params):
+        response = self.client.get(self.url, {'preferred_sport': 'cricket', **params})
+        self.assertEqual(response.status_code, 200)
+        return [(self.players[player['user_id']], player['match_score']) for player in response.json()['players']]
+
+    def test_filters_narrow_results(self):
+        # Neither the captain nor the team's members are suggested
+        self.assertEqual(self.discover(), [('opener', 0), ('leftie', 0), ('keeper', 0)])
+        self.assertEqual(self.discover(playing_side='right'), [('opener', 1), ('keeper', 1)])
+        self.assertEqual(self.discover(playing_side='right', batting_style='opening'), [('opener', 2)])
+        self.assertEqual(self.discover(bowling_style='off_break'), [('leftie', 1)])
+        self.assertEqual(self.discover(is_wicketkeeper='true'), [('keeper', 1)])
+        self.assertEqual(self.discover(batting_style='finisher'), [])
+        self.assertEqual(self.discover(preferred_sport='football', football_position='forward'), [('striker', 1)])
+
+    def test_match_any_ranks_by_matches(self):
+        ranked = self.discover(match='any', playing_side='right', batting_style='opening', bowling_style='fast')
+        self.assertEqual(ranked, [('opener', 3), ('leftie', 1), ('keeper', 1)])
+        self.assertEqual(self.discover(match='any', bowling_style='leg_break'), [])
+
+    def test_filters_use_composite_indexes(self):
+        for filters, index in [
+            ({'playing_side': 'right'}, 'profile_sport_side_idx'),
+            ({'batting_style': 'opening'}, 'profile_sport_batting_idx'),
+            ({'football_position': 'forward'}, 'profile_sport_position_idx'),
+        ]:
+            with self.subTest(filters=filters):
+                plan = PlayerProfile.objects.filter(preferred_sport='cricket', **filters).explain()
+                self.assertIn(index, plan)
+
+    def test_invalid_requests(self):
+        for params in [
+            {'preferred_sport': 'cricket', 'batting_style': 'slogger'},
+            {'preferred_sport': 'hockey'},
+            {},
+        ]:
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        self.client.force_login(User.objects.get(username='member'))
+        self.assertEqual(self.client.get(self.url, {'preferred_sport': 'cricket'}).status_code, 403)
+
+    def test_limit_is_clamped(self):
+        for limit, expected in [('-5', 1), ('2', 2), ('1000', 3)]:
+            with self.subTest(limit=limit):
+                self.assertEqual(len(self.discover(limit=limit)), expected)
+
+
+class PairingTests(SimpleTestCase):
+    def test_round_robin_pairs_each_team_once(self):
+        for count in range(2, 10):
+            with self.subTest(teams=count):
+                teams = list(range(1, count + 1))
+                rounds = round_robin_pairings(teams)
+                # Odd counts add a bye, so every team sits out exactly one round
+                self.assertEqual(len(rounds), count - 1 if count % 2 == 0 else count)
+                pairs = [frozenset(pair) for pairs in rounds for pair in pairs]
+                self.assertEqual(sorted(pairs, key=sorted), sorted(map(frozenset, combinations(teams, 2)), key=sorted))
+                for pairs in rounds:
+                    playing = [team for pair in pairs for team in pair]
+                    self.assertEqual(len(playing), len(set(playing)))
+                    self.assertEqual(len(playing), count - count % 2)
+
+    def test_knockout_byes_go_to_top_seeds(self):
+        self.assertEqual(knockout_pairings([1, 2, 3, 4]), [[(1, 4), (2, 3)]])
+        # 5 teams in a bracket of 8: seeds 1-3 get byes
+        self.assertEqual(knockout_pairings([1, 2, 3, 4, 5]), [[(4, 5)]])
+        self.assertEqual(knockout_pairings([1, 2, 3, 4, 5, 6]), [[(3, 6), (4, 5)]])
+        self.assertEqual(knockout_pairings([1]), [[]])
+
+
+class AssignFixturesTests(SimpleTestCase):
+    start = date(2025, 3, 1)
+
+    def grid(self, days, slots=2, pitches=1):
+        time_slots = [SimpleNamespace(id=index, start_time=time(18 + index)) for index in range(slots)]
+        facility_sports = [SimpleNamespace(id=index) for index in range(pitches)]
+        return [
+            (self.start + timedelta(days=day), slot, list(facility_sports))
+            for day in range(days) for slot in time_slots
+        ]
+
+    def test_rest_days_between_a_teams_matches(self):
+        rounds = round_robin_pairings(range(1, 7))
+        fixtures, unscheduled = assign_fixtures(rounds, self.grid(30, pitches=2), rest_days=2)
+        self.assertEqual(unscheduled, [])
+        self.assertEqual(len(fixtures), 15)
+        dates = {}
+        for _, home, away, fixture_date, _, _ in fixtures:
+            dates.setdefault(home, []).append(fixture_date)
+            dates.setdefault(away, []).append(fixture_date)
+        for team, played in dates.items():
+            for earlier, later in zip(played, played[1:]):
+                self.assertGreaterEqual((later - earlier).days, 2, team)
+
+    def test_each_pitch_used_once_per_slot(self):
+        rounds = round_robin_pairings(range(1, 9))
+        fixtures, _ = assign_fixtures(rounds, self.grid(30, pitches=2), rest_days=1)
+        places = [(fixture_date, slot.id, pitch.id) for _, _, _, fixture_date, slot, pitch in fixtures]
+        self.assertEqual(len(places), len(set(places)))
+
+    def test_blocked_slots_are_skipped(self):
+        blocked = {1: {(self.start, 0)}}
+        fixtures, _ = assign_fixtures([[(1, 2)]], self.grid(2), team_blocked=blocked)
+        self.assertEqual([(fixture_date, slot.id) for _, _, _, fixture_date, slot, _ in fixtures], [(self.start, 1)])
+
+    def test_overflow_is_unscheduled(self):
+        # 4 teams need 3 match days at one per day; the grid has 2
+        rounds = round_robin_pairings([1, 2, 3, 4])
+        fixtures, unscheduled = assign_fixtures(rounds, self.grid(2, slots=1, pitches=2), rest_days=1)
+        self.assertEqual(len(fixtures), 4)
+        self.assertEqual(unscheduled, [(3, home, away) for home, away in rounds[2]])
+
+
+class MatchSlotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.facility = Facility.objects.create(name='Slot Turf', location='Coimbatore')
+        cls.cricket = FacilitySport.objects.create(
+            facility=cls.facility, sport=SportType.objects.create(name='Cricket'), price_per_slot=1000
+        )
+        cls.football = FacilitySport.objects.create(
+            facility=cls.facility, sport=SportType.objects.create(name='Football'), price_per_slot=800
+        )
+        cls.morning, cls.evening, cls.night = [
+            TimeSlot.objects.create(slot_time=slot_time, start_time=time(start), end_time=time(start + 2))
+            for slot_time, start in [('06:00-08:00', 6), ('18:00-20:00', 18), ('20:00-22:00', 20)]
+        ]
+        cls.vice_captain = User.objects.create_user('slot-vice')
+        cls.team = Team.objects.create(
+            name='Slot Team', captain=User.objects.create_user('slot-captain'), vice_captain=cls.vice_captain
+        )
+        cls.opponent = Team.objects.create(name='Slot Opponent', captain=User.objects.create_user('slot-rival'))
+        # Both teams are free on Monday evenings only
+        cls.monday = date.today() + timedelta(days=7 - date.today().weekday())
+        for team, weekday, slot in [
+            (cls.team, 0, cls.morning), (cls.team, 0, cls.evening), (cls.team, 1, cls.morning),
+            (cls.opponent, 0, cls.evening), (cls.opponent, 0, cls.night),
+        ]:
+            TeamAvailability.objects.create(team=team, weekday=weekday, time_slot=slot)
+
+    def find(self, **kwargs):
+        slots = find_common_free_slots(self.team, self.opponent, start_date=self.monday, days=7, **kwargs)
+        return [(slot['date'], slot['time_slot_id'], slot['facility_sport_id']) for slot in slots]
+
+    def test_intersects_availability(self):
+        monday = self.monday.isoformat()
+        self.assertEqual(self.find(), [
+            (monday, self.evening.id, self.cricket.id), (monday, self.evening.id, self.football.id)
+        ])
+        self.assertEqual(self.find(limit=1), [(monday, self.evening.id, self.cricket.id)])
+        self.assertEqual(self.find(sport_id=self.football.sport_id), [(monday, self.evening.id, self.football.id)])
+
+    def test_skips_booked_and_committed_slots(self):
+        Booking.objects.create(
+            user=self.opponent.captain, facility_sport=self.cricket, date=self.monday,
+            time_slot=self.evening, status='confirmed'
+        )
+        self.assertEqual(self.find(), [(self.monday.isoformat(), self.evening.id, self.football.id)])
+
+        third = Team.objects.create(name='Slot Third', captain=User.objects.create_user('slot-third'))
+        match_request = MatchRequest.objects.create(
+            challenger=self.team, opponent=third, preferred_date=self.monday, preferred_time=self.evening
+        )
+        self.assertEqual(self.find(), [])
+        # Rescheduling that match does not collide with itself
+        self.assertEqual(len(self.find(exclude_request_id=match_request.id)), 1)
+
+    def test_respects_opening_hours(self):
+        Facility.objects.filter(pk=self.facility.pk).update(closing_time=time(18))
+        self.assertEqual(self.find(), [])
+
+    def test_no_common_availability(self):
+        TeamAvailability.objects.filter(team=self.opponent, time_slot=self.evening).delete()
+        self.assertEqual(self.find(), [])
+
+    def test_suggest_match_slots(self):
+        url = reverse('sport_teams:suggest_match_slots')
+        params = {'team_id': self.team.id, 'opponent_id': self.opponent.id}
+        self.client.force_login(self.vice_captain)
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(slot['time_slot_id'] == self.evening.id for slot in response.json()['slots']))
+
+        for bad in [
+            {'team_id': 'x', 'opponent_id': self.opponent.id},
+            {'opponent_id': self.opponent.id},
+            {'team_id': self.team.id, 'opponent_id': self.team.id},
+            dict(params, days='soon'),
+        ]:
+            with self.subTest(params=bad):
+                self.assertEqual(self.client.get(url, bad).status_code, 400)
+        self.assertEqual(self.client.get(url, dict(params, opponent_id=0)).status_code, 404)
+
+        # Only the asking team's captains
+        self.client.force_login(self.opponent.captain)
+        self.assertEqual(self.client.get(url, params).status_code, 403)
+
+    def test_team_availability(self):
+        url = reverse('sport_teams:team_availability', args=[self.team.slug])
+        self.client.force_login(self.vice_captain)
+        self.assertEqual(self.client.get(url).json()['availability'], {
+            '0': [self.morning.id, self.evening.id], '1': [self.morning.id]
+        })
+        update = {'availability': {'5': [self.night.id]}}
+        response = self.client.post(url, json.dumps(update), content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        self.client.force_login(self.team.captain)
+        for bad in [
+            {'availability': {'5': str(self.night.id)}},
+            {'availability': {'5': {str(self.night.id): True}}},
+            {'availability': {'5': [True]}},
+            {'availability': {'5': [str(self.night.id)]}},
+            {'availability': {'5': [0]}},
+            {'availability': {'7': [self.night.id]}},
+            {'availability': [self.night.id]},
+        ]:
+            with self.subTest(body=bad):
+                response = self.client.post(url, json.dumps(bad), content_type='application/json')
+                self.assertEqual(response.status_code, 400)
+        self.assertEqual(TeamAvailability.objects.filter(team=self.team).count(), 3)
+
+        response = self.client.post(url, json.dumps(update), content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(TeamAvailability.objects.filter(team=self.team).values_list('weekday', 'time_slot_id')),
+            [(5, self.night.id)]
+        )
+
+
+class ScheduleTournamentTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        facility = Facility.objects.create(name='Tournament Turf', location='Coimbatore')
+        FacilitySport.objects.create(
+            facility=facility, sport=SportType.objects.create(name='Cricket'), price_per_slot=1200
+        )
+        # Fresh from the database, for the facility's opening hours as times
+        cls.facility_sports = list(FacilitySport.objects.select_related('facility'))
+        cls.time_slots = [
+            TimeSlot.objects.create(slot_time=slot_time, start_time=time(start), end_time=time(start + 2))
+            for slot_time, start in [('06:00-08:00', 6), ('18:00-20:00', 18)]
+        ]
+        cls.organizer = User.objects.create_user('organizer', is_admin=True)
+        cls.teams = [
+            Team.objects.create(name=f'Cup Team {index}', captain=User.objects.create_user(f'cup{index}'))
+            for index in range(4)
+        ]
+        cls.start = date.today() + timedelta(days=10)
+
+    def schedule(self):
+        return schedule_tournament(
+            'Summer Cup', self.teams, self.start, self.start + timedelta(days=13),
+            self.facility_sports, self.time_slots, organizer=self.organizer
+        )
+
+    def test_writes_bookings_and_fixtures(self):
+        tournament, fixtures, unscheduled = self.schedule()
+        self.assertEqual((len(fixtures), unscheduled), (6, []))
+        self.assertEqual(set(tournament.teams.all()), set(self.teams))
+
+        matches = MatchRequest.objects.filter(tournament=tournament).select_related('booking')
+        self.assertEqual(len(matches), 6)
+        for match in matches:
+            self.assertEqual(match.status, 'accepted')
+            booking = match.booking
+            self.assertEqual(booking.status, 'confirmed')
+            self.assertEqual(booking.total_price, 1200)
+            self.assertEqual(
+                (booking.date, booking.time_slot_id, booking.facility_sport.facility_id),
+                (match.preferred_date, match.preferred_time_id, match.preferred_facility_id)
+            )
+        self.assertEqual(Booking.objects.filter(user=self.organizer).count(), 6)
+
+    def test_rolls_back_on_failure(self):
+        with mock.patch.object(MatchRequest.objects, 'bulk_create', side_effect=RuntimeError('disk full')):
+            with self.assertRaises(RuntimeError):
+                self.schedule()
+        self.assertFalse(Tournament.objects.exists())
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(MatchRequest.objects.exists())
@@ -11,6 +11,9 @@ urlpatterns = [
     path('match/accept/<int:request_id>/', views.accept_match, name='accept_match'),
     path('match/reject/<int:request_id>/', views.reject_match, name='reject_match'),
     path('match/requests/', views.get_match_requests, name='match_requests'),
+    path('match/suggest-slots/', views.suggest_match_slots, name='suggest_match_slots'),
+    path('match/result/<int:request_id>/', views.record_result, name='record_result'),
+    path('leaderboard/', views.leaderboard, name='leaderboard'),
     # Search endpoint should be before slug patterns to avoid confusion
     path('search_player/', views.search_player, name='search_player'),
     
@@ -22,4 +25,6 @@ urlpatterns = [
     path('<slug:slug>/delete/', views.TeamDeleteView.as_view(), name='delete_team'),
     path('<slug:slug>/members/<int:member_id>/remove/', views.remove_team_member, name='remove_member'),
     path('<slug:slug>/members/add/', views.add_team_member, name='add_member'),
+    path('<slug:slug>/players/discover/', views.discover_players, name='discover_players'),
+    path('<slug:slug>/availability/', views.team_availability, name='team_availability'),
 ]
\ No newline at end of file
@@ -1,13 +1,18 @@
+import asyncio
 import json
-import requests
+import logging
+from asgiref.sync import async_to_sync
 from django.conf import settings
 from facilities.models import Facility, TimeSlot
 from django.urls import reverse
 from django.contrib.sites.shortcuts import get_current_site
 from django.template.loader import render_to_string
+from turfzone.metrics import track_notification
 
 ADMIN_WHATSAPP = "+918074101457"
 
+logger = logging.getLogger(__name__)
+
 def get_whatsapp_message_template(match_request, message_type='new_request'):
     """
     Generate WhatsApp message template based on the type of message
@@ -54,6 +59,27 @@ def send_whatsapp_message(phone_number, message):
     """
     Send WhatsApp message using WhatsApp Business API
     """
+    return async_to_sync(send_whatsapp_messages)([phone_number], message)[0]
+
+async def send_whatsapp_messages(phone_numbers, message):
+    """
+    Send the same message to several numbers concurrently over one HTTP
+    client. Returns whether each send succeeded, in order.
+    """
+    # httpx is only needed when a message is sent, so it isn't imported at
+    # startup (sport_teams.admin imports this module)
+    import httpx
+    async with httpx.AsyncClient(timeout=settings.WHATSAPP_TIMEOUT) as client:
+        return await asyncio.gather(*(
+            _send_tracked(client, phone_number, message) for phone_number in phone_numbers
+        ))
+
+async def _send_tracked(client, phone_number, message):
+    with track_notification('whatsapp') as outcome:
+        outcome['sent'] = await _post_whatsapp_message(client, phone_number, message)
+    return outcome['sent']
+
+async def _post_whatsapp_message(client, phone_number, message):
     try:
         # Format the phone number (remove '+' and any spaces)
         formatted_phone = phone_number.replace('+', '').replace(' ', '')
@@ -78,66 +104,76 @@ def send_whatsapp_message(phone_number, message):
         }
         
         # Make the API request
-        response = requests.post(url, headers=headers, json=payload)
+        response = await client.post(url, headers=headers, json=payload)
         response_data = response.json()
         
-        # Log the response for debugging
-        print(f'WhatsApp API Response: {response_data}')
-        
         if response.status_code == 200:
             messages_sent = response_data.get('messages', [])
             if messages_sent:
-                print(f'Message sent successfully. Message ID: {messages_sent[0].get("id")}')
+                logger.info('WhatsApp message sent, id %s', messages_sent[0].get('id'))
                 return True
         
-        print(f'Failed to send message. Status code: {response.status_code}')
-        print(f'Error details: {response_data}')
+        logger.warning(
+            'WhatsApp message failed with status %s: %s', response.status_code, response_data,
+            extra={'status_code': response.status_code}
+        )
         return False
         
-    except Exception as e:
-        print(f'Error sending WhatsApp message: {str(e)}')
+    except Exception:
+        logger.exception('Error sending WhatsApp message')
         return False
 
 def notify_match_request(match_request, notification_type='new_request'):
     """
-    Handle match request notifications via WhatsApp
+    Queue the WhatsApp notifications for a match request. Call it in the
+    transaction that saves the request; job workers send the messages.
     """
+    from .tasks import send_whatsapp
+
     message = get_whatsapp_message_template(match_request, notification_type)
-    sent_to = []
-    success = True
     
     # Get captain's phone numbers
-    opponent_captain_phone = match_request.opponent.captain.phone_number if match_request.opponent.captain else None
-    challenger_captain_phone = match_request.challenger.captain.phone_number if match_request.challenger.captain else None
+    opponent_captain = match_request.opponent.captain
+    challenger_captain = match_request.challenger.captain
+    opponent_captain_phone = (opponent_captain.phone_number_normalized or opponent_captain.phone_number) if opponent_captain else None
+    challenger_captain_phone = (challenger_captain.phone_number_normalized or challenger_captain.phone_number) if challenger_captain else None
     
-    # Always notify admin first
-    if send_whatsapp_message(ADMIN_WHATSAPP, message):
-        sent_to.append('admin')
-    else:
-        success = False
-        print(f'Failed to send WhatsApp message to admin: {ADMIN_WHATSAPP}')
+    # Always notify admin
+    recipients = [('admin', ADMIN_WHATSAPP)]
     
     # For new requests and rescheduling, notify the opponent's captain
-    if notification_type in ['new_request', 'rescheduled']:
-        if opponent_captain_phone:
-            if send_whatsapp_message(opponent_captain_phone, message):
-                sent_to.append('opponent captain')
-            else:
-                success = False
-                print(f'Failed to send WhatsApp message to opponent captain: {opponent_captain_phone}')
+    if notification_type in ['new_request', 'rescheduled'] and opponent_captain_phone:
+        recipients.append(('opponent captain', opponent_captain_phone))
     
     # For accept/reject notifications, always notify the challenger's captain
-    if notification_type in ['accepted', 'rejected']:
-        if challenger_captain_phone:
-            if send_whatsapp_message(challenger_captain_phone, message):
-                sent_to.append('challenger captain')
-            else:
-                success = False
-                print(f'Failed to send WhatsApp message to challenger captain: {challenger_captain_phone}')
+    if notification_type in ['accepted', 'rejected'] and challenger_captain_phone:
+        recipients.append(('challenger captain', challenger_captain_phone))
     
-    # Log the notification results
-    print(f'Match request notification ({notification_type}) sent to: {", ".join(sent_to)}')
-    if not success:
-        print('Some notifications failed to send. Check the logs above for details.')
+    # One job per recipient, so a failed send is retried for that recipient
+    # alone
+    for _, phone in recipients:
+        send_whatsapp.enqueue(phone, message)
     
-    return success
\ No newline at end of file
+    logger.info(
+        'Match request %s notification (%s) queued for: %s',
+        match_request.pk, notification_type, ', '.join(recipient for recipient, _ in recipients),
+        extra={'match_request_id': match_request.pk, 'notification_type': notification_type}
+    )
+    
+    return True
+
+
+def bounded_int_param(params, name, default, maximum, minimum=1):
+    """
+    Integer query parameter `name`, clamped to [minimum, maximum] so a
+    negative or huge value cannot produce an invalid slice or a runaway
+    query. Raises ValueError if the value is not a number.
+    """
+    return min(max(int(params.get(name, default)), minimum), maximum)
+
+
+def page_params(params, default_limit=20, max_limit=100):
+    """(limit, offset) from a request's query parameters"""
+    limit = bounded_int_param(params, 'limit', default_limit, max_limit)
+    offset = max(int(params.get('offset', 0)), 0)
+    return limit, offset
@@ -1,4 +1,5 @@
 import json
+import logging
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
 from django.contrib.auth.decorators import login_required
@@ -6,14 +7,24 @@ from django.views.generic import ListView, DetailView, CreateView, UpdateView, D
 from django.urls import reverse_lazy
 from django.contrib import messages
 from django.contrib.auth import get_user_model
-from django.http import HttpResponse, JsonResponse
+from django.http import HttpResponse
+from turfzone.fastjson import JsonResponse
 from django.template.loader import render_to_string
-from django.db.models import Q
+from django.db.models import Q, Case, When, Prefetch
+from django.db import transaction
 from django.utils import timezone
-from .models import Team, TeamMember, MatchRequest
+from django.conf import settings
+from .models import Team, TeamMember, MatchRequest, TeamAvailability
+from .scheduling import find_common_free_slots
+from .ratings import record_match_result
 from .forms import TeamForm, TeamManagementForm, AddPlayerForm
 from facilities.models import Facility, TimeSlot
-from .utils import notify_match_request
+from .utils import bounded_int_param, notify_match_request, page_params
+from accounts.utils import normalize_phone_number, phone_search_prefix, phone_prefix_range
+from accounts.models import PlayerProfile
+from turfzone.db_routers import read_from_replica
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
@@ -22,20 +33,108 @@ def search_player(request):
     phone_number = request.GET.get('phone_number', '').strip()
     if not phone_number:
         return HttpResponse('')
-    
-    # Use filter instead of get to handle multiple users
-    users = User.objects.select_related('player_profile').filter(phone_number=phone_number)
-    
-    if not users.exists():
+
+    normalized = normalize_phone_number(phone_number)
+    users = User.objects.select_related('player_profile')
+    if normalized:
+        # Complete number - exact match on the indexed normalized column
+        users = users.filter(phone_number_normalized=normalized)
+    else:
+        # Partial number from the typeahead - prefix match as an index range scan
+        prefix = phone_search_prefix(phone_number)
+        if len(prefix) - 1 < len(settings.PHONE_DEFAULT_COUNTRY_CODE) + settings.PHONE_SEARCH_MIN_DIGITS:
+            return HttpResponse('')
+        lower, upper = phone_prefix_range(prefix)
+        users = users.filter(
+            phone_number_normalized__gte=lower,
+            phone_number_normalized__lt=upper
+        ).order_by('phone_number_normalized')
+    users = list(users[:settings.PHONE_SEARCH_MAX_RESULTS])
+
+    if not users:
         return HttpResponse('<div class="alert alert-warning mt-3"><i class="fas fa-exclamation-circle me-2"></i>No players found with this phone number.</div>')
     
     context = {
         'found_users': users,  # Pass all found users to template
-        'multiple_users': users.count() > 1  # Flag to indicate multiple users
+        'multiple_users': len(users) > 1  # Flag to indicate multiple users
     }
-    html = render_to_string('sport_teams/player_search_result.html', context)
+    html = render_to_string('sport_teams/player_search_result.html', context, request=request)
     return HttpResponse(html)
 
+# PlayerProfile attributes captains can search on, with their valid values
+PLAYER_DISCOVERY_FILTERS = {
+    'playing_side': PlayerProfile.PLAYING_SIDE,
+    'batting_style': PlayerProfile.BATTING_STYLE,
+    'bowling_style': PlayerProfile.BOWLING_STYLE,
+    'football_position': PlayerProfile.FOOTBALL_POSITION,
+    'football_style': PlayerProfile.FOOTBALL_STYLE,
+}
+
+@login_required
+def discover_players(request, slug):
+    """
+    Find players for a team by PlayerProfile attributes, excluding players
+    already on it. preferred_sport is required; every other attribute given
+    is a filter. With match=any the other attributes become preferences and
+    players are ranked by how many they match.
+    """
+    team = get_object_or_404(Team, slug=slug)
+    if request.user not in [team.captain, team.vice_captain]:
+        return JsonResponse({'error': 'Only team captains can search for players'}, status=403)
+
+    sport = request.GET.get('preferred_sport')
+    if sport not in dict(PlayerProfile.SPORT_CHOICES):
+        return JsonResponse({'error': 'preferred_sport must be cricket or football'}, status=400)
+
+    criteria = {}
+    for field, choices in PLAYER_DISCOVERY_FILTERS.items():
+        value = request.GET.get(field)
+        if not value:
+            continue
+        if value not in dict(choices):
+            return JsonResponse({'error': f'Invalid value for {field}: {value}'}, status=400)
+        criteria[field] = value
+    if request.GET.get('is_wicketkeeper') in ['true', '1']:
+        criteria['is_wicketkeeper'] = True
+
+    try:
+        limit, offset = page_params(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'limit and offset must be numbers'}, status=400)
+
+    profiles = PlayerProfile.objects.filter(preferred_sport=sport).exclude(
+        user__team_memberships__team=team
+    ).exclude(user=request.user).select_related('user')
+
+    if request.GET.get('match') == 'any' and criteria:
+        # Rank by the number of matching attributes, best first
+        matches = [Case(When(**{field: value}, then=1), default=0) for field, value in criteria.items()]
+        any_match = Q()
+        for field, value in criteria.items():
+            any_match |= Q(**{field: value})
+        profiles = profiles.filter(any_match).annotate(
+            match_score=sum(matches[1:], matches[0])
+        ).order_by('-match_score', 'id')
+    else:
+        # Exact filters lead with preferred_sport, so the composite indexes
+        # on PlayerProfile turn them into index seeks
+        profiles = profiles.filter(**criteria).order_by('id')
+
+    players = []
+    for profile in profiles[offset:offset + limit]:
+        user = profile.user
+        players.append({
+            'user_id': user.id,
+            'name': user.get_full_name() or user.username,
+            'profile_picture': user.profile_picture.url if user.profile_picture else None,
+            'preferred_sport': profile.get_preferred_sport_display(),
+            'playing_side': profile.get_playing_side_display(),
+            'details': profile.get_sport_details(),
+            'match_score': getattr(profile, 'match_score', len(criteria)),
+        })
+
+    return JsonResponse({'players': players})
+
 class TeamListView(ListView):
     model = Team
     template_name = 'sport_teams/team_list.html'
@@ -46,9 +145,15 @@ class TeamDetailView(DetailView):
     model = Team
     template_name = 'sport_teams/team_detail.html'
 
+    def get_queryset(self):
+        # The template lists every member with their user
+        return Team.objects.select_related('captain', 'vice_captain').prefetch_related(
+            Prefetch('members', queryset=TeamMember.objects.select_related('user'))
+        )
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        team = self.get_object()
+        team = self.object
         
         # Get available opponents
         context['available_opponents'] = Team.objects.exclude(
@@ -188,7 +293,7 @@ def add_team_member(request, slug):
                 return render(request, 'sport_teams/confirm_add_member.html', {
                     'team': team,
                     'user_to_add': user,
-                    'phone_number': user.phone_number,
+                    'phone_number': user.phone_number_normalized or user.phone_number,
                     'player_profile': user.player_profile if hasattr(user, 'player_profile') else None
                 })
             except User.DoesNotExist:
@@ -199,7 +304,7 @@ def add_team_member(request, slug):
         elif 'confirm' in request.POST:
             phone_number = request.POST.get('phone_number')
             try:
-                user = User.objects.get(phone_number=phone_number)
+                user = User.objects.get(phone_number_normalized=normalize_phone_number(phone_number))
                 
                 # Check if user is already a member
                 if TeamMember.objects.filter(team=team, user=user).exists():
@@ -214,7 +319,7 @@ def add_team_member(request, slug):
                 )
                 messages.success(request, f'{user.get_full_name() or user.username} has been added to the team.')
                 return redirect('sport_teams:team_detail', slug=slug)
-            except User.DoesNotExist:
+            except (User.DoesNotExist, User.MultipleObjectsReturned):
                 messages.error(request, 'Player not found. Please try again.')
                 return redirect('sport_teams:add_member', slug=slug)
         
@@ -233,6 +338,119 @@ def add_team_member(request, slug):
     return render(request, 'sport_teams/add_member.html', context)
 
 
+@login_required
+def team_availability(request, slug):
+    """
+    GET returns the team's recurring weekly availability.
+    POST (captain only) replaces it with a JSON body like
+    {"availability": {"5": [1, 2], "6": [2]}} mapping weekday (0 = Monday)
+    to time slot IDs.
+    """
+    team = get_object_or_404(Team, slug=slug)
+
+    if request.method == 'POST':
+        if request.user != team.captain:
+            return JsonResponse({
+                'success': False,
+                'message': 'Only the team captain can update availability'
+            }, status=403)
+
+        try:
+            data = json.loads(request.body)
+            availability = data.get('availability', {})
+            valid_slot_ids = set(TimeSlot.objects.values_list('id', flat=True))
+            entries = set()
+            for weekday, slot_ids in availability.items():
+                weekday = int(weekday)
+                if not 0 <= weekday <= 6:
+                    raise ValueError(f'Invalid weekday: {weekday}')
+                if not isinstance(slot_ids, list):
+                    raise ValueError(f'Time slots for weekday {weekday} must be a list')
+                for slot_id in slot_ids:
+                    # bool is an int subclass, but true is not a slot ID
+                    if not isinstance(slot_id, int) or isinstance(slot_id, bool):
+                        raise ValueError(f'Invalid time slot: {slot_id!r}')
+                    if slot_id not in valid_slot_ids:
+                        raise ValueError(f'Invalid time slot: {slot_id}')
+                    entries.add((weekday, slot_id))
+        except (json.JSONDecodeError, AttributeError, TypeError, ValueError) as e:
+            return JsonResponse({
+                'success': False,
+                'message': f'Invalid availability data: {str(e)}'
+            }, status=400)
+
+        with transaction.atomic():
+            TeamAvailability.objects.filter(team=team).delete()
+            TeamAvailability.objects.bulk_create([
+                TeamAvailability(team=team, weekday=weekday, time_slot_id=slot_id)
+                for weekday, slot_id in sorted(entries)
+            ])
+
+        return JsonResponse({
+            'success': True,
+            'message': 'Team availability updated'
+        })
+
+    availability = {}
+    for weekday, slot_id in team.availability.values_list('weekday', 'time_slot_id'):
+        availability.setdefault(str(weekday), []).append(slot_id)
+
+    return JsonResponse({
+        'team': team.name,
+        'availability': availability
+    })
+
+
+@login_required
+def suggest_match_slots(request):
+    """
+    Suggest the earliest slots in which both teams are available and a
+    facility is free, so a match can be called in one request.
+    """
+    try:
+        team_id = int(request.GET.get('team_id', ''))
+        opponent_id = int(request.GET.get('opponent_id', ''))
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'team_id and opponent_id must be team IDs'
+        }, status=400)
+    if team_id == opponent_id:
+        return JsonResponse({
+            'success': False,
+            'message': 'A team cannot play itself'
+        }, status=400)
+
+    team = get_object_or_404(Team, id=team_id)
+    opponent = get_object_or_404(Team, id=opponent_id)
+
+    if request.user not in [team.captain, team.vice_captain]:
+        return JsonResponse({
+            'success': False,
+            'message': 'Only team captains can look for match slots'
+        }, status=403)
+
+    try:
+        days = bounded_int_param(
+            request.GET, 'days', settings.MATCH_SLOT_SEARCH_DAYS, settings.MATCH_SLOT_SEARCH_DAYS
+        )
+        limit = bounded_int_param(request.GET, 'limit', 10, 50)
+        sport_id = int(request.GET['sport_id']) if request.GET.get('sport_id') else None
+    except ValueError:
+        return JsonResponse({
+            'success': False,
+            'message': 'days, limit and sport_id must be numbers'
+        }, status=400)
+
+    suggestions = find_common_free_slots(team, opponent, days=days, limit=limit, sport_id=sport_id)
+
+    return JsonResponse({
+        'success': True,
+        'slots': suggestions,
+        'message': '' if suggestions else 'No common free slots found. Ask both captains to publish their availability.'
+    })
+
+
 @login_required
 def call_match(request):
     if request.method == 'POST':
@@ -265,29 +483,27 @@ def call_match(request):
 
         # Create match request
         try:
-            match_request = MatchRequest.objects.create(
-                challenger=team,
-                opponent=opponent,
-                preferred_date=preferred_date,
-                message=message
-            )
+            with transaction.atomic():
+                match_request = MatchRequest.objects.create(
+                    challenger=team,
+                    opponent=opponent,
+                    preferred_date=preferred_date,
+                    message=message
+                )
 
-            # Add facility and time slot if provided
-            if preferred_facility_id:
-                match_request.preferred_facility_id = preferred_facility_id
-            if preferred_time_id:
-                match_request.preferred_time_id = preferred_time_id
-            match_request.save()
+                # Add facility and time slot if provided
+                if preferred_facility_id:
+                    match_request.preferred_facility_id = preferred_facility_id
+                if preferred_time_id:
+                    match_request.preferred_time_id = preferred_time_id
+                match_request.save()
 
-            # Send WhatsApp notification
-            if notify_match_request(match_request, 'new_request'):
-                message = f'Match request sent to {opponent.name}! Team captains will be notified via WhatsApp.'
-            else:
-                message = f'Match request sent to {opponent.name}, but there was an issue sending WhatsApp notifications. The admin has been notified.'
+                # Queue the WhatsApp notifications with the request
+                notify_match_request(match_request, 'new_request')
 
             return JsonResponse({
                 'success': True,
-                'message': message
+                'message': f'Match request sent to {opponent.name}! Team captains will be notified via WhatsApp.'
             })
         except Exception as e:
             return JsonResponse({
@@ -338,7 +554,7 @@ def accept_match(request, request_id):
             'message': f'Match request from {match_request.challenger.name} has been accepted! Both team captains will be notified.'
         })
     except Exception as e:
-        print(f"Error accepting match request: {str(e)}")
+        logger.exception('Error accepting match request')
         return JsonResponse({
             'success': False,
             'message': 'An error occurred while accepting the match request.'
@@ -391,13 +607,75 @@ def reject_match(request, request_id):
             'message': 'Invalid request data format'
         })
     except Exception as e:
-        print(f"Error rejecting match request: {str(e)}")
+        logger.exception('Error rejecting match request')
         return JsonResponse({
             'success': False,
             'message': 'An error occurred while rejecting the match request.'
         })
 
 
+@login_required
+def record_result(request, request_id):
+    """Record the final score of an accepted match and update team ratings"""
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'Invalid request method'}, status=405)
+
+    match_request = get_object_or_404(
+        MatchRequest.objects.select_related('challenger', 'opponent'),
+        id=request_id
+    )
+    if request.user not in [match_request.challenger.captain, match_request.opponent.captain] and not request.user.is_admin:
+        return JsonResponse({
+            'success': False,
+            'message': 'Only team captains can record match results'
+        }, status=403)
+
+    try:
+        challenger_score = int(request.POST.get('challenger_score'))
+        opponent_score = int(request.POST.get('opponent_score'))
+        if challenger_score < 0 or opponent_score < 0:
+            raise ValueError
+    except (TypeError, ValueError):
+        return JsonResponse({
+            'success': False,
+            'message': 'Scores must be non-negative numbers'
+        }, status=400)
+
+    try:
+        result = record_match_result(match_request, challenger_score, opponent_score, recorded_by=request.user)
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+
+    return JsonResponse({
+        'success': True,
+        'message': f'Result recorded: {result}',
+        'rating_change': round(result.rating_change, 1)
+    })
+
+
+@read_from_replica
+def leaderboard(request):
+    """
+    Team leaderboard read straight from the indexed Team.rating column, so
+    its cost does not depend on how many results have been recorded.
+    """
+    try:
+        limit, offset = page_params(request.GET)
+    except ValueError:
+        return JsonResponse({'error': 'limit and offset must be numbers'}, status=400)
+
+    teams = Team.objects.filter(matches_played__gt=0).order_by('-rating', 'id').values(
+        'id', 'name', 'slug', 'rating', 'matches_played'
+    )[offset:offset + limit]
+
+    return JsonResponse({
+        'teams': [
+            dict(team, rank=offset + position, rating=round(team['rating'], 1))
+            for position, team in enumerate(teams, start=1)
+        ]
+    })
+
+
 @login_required
 def get_match_requests(request):
     user_teams = Team.objects.filter(
@@ -405,12 +683,17 @@ def get_match_requests(request):
         Q(vice_captain=request.user)
     )
 
-    received_requests = MatchRequest.objects.filter(
+    # The template shows the other team, facility and time of each request
+    match_requests = MatchRequest.objects.select_related(
+        'challenger', 'opponent', 'preferred_facility', 'preferred_time'
+    )
+
+    received_requests = match_requests.filter(
         opponent__in=user_teams,
         status='pending'
     )
 
-    sent_requests = MatchRequest.objects.filter(
+    sent_requests = match_requests.filter(
         challenger__in=user_teams
     )
 
@@ -445,13 +728,11 @@ def reschedule_match(request, request_id):
         match_request.message = f"Rescheduled - {reason}"
         match_request.last_updated = timezone.now()
         match_request.status = 'pending'  # Reset to pending for re-approval
-        match_request.save()
-        
-        # Send WhatsApp notification
-        if notify_match_request(match_request, 'rescheduled'):
-            messages.success(request, "Match has been rescheduled and is pending approval. Team captains have been notified via WhatsApp.")
-        else:
-            messages.warning(request, "Match has been rescheduled but there was an issue sending WhatsApp notifications. The admin has been notified.")
+        with transaction.atomic():
+            match_request.save()
+            # Queue the WhatsApp notifications with the change
+            notify_match_request(match_request, 'rescheduled')
+        messages.success(request, "Match has been rescheduled and is pending approval. Team captains will be notified via WhatsApp.")
         
         return redirect('sport_teams:team_detail', slug=team.slug)
     
@@ -76,6 +76,53 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     }
 
+    // Suggest slots where both teams are available and a facility is free
+    const suggestSlotsBtn = document.getElementById('suggestSlotsBtn');
+    const suggestedSlots = document.getElementById('suggestedSlots');
+    const opponentSelect = document.getElementById('opponent');
+
+    if (suggestSlotsBtn && suggestedSlots && opponentSelect) {
+        suggestSlotsBtn.addEventListener('click', function() {
+            if (!opponentSelect.value) {
+                showToast('Select an opponent team first', 'error');
+                return;
+            }
+
+            const teamId = callMatchForm.querySelector('[name=team_id]').value;
+            fetch(`${this.dataset.url}?team_id=${teamId}&opponent_id=${opponentSelect.value}`)
+                .then(response => response.json())
+                .then(data => {
+                    suggestedSlots.innerHTML = '';
+                    if (!data.success) {
+                        throw new Error(data.message);
+                    }
+                    if (!data.slots.length) {
+                        suggestedSlots.innerHTML = `<div class="text-muted small">${data.message}</div>`;
+                        return;
+                    }
+                    data.slots.forEach(slot => {
+                        const item = document.createElement('button');
+                        item.type = 'button';
+                        item.className = 'list-group-item list-group-item-action';
+                        item.textContent = `${slot.date} · ${slot.display_time} · ${slot.facility_name} (${slot.sport_name})`;
+                        item.addEventListener('click', function() {
+                            dateInput.value = slot.date;
+                            facilitySelect.value = slot.facility_id;
+                            timeSlotSelect.disabled = false;
+                            timeSlotSelect.value = slot.time_slot_id;
+                            suggestedSlots.querySelectorAll('.active').forEach(el => el.classList.remove('active'));
+                            this.classList.add('active');
+                        });
+                        suggestedSlots.appendChild(item);
+                    });
+                })
+                .catch(error => {
+                    console.error('Error fetching suggested slots:', error);
+                    showToast('Error: ' + error.message, 'error');
+                });
+        });
+    }
+
     // Fetch available time slots
     function fetchTimeSlots() {
         const facilityId = facilitySelect.value;
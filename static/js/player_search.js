@@ -1,3 +1,6 @@
+// Minimum number of digits typed before the typeahead search runs
+const MIN_SEARCH_DIGITS = 4;
+
 // Debounce function to limit how often the search is performed
 function debounce(func, wait) {
     let timeout;
@@ -40,16 +43,15 @@ function searchPlayer(phoneNumber) {
         return;
     }
 
-    // Only search if we have exactly 10 digits
-    if (phoneNumber.replace(/\D/g, '').length !== 10) {
-        if (phoneNumber.length > 0) {
-            playerDetails.innerHTML = `
-                <div class="alert alert-info mt-3 mb-0">
-                    <i class="fas fa-info-circle me-2"></i>
-                    Please enter a valid 10-digit phone number
-                </div>
-            `;
-        }
+    // Start searching once there are enough digits for a useful prefix match;
+    // the server normalizes '+91 98...', '98...' and '098...' to the same number
+    if (phoneNumber.replace(/\D/g, '').length < MIN_SEARCH_DIGITS) {
+        playerDetails.innerHTML = `
+            <div class="alert alert-info mt-3 mb-0">
+                <i class="fas fa-info-circle me-2"></i>
+                Keep typing the phone number to search for players
+            </div>
+        `;
         return;
     }
 
@@ -90,6 +90,42 @@ function formatSlot(slot, date) {
     return html;
 }
 
+// Expand a v2 (columnar) slots response into one object per slot and sport,
+// the shape formatSlot() takes. See bookings/api_v2.py for the format.
+function expandSlots(data) {
+    const slots = [];
+    const sports = data.sports;
+    const discount = data.offers.length ? Number(data.offers[0].discount_percentage) : 0;
+    data.slots.id.forEach((slotId, i) => {
+        const common = {
+            start_time: data.slots.start[i],
+            end_time: data.slots.end[i],
+            display_time: data.slots.display[i],
+            is_past: i < data.past
+        };
+        if (data.lunch.includes(i)) {
+            slots.push({ ...common, id: `lunch_${slotId}`, is_lunch: true, is_available: false });
+            return;
+        }
+        sports.id.forEach((sportId, j) => {
+            const isBooked = data.booked[i][j] === '1';
+            slots.push({
+                ...common,
+                id: `${data.date}_${slotId}_${sportId}`,
+                facility_sport_id: sportId,
+                sport_name: sports.name[j],
+                price: sports.price[j],
+                discounted_price: sports.discounted_price ? sports.discounted_price[j] : undefined,
+                discount_percentage: discount,
+                is_lunch: false,
+                is_booked: isBooked,
+                is_available: !common.is_past && !isBooked
+            });
+        });
+    });
+    return slots;
+}
+
 // Function to load slots for a date
 function loadSlots(date, facilityId = null) {
     const slotsContainer = document.querySelector('#slots-container');
@@ -102,7 +138,7 @@ function loadSlots(date, facilityId = null) {
     slotsContainer.classList.add('loading');
     trackUiUpdate(slotsContainer, 'add-loading');
     
-    let url = '/bookings/get-slots/';
+    let url = '/bookings/api/v2/slots/';
     const params = new URLSearchParams();
     params.append('date', date);
     
@@ -144,12 +180,13 @@ function loadSlots(date, facilityId = null) {
                 throw new Error(data.error);
             }
             
-            if (!Array.isArray(data.slots)) {
+            if (data.version !== 2 || !data.slots || !Array.isArray(data.slots.id)) {
                 DEBUG.error('Invalid slots data format', data);
                 throw new Error('Invalid data format received from server');
             }
             
-            if (data.slots.length === 0) {
+            const slots = expandSlots(data);
+            if (slots.length === 0) {
                 DEBUG.info('No slots available', { date, facilityId: selectedFacility });
                 slotsContainer.innerHTML = `
                     <div class="text-center p-5">
@@ -159,8 +196,8 @@ function loadSlots(date, facilityId = null) {
                 return;
             }
             
-            DEBUG.info(`Processing ${data.slots.length} slots`);
-            const slotsHtml = data.slots.map(slot => {
+            DEBUG.info(`Processing ${slots.length} slots`);
+            const slotsHtml = slots.map(slot => {
                 trackSlotOperation('format', slot);
                 return formatSlot(slot, date);
             }).join('');
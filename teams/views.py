@@ -1,6 +1,6 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
-from django.http import JsonResponse
+from turfzone.fastjson import JsonResponse
 from django.utils import timezone
 from django.db.models import Q
 from .models import Team, TeamMember
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class TurfzoneConfig(AppConfig):
+    name = 'turfzone'
+
+    def ready(self):
+        from .slow_queries import install
+        connection_created.connect(install, dispatch_uid='turfzone_slow_queries')
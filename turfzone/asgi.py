@@ -3,6 +3,14 @@ ASGI config for turfzone project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Run it with uvicorn, e.g.
+
+    uvicorn turfzone.asgi:application --host 0.0.0.0 --port 8000 --workers 4
+
+Slot availability, the activity feed and payment status are async views, so
+a request waiting on the database or long-polling for a payment doesn't hold
+a thread. The remaining views are sync and run in Django's thread pool.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +21,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'turfzone.settings')
 
+# Under ASGI each request's queries run on a different thread, so persistent
+# connections would pile up one per thread instead of being reused
+os.environ.setdefault('TURFZONE_DB_CONN_MAX_AGE', '0')
+
 application = get_asgi_application()
@@ -0,0 +1,99 @@
+"""
+Batch API: several GETs to the JSON endpoints in one round trip.
+
+    GET /api/batch/?url=/bookings/api/v2/slots/%3Ffacility_id%3D1%26date%3D2025-06-01&url=/bookings/api/weather/
+
+returns the responses in the order the URLs were given:
+
+    {"responses": [{"status": 200, "body": {...}}, {"status": 200, "body": {...}}]}
+
+Each URL must resolve to a view named in settings.BATCH_VIEWS. Sub-requests
+go straight to their views with the batch request's user, session and
+headers, so authentication and the middleware run once for the whole batch.
+They run one after another, and sync views all run on the same thread, so
+the batch shares one database connection. A failed sub-request only sets
+its own status; the batch fails only if it is malformed.
+"""
+import logging
+import orjson
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.views.decorators.http import require_GET
+from .fastjson import JsonResponse
+
+logger = logging.getLogger(__name__)
+
+# Headers that describe the batch request itself rather than its parts
+_BATCH_ONLY_META = ('QUERY_STRING', 'PATH_INFO', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+def _sub_request(request, user, url):
+    path, _, query = url.partition('?')
+    sub_request = HttpRequest()
+    sub_request.method = 'GET'
+    sub_request.path = sub_request.path_info = path
+    sub_request.META = {key: value for key, value in request.META.items() if key not in _BATCH_ONLY_META}
+    sub_request.META.update(REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query)
+    sub_request.GET = QueryDict(query)
+    sub_request.COOKIES = request.COOKIES
+    sub_request._get_scheme = request._get_scheme
+    sub_request.session = request.session
+    sub_request.user = user
+
+    async def auser():
+        return user
+    sub_request.auser = auser
+    return sub_request
+
+
+def _body(response):
+    content = response.content
+    if response.get('Content-Type', '').startswith('application/json'):
+        return orjson.loads(content) if content else None
+    return content.decode(response.charset or 'utf-8', errors='replace')
+
+
+async def _run(request, user, url):
+    if not url.startswith('/'):
+        return {'status': 400, 'body': {'error': 'Expected a path starting with /'}}
+    try:
+        match = resolve(url.partition('?')[0])
+    except Resolver404:
+        return {'status': 404, 'body': {'error': 'Not found'}}
+    if match.view_name not in settings.BATCH_VIEWS:
+        return {'status': 403, 'body': {'error': f'{match.view_name} is not available in a batch'}}
+
+    sub_request = _sub_request(request, user, url)
+    sub_request.resolver_match = match
+    try:
+        if iscoroutinefunction(match.func):
+            response = await match.func(sub_request, *match.args, **match.kwargs)
+        else:
+            response = await sync_to_async(match.func)(sub_request, *match.args, **match.kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response = await sync_to_async(response.render)()
+    except Http404:
+        return {'status': 404, 'body': {'error': 'Not found'}}
+    except PermissionDenied:
+        return {'status': 403, 'body': {'error': 'Permission denied'}}
+    except Exception:
+        logger.exception('Batch sub-request %s failed', url, extra={'url': url})
+        return {'status': 500, 'body': {'error': 'Internal server error'}}
+    return {'status': response.status_code, 'body': _body(response)}
+
+
+@require_GET
+async def batch(request):
+    """Run the GET requests listed in the url parameters and return all their responses"""
+    urls = request.GET.getlist('url')
+    if not urls:
+        return JsonResponse({'error': 'At least one url parameter is required'}, status=400)
+    if len(urls) > settings.BATCH_MAX_REQUESTS:
+        return JsonResponse({'error': f'At most {settings.BATCH_MAX_REQUESTS} requests per batch'}, status=400)
+
+    user = await request.auser()
+    responses = [await _run(request, user, url) for url in urls]
+    return JsonResponse({'responses': responses})
@@ -0,0 +1,65 @@
+"""
+Conditional GET support: ETags computed from cheap validators.
+
+A view's ETag comes from one aggregate query over the rows its response
+shows (their latest updated_at and a count, which catches deletions a
+timestamp alone would miss). It is computed before the view does any real
+work, so when the client's If-None-Match still matches, Django answers 304
+without rendering a template or serializing anything. Sync views use
+django.views.decorators.http.etag(); async views call
+django.utils.cache.get_conditional_response() themselves, as the decorator
+runs its ETag function synchronously.
+
+Facility.updated_at is the version of everything shown with a facility:
+facilities.signals touches it when the facility's sports, offers, images,
+reviews or replies change, so facility pages validate on a single row.
+
+Only ETags are sent, not Last-Modified: a deleted row leaves the latest
+timestamp where it was.
+"""
+import hashlib
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Count, Max
+
+
+def make_etag(*parts):
+    """Strong ETag over the parts and settings.ETAG_RELEASE"""
+    key = repr((settings.ETAG_RELEASE,) + parts)
+    return '"%s"' % hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+
+def api_etag(request, *parts):
+    """ETag for an API response, which varies with the query string and the requested format"""
+    return make_etag(request.get_full_path(), request.META.get('HTTP_ACCEPT'), *parts)
+
+
+def page_etag(request, *parts):
+    """
+    ETag for an HTML page. The navbar shows the user, so they are part of the
+    tag. With flash messages waiting there is no tag, so the page is rendered
+    and shows them.
+    """
+    if len(get_messages(request)):
+        return None
+    return make_etag(request.get_full_path(), request.user.pk, *parts)
+
+
+def _marker_aggregates(related):
+    aggregates = {'changed': Max('updated_at'), 'count': Count('pk', distinct=bool(related))}
+    for name in related:
+        aggregates[f'{name}_changed'] = Max(f'{name}__updated_at')
+        aggregates[f'{name}_count'] = Count(name, distinct=True)
+    return aggregates
+
+
+def change_marker(queryset, *related):
+    """
+    Latest updated_at and row count of the queryset, and of the related rows
+    named in related, from a single aggregate query
+    """
+    return tuple(sorted(queryset.order_by().aggregate(**_marker_aggregates(related)).items()))
+
+
+async def achange_marker(queryset, *related):
+    return tuple(sorted((await queryset.order_by().aaggregate(**_marker_aggregates(related))).items()))
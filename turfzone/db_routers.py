@@ -0,0 +1,204 @@
+"""
+Database routing for the optional read replica and booking partitions.
+
+Views opt in to replica reads either with the read_from_replica decorator /
+ReplicaReadMixin or by listing their URL name in DATABASE_REPLICA_VIEWS.
+ReplicaMiddleware marks each request, and ReplicaRouter sends that
+request's reads to the 'replica' alias. Writes always go to 'default'. After
+a client writes, it is pinned to the primary for
+DATABASE_REPLICA_STICKY_SECONDS (via a cookie) so it reads its own writes.
+
+BookingPartitionRouter keeps bookings, live activities and payments in the
+facility partition chosen by bookings.partitioning; see that module.
+"""
+import time
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from bookings.partitioning import PARTITIONED_MODELS, partition_for_instance
+
+REPLICA_DB_ALIAS = 'replica'
+PIN_COOKIE_NAME = 'db_pin'
+
+# Apps whose rows must always be read from the primary, e.g. a session
+# created by login must be visible on the very next request, and job
+# states are claimed and updated there
+PRIMARY_ONLY_APPS = {'sessions', 'contenttypes', 'jobs'}
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ReplicaState:
+    __slots__ = ('use_replica', 'wrote')
+
+    def __init__(self):
+        self.use_replica = False
+        self.wrote = False
+
+
+_replica_state = ContextVar('replica_state', default=None)
+
+
+def replica_configured():
+    return REPLICA_DB_ALIAS in settings.DATABASES
+
+
+def read_from_replica(view_func):
+    """Mark a function view as safe to serve reads from the replica"""
+    view_func.read_from_replica = True
+    return view_func
+
+
+class ReplicaReadMixin:
+    """Mark a class-based view or viewset as safe to serve reads from the replica"""
+    read_from_replica = True
+
+
+def _view_reads_from_replica(view_func):
+    # as_view() wrappers keep the class on view_class (Django) or cls (DRF)
+    view_class = getattr(view_func, 'view_class', None) or getattr(view_func, 'cls', None)
+    return (
+        getattr(view_func, 'read_from_replica', False)
+        or getattr(view_class, 'read_from_replica', False)
+    )
+
+
+class ReplicaMiddleware:
+    """Decide per request whether reads may go to the replica"""
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = ReplicaState()
+        token = _replica_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _replica_state.reset(token)
+        return self.finish(response, state)
+
+    async def __acall__(self, request):
+        # The state is shared with the view's sync_to_async thread, which
+        # runs in a copy of this context
+        state = ReplicaState()
+        token = _replica_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _replica_state.reset(token)
+        return self.finish(response, state)
+
+    def finish(self, response, state):
+        if state.wrote and replica_configured():
+            sticky_seconds = settings.DATABASE_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                PIN_COOKIE_NAME,
+                str(int(time.time()) + sticky_seconds),
+                max_age=sticky_seconds,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _replica_state.get()
+        if state is None or not replica_configured() or request.method not in SAFE_METHODS:
+            return None
+
+        url_name = request.resolver_match.url_name if request.resolver_match else None
+        if not (_view_reads_from_replica(view_func) or url_name in settings.DATABASE_REPLICA_VIEWS):
+            return None
+
+        # Read-your-writes: stay on the primary for a while after this
+        # client's last write
+        try:
+            pinned_until = int(request.COOKIES.get(PIN_COOKIE_NAME, 0))
+        except ValueError:
+            pinned_until = 0
+        state.use_replica = pinned_until <= time.time()
+        return None
+
+
+class BookingPartitionRouter:
+    def _route(self, model, hints):
+        partitions = settings.BOOKING_PARTITION_ALIASES
+        if not partitions:
+            return None
+
+        instance = hints.get('instance')
+        instance_db = instance._state.db if instance is not None else None
+        if model._meta.label_lower not in PARTITIONED_MODELS:
+            # Shared rows only exist on the primary, even when reached from
+            # a partitioned row (Django would otherwise reuse its database)
+            return DEFAULT_DB_ALIAS if instance_db in partitions else None
+
+        if instance_db in partitions:
+            return instance_db
+        if instance is not None and instance._meta.label_lower in PARTITIONED_MODELS:
+            return partition_for_instance(instance)
+        # No facility to go by: callers must pick partitions explicitly
+        return None
+
+    def db_for_read(self, model, **hints):
+        return self._route(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._route(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Partitioned rows reference shared rows on the primary by id
+        partitions = settings.BOOKING_PARTITION_ALIASES
+        if obj1._state.db in partitions or obj2._state.db in partitions:
+            return True
+        return None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _replica_state.get()
+        if (
+            state is not None
+            and state.use_replica
+            and model._meta.app_label not in PRIMARY_ONLY_APPS
+            # Reads inside a transaction must see that transaction's writes
+            and not connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return REPLICA_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        state = _replica_state.get()
+        if state is not None:
+            state.wrote = True
+            # Anything read later in this request must see the write
+            state.use_replica = False
+        # Writes never go to the replica. An instance loaded from it would
+        # otherwise be saved back there, as Django falls back to the
+        # instance's own database; any other alias it came from is kept
+        instance = hints.get('instance')
+        db = instance._state.db if instance is not None else None
+        if db is not None and db != REPLICA_DB_ALIAS:
+            return db
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data, so relations across the two are fine
+        databases = {DEFAULT_DB_ALIAS, REPLICA_DB_ALIAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica is a copy of the primary, never migrated directly
+        if db == REPLICA_DB_ALIAS:
+            return False
+        return None
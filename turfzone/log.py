@@ -0,0 +1,134 @@
+"""
+Logging set-up: JSON lines, per-logger sampling and a background writer.
+
+settings.LOGGING_CONFIG points Django at configure(). After the usual
+dictConfig it replaces the root logger's handlers with one QueueHandler and
+hands the real handlers to a QueueListener thread. A request thread only
+builds the record and puts it on the queue; formatting to JSON and writing
+happen on the listener thread. Project loggers have no handlers of their
+own and propagate to the root, so all of them go through the queue.
+
+Log with %-style arguments (logger.info('booking %s saved', booking.id)),
+not f-strings, so nothing is formatted for records that are filtered out,
+and put fields worth searching on in extra={...}. They become keys in the
+JSON object.
+
+LOG_SAMPLE_RATES keeps only a fraction of a chatty logger's records below
+WARNING. Warnings and errors are always kept.
+"""
+import atexit
+import json
+import logging
+import logging.config
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from django.conf import settings
+
+# Attributes every LogRecord has; anything else on a record came from extra
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the extra={...} fields as keys"""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep a fraction of the records below WARNING from the loggers in rates
+    ({logger name: fraction}); the longest matching name applies.
+    """
+
+    def __init__(self, rates=None):
+        super().__init__()
+        self.rates = sorted((rates or {}).items(), key=lambda item: len(item[0]), reverse=True)
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        for name, rate in self.rates:
+            if record.name == name or record.name.startswith(name + '.'):
+                return rate >= 1 or random.random() < rate
+        return True
+
+
+class QueueHandler(logging.handlers.QueueHandler):
+    """
+    Render the message and traceback text before queueing, as the record's
+    arguments may not be safe to use from another thread, but leave the
+    rest of the record as it is for the listener's formatter.
+    """
+
+    def prepare(self, record):
+        record.message = record.getMessage()
+        record.msg = record.message
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure(config):
+    """LOGGING_CONFIG callable: dictConfig, then move the root handlers behind a queue"""
+    global _listener
+    logging.config.dictConfig(config)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    root = logging.getLogger()
+    handlers = [handler for handler in root.handlers if not isinstance(handler, QueueHandler)]
+    if not handlers:
+        return
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+    for handler in handlers:
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+@atexit.register
+def _stop_listener():
+    # Write out whatever is still queued
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener():
+    # A forked process (run_workers --processes) inherits the queue but not
+    # the listener thread, so nothing would write its records out
+    global _listener
+    if _listener is not None:
+        _listener = logging.handlers.QueueListener(
+            _listener.queue, *_listener.handlers, respect_handler_level=_listener.respect_handler_level
+        )
+        _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_listener)
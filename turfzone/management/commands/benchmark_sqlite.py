@@ -0,0 +1,179 @@
+import shutil
+import tempfile
+import threading
+import time
+from copy import deepcopy
+from datetime import date, time as dtime, timedelta
+from pathlib import Path
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from accounts.models import User
+from bookings.models import Booking
+from facilities.models import Facility, FacilitySport, SportType, TimeSlot
+
+# Statuses the booking and availability views check
+BLOCKING_STATUSES = ['initiated', 'payment_pending', 'confirmed']
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))] if values else 0
+
+
+class Command(BaseCommand):
+    help = 'Compare the stock SQLite settings with the tuned production profile on booking and availability queries'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--reads', type=int, default=2000, help='Availability lookups per read phase')
+        parser.add_argument('--writers', type=int, default=8, help='Concurrent booking threads')
+        parser.add_argument('--bookings', type=int, default=50, help='Bookings created by each writer')
+        parser.add_argument('--readers', type=int, default=4, help='Availability threads running alongside the writers')
+
+    def handle(self, *args, **options):
+        stock = {'ENGINE': 'django.db.backends.sqlite3', 'CONN_MAX_AGE': 0, 'OPTIONS': {}}
+        profiles = [('stock', stock), ('tuned', settings.SQLITE_DATABASE)]
+
+        workdir = Path(tempfile.mkdtemp(prefix='turfzone-bench-'))
+        try:
+            for name, profile in profiles:
+                alias = f'benchmark_{name}'
+                self.add_database(alias, {**deepcopy(profile), 'NAME': workdir / f'{name}.sqlite3'})
+                try:
+                    self.run_profile(name, alias, options)
+                finally:
+                    connections[alias].close()
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def add_database(self, alias, database):
+        configured = connections.configure_settings({
+            DEFAULT_DB_ALIAS: deepcopy(settings.DATABASES[DEFAULT_DB_ALIAS]),
+            alias: database,
+        })
+        connections.settings[alias] = configured[alias]
+
+    def run_profile(self, name, alias, options):
+        call_command('migrate', database=alias, verbosity=0)
+        facility_sport, time_slots, user = self.seed(alias)
+        facility_sport_ids = [facility_sport.id]
+        start_date = date.today() + timedelta(days=1)
+
+        def availability(day):
+            """What the slot endpoints run per request"""
+            booked = set(Booking.objects.using(alias).filter(
+                facility_sport_id__in=facility_sport_ids,
+                date=day,
+                status__in=BLOCKING_STATUSES
+            ).values_list('time_slot_id', flat=True))
+            return [slot.id for slot in TimeSlot.objects.using(alias).all() if slot.id not in booked]
+
+        def end_request():
+            # What request_finished does: close unless CONN_MAX_AGE allows reuse
+            connections[alias].close_if_unusable_or_obsolete()
+
+        # Availability on its own
+        read_timings = []
+        for index in range(options['reads']):
+            started = time.perf_counter()
+            availability(start_date + timedelta(days=index % 30))
+            end_request()
+            read_timings.append(time.perf_counter() - started)
+
+        # Concurrent booking writers, with availability readers alongside
+        results = {'booked': 0, 'locked': 0, 'write_timings': [], 'read_timings': []}
+        lock = threading.Lock()
+        stop_readers = threading.Event()
+
+        def writer(worker):
+            try:
+                for index in range(options['bookings']):
+                    # Each booking takes its own slot, so every failure is lock contention
+                    day = start_date + timedelta(days=worker * options['bookings'] + index)
+                    started = time.perf_counter()
+                    try:
+                        # Same check-then-insert as BookingCreateView
+                        with transaction.atomic(using=alias):
+                            taken = Booking.objects.using(alias).filter(
+                                facility_sport=facility_sport,
+                                date=day,
+                                time_slot=time_slots[0],
+                                status__in=BLOCKING_STATUSES
+                            ).exists()
+                            if not taken:
+                                Booking(
+                                    user=user,
+                                    facility_sport=facility_sport,
+                                    date=day,
+                                    time_slot=time_slots[0],
+                                    base_price=100,
+                                    total_price=100
+                                ).save(using=alias)
+                        outcome = 'booked'
+                    except OperationalError:
+                        outcome = 'locked'
+                    end_request()
+                    with lock:
+                        results[outcome] += 1
+                        results['write_timings'].append(time.perf_counter() - started)
+            finally:
+                connections[alias].close()
+
+        def reader(worker):
+            try:
+                index = 0
+                while not stop_readers.is_set():
+                    started = time.perf_counter()
+                    try:
+                        availability(start_date + timedelta(days=(worker + index) % 30))
+                    except OperationalError:
+                        pass
+                    end_request()
+                    with lock:
+                        results['read_timings'].append(time.perf_counter() - started)
+                    index += 1
+            finally:
+                connections[alias].close()
+
+        writers = [threading.Thread(target=writer, args=(worker,)) for worker in range(options['writers'])]
+        readers = [threading.Thread(target=reader, args=(worker,)) for worker in range(options['readers'])]
+        started = time.perf_counter()
+        for thread in writers + readers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+        write_elapsed = time.perf_counter() - started
+        stop_readers.set()
+        for thread in readers:
+            thread.join()
+
+        attempts = results['booked'] + results['locked']
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{name} profile'))
+        self.stdout.write(
+            f"  availability: {len(read_timings)} requests, mean {sum(read_timings) / len(read_timings) * 1000:.2f} ms, "
+            f"p95 {percentile(read_timings, 0.95) * 1000:.2f} ms"
+        )
+        self.stdout.write(
+            f"  booking: {results['booked']}/{attempts} booked, {results['locked']} 'database is locked', "
+            f"{results['booked'] / write_elapsed:.0f} bookings/s, p95 {percentile(results['write_timings'], 0.95) * 1000:.1f} ms"
+        )
+        self.stdout.write(
+            f"  availability during writes: {len(results['read_timings'])} requests, "
+            f"p95 {percentile(results['read_timings'], 0.95) * 1000:.2f} ms"
+        )
+
+    def seed(self, alias):
+        user = User.objects.db_manager(alias).create_user('benchmark', password=None)
+        sport = SportType.objects.using(alias).create(name='Cricket')
+        facility = Facility.objects.using(alias).create(name='Benchmark Turf')
+        facility_sport = FacilitySport.objects.using(alias).create(facility=facility, sport=sport, price_per_slot=100)
+        time_slots = [
+            TimeSlot.objects.using(alias).create(
+                slot_time=f'{hour:02d}:00-{hour + 2:02d}:00',
+                start_time=dtime(hour, 0),
+                end_time=dtime(hour + 2, 0)
+            )
+            for hour in range(6, 22, 2)
+        ]
+        return facility_sport, time_slots, user
@@ -0,0 +1,48 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from turfzone.synthetic_data import LoadDataGenerator
+
+
+class Command(BaseCommand):
+    help = 'Generate seeded, production-sized users, facilities, bookings, payments, reviews, teams and match requests'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=5000)
+        parser.add_argument('--facilities', type=int, default=24)
+        parser.add_argument('--bookings', type=int, default=1000000)
+        parser.add_argument('--teams', type=int, default=400)
+        parser.add_argument('--match-requests', type=int, default=5000)
+        parser.add_argument('--occupancy', type=float, default=0.55,
+                            help='Average share of slots booked; sets how many days of history there are')
+        parser.add_argument('--future-days', type=int, default=14, help='Days of upcoming bookings')
+        parser.add_argument('--review-rate', type=float, default=0.15, help='Share of completed bookings reviewed')
+        parser.add_argument('--password', help='Password for the generated users (default: unusable)')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if not 0 < options['occupancy'] <= 1:
+            raise CommandError('--occupancy must be between 0 and 1')
+        if options['users'] < 1:
+            raise CommandError('--users must be at least 1')
+
+        started = time.perf_counter()
+        generator = LoadDataGenerator(
+            users=options['users'],
+            facilities=options['facilities'],
+            bookings=options['bookings'],
+            teams=options['teams'],
+            match_requests=options['match_requests'],
+            occupancy=options['occupancy'],
+            future_days=options['future_days'],
+            review_rate=options['review_rate'],
+            seed=options['seed'],
+            password=options['password'],
+            batch_size=options['batch_size'],
+            log=lambda message: self.stdout.write(f'  {message} ({time.perf_counter() - started:.1f}s)'),
+        )
+        try:
+            generator.run()
+        except ValueError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'Load data generated in {time.perf_counter() - started:.1f}s'))
@@ -0,0 +1,111 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# What each target imports in a fresh interpreter. 'server' is what a web
+# worker loads before it can answer its first request; 'command' is the
+# start-up cost every manage.py command pays.
+TARGETS = {
+    'server': (
+        'import importlib; from django.conf import settings; '
+        'importlib.import_module(settings.ASGI_APPLICATION.rsplit(".", 1)[0]); '
+        'from django.urls import get_resolver; get_resolver().url_patterns'
+    ),
+    'command': 'import django; django.setup()',
+}
+
+
+def parse_importtime(output):
+    """
+    Parse python -X importtime output into {module: (self_us, cumulative_us)}
+    and the total time spent importing, in microseconds.
+    """
+    modules = {}
+    total = 0
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        cumulative_us = int(cumulative_us)
+        modules[name.strip()] = (int(self_us), cumulative_us)
+        # Top-level imports are indented by one space; nested ones by more
+        if len(name) - len(name.lstrip()) == 1:
+            total += cumulative_us
+    return modules, total
+
+
+class Command(BaseCommand):
+    help = 'Report import time per module for a cold start (a digest of python -X importtime)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=sorted(TARGETS), default='server',
+                            help='server: ASGI application and URLconf; command: django.setup() only')
+        parser.add_argument('--repeat', type=int, default=5, help='Fresh interpreters to time; medians are reported')
+        parser.add_argument('--limit', type=int, default=25, help='Rows to show per table')
+        parser.add_argument('--budget-ms', type=float, default=None,
+                            help="Fail if the total is over this (default: the target's STARTUP_IMPORT_BUDGET_MS)")
+        parser.add_argument('--output', help='Write the per-module medians as JSON to this file')
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+        runs = [self.run_target(options['target']) for _ in range(options['repeat'])]
+
+        total_ms = statistics.median(total for _, total in runs) / 1000
+        names = set.intersection(*(set(modules) for modules, _ in runs))
+        modules = {
+            name: (
+                statistics.median(run[name][0] for run, _ in runs) / 1000,
+                statistics.median(run[name][1] for run, _ in runs) / 1000,
+            )
+            for name in names
+        }
+
+        packages = {}
+        for name, (self_ms, _) in modules.items():
+            package = name.split('.')[0]
+            packages[package] = packages.get(package, 0) + self_ms
+
+        limit = options['limit']
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f"Import time for '{options['target']}': {total_ms:.1f} ms (median of {len(runs)} runs)"
+        ))
+        self.stdout.write('\nBy top-level package (self time):')
+        for package, self_ms in sorted(packages.items(), key=lambda item: item[1], reverse=True)[:limit]:
+            self.stdout.write(f'  {self_ms:8.1f} ms  {package}')
+        self.stdout.write('\nBy module (cumulative time, includes what it imports):')
+        self.stdout.write(f"  {'cumulative':>10}  {'self':>8}  module")
+        for name, (self_ms, cumulative_ms) in sorted(modules.items(), key=lambda item: item[1][1], reverse=True)[:limit]:
+            self.stdout.write(f'  {cumulative_ms:7.1f} ms  {self_ms:5.1f} ms  {name}')
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump({
+                    'target': options['target'],
+                    'total_ms': total_ms,
+                    'modules': {name: {'self_ms': self_ms, 'cumulative_ms': cumulative_ms}
+                                for name, (self_ms, cumulative_ms) in sorted(modules.items())},
+                }, output_file, indent=2)
+            self.stdout.write(f"\nResults written to {options['output']}")
+
+        budget_ms = options['budget_ms']
+        if budget_ms is None:
+            budget_ms = settings.STARTUP_IMPORT_BUDGET_MS.get(options['target'], 0)
+        if budget_ms and total_ms > budget_ms:
+            raise CommandError(f'Start-up imports take {total_ms:.1f} ms, over the {budget_ms:.0f} ms budget')
+        if budget_ms:
+            self.stdout.write(self.style.SUCCESS(f'\nWithin the {budget_ms:.0f} ms budget'))
+
+    def run_target(self, target):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': settings.SETTINGS_MODULE}
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', TARGETS[target]],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        if result.returncode:
+            raise CommandError(f"Importing the '{target}' target failed:\n{result.stderr[-2000:]}")
+        return parse_importtime(result.stderr)
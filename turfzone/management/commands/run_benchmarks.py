@@ -0,0 +1,292 @@
+import json
+import platform
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from pathlib import Path
+import django
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import Max
+from django.test import RequestFactory
+from django.utils import timezone
+from accounts.models import User
+from accounts.views import admin_dashboard
+from bookings import api as booking_api
+from bookings.models import Booking
+from facilities.models import FacilitySport, Offer, TimeSlot
+from reviews.serializers import ReviewSerializer
+from reviews.views import ReviewViewSet
+from turfzone.synthetic_data import USERNAME_PREFIX, LoadDataGenerator
+from turfzone.views import home
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+FACILITY_COUNT = 10
+
+
+class Command(BaseCommand):
+    help = 'Time the core booking, pricing, dashboard and rendering code paths on generated datasets'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                            help='Comma-separated booking counts to benchmark at')
+        parser.add_argument('--only', help='Comma-separated benchmark names to run')
+        parser.add_argument('--repeat', type=int, default=20, help='Maximum timed runs per benchmark')
+        parser.add_argument('--max-seconds', type=float, default=10.0,
+                            help='Stop repeating a benchmark after this long (it always runs 3 times)')
+        parser.add_argument('--output', help='Write the results as JSON to this file')
+        parser.add_argument('--baseline', help='JSON results from an earlier run to compare against')
+        parser.add_argument('--threshold', type=float, default=0.10,
+                            help='Median change, as a fraction, reported as faster or slower')
+        parser.add_argument('--fail-on-regression', action='store_true',
+                            help='Exit with an error if anything is slower than the baseline')
+        parser.add_argument('--data-dir', help='Keep the generated datasets here and reuse them on later runs')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        if settings.BOOKING_PARTITION_ALIASES:
+            raise CommandError('Run the benchmarks with booking partitioning off')
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError('--sizes must be comma-separated integers')
+        benchmarks = BENCHMARKS
+        if options['only']:
+            names = options['only'].split(',')
+            unknown = set(names) - {name for name, _ in BENCHMARKS}
+            if unknown:
+                raise CommandError(f"Unknown benchmarks: {', '.join(sorted(unknown))}")
+            benchmarks = [(name, function) for name, function in BENCHMARKS if name in names]
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+
+        data_dir = Path(options['data_dir']) if options['data_dir'] else Path(tempfile.mkdtemp(prefix='turfzone-bench-'))
+        data_dir.mkdir(parents=True, exist_ok=True)
+        results = {}
+        try:
+            for size in sizes:
+                path = data_dir / f'bookings-{size}.sqlite3'
+                with use_database(path):
+                    self.prepare_dataset(path, size, options['seed'])
+                    context = BenchmarkContext()
+                    results[str(size)] = {}
+                    for name, function in benchmarks:
+                        timings = self.measure(function, context, options['repeat'], options['max_seconds'])
+                        results[str(size)][name] = summarize(timings)
+                        self.report(size, name, results[str(size)][name], baseline, options['threshold'])
+        finally:
+            if not options['data_dir']:
+                shutil.rmtree(data_dir, ignore_errors=True)
+
+        output = {
+            'meta': {
+                'created_at': timezone.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': connections[DEFAULT_DB_ALIAS].Database.sqlite_version,
+                'repeat': options['repeat'],
+            },
+            'results': results,
+        }
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(output, output_file, indent=2)
+            self.stdout.write(f"Results written to {options['output']}")
+
+        if baseline and options['fail_on_regression']:
+            regressions = [
+                f'{name} at {size}'
+                for size, timings in results.items()
+                for name, summary in timings.items()
+                if compare(summary, baseline, size, name, options['threshold'])[0] == 'slower'
+            ]
+            if regressions:
+                raise CommandError(f"Slower than the baseline: {', '.join(regressions)}")
+
+    def measure(self, function, context, repeat, max_seconds):
+        function(context)  # Warm up caches and connections
+        timings = []
+        started = time.perf_counter()
+        while len(timings) < max(repeat, 1):
+            run_started = time.perf_counter()
+            function(context)
+            timings.append(time.perf_counter() - run_started)
+            if len(timings) >= 3 and time.perf_counter() - started > max_seconds:
+                break
+        return timings
+
+    def report(self, size, name, summary, baseline, threshold):
+        line = f"{size:>9} bookings  {name:<22} median {summary['median_ms']:9.2f} ms  p95 {summary['p95_ms']:9.2f} ms"
+        if baseline:
+            verdict, ratio = compare(summary, baseline, str(size), name, threshold)
+            if verdict:
+                style = {'slower': self.style.ERROR, 'faster': self.style.SUCCESS}.get(verdict, str)
+                line += '  ' + style(f'{verdict} ({ratio:.2f}x baseline)')
+        self.stdout.write(line)
+
+    def prepare_dataset(self, path, size, seed):
+        if path.exists():
+            call_command('migrate', verbosity=0)
+            if Booking.objects.count() == size:
+                self.stdout.write(self.style.MIGRATE_HEADING(f'Reusing the {size}-booking dataset'))
+                return
+            # Left over from an interrupted run; start again
+            connections[DEFAULT_DB_ALIAS].close()
+            for stale in path.parent.glob(f'{path.name}*'):
+                stale.unlink()
+
+        call_command('migrate', verbosity=0)
+        self.stdout.write(self.style.MIGRATE_HEADING(f'Generating {size} bookings'))
+        started = time.perf_counter()
+        LoadDataGenerator(
+            users=max(100, size // 20),
+            facilities=FACILITY_COUNT,
+            bookings=size,
+            teams=max(10, size // 2500),
+            match_requests=max(20, size // 200),
+            seed=seed,
+            log=lambda message: self.stdout.write(f'  {message} ({time.perf_counter() - started:.1f}s)'),
+        ).run()
+        self.stdout.write(f'  done in {time.perf_counter() - started:.1f}s')
+
+
+@contextmanager
+def use_database(path):
+    """Point the default database at another SQLite file, as the test runner does"""
+    connection = connections[DEFAULT_DB_ALIAS]
+    original_name = connection.settings_dict['NAME']
+    connection.close()
+    connection.settings_dict['NAME'] = str(path)
+    try:
+        yield
+    finally:
+        connection.close()
+        connection.settings_dict['NAME'] = original_name
+
+
+def check(response):
+    # Make sure the timings are for the normal path, not an error page
+    if response.status_code != 200:
+        raise CommandError(f'Benchmarked view returned {response.status_code}')
+
+
+class BenchmarkContext:
+    """Objects the benchmarks share, looked up once per dataset"""
+
+    def __init__(self):
+        self.factory = RequestFactory()
+        self.admin = User.objects.get(username=f'{USERNAME_PREFIX}admin')
+        self.player = User.objects.filter(is_admin=False).first()
+        self.facility_sports = list(FacilitySport.objects.select_related('facility', 'sport'))
+        self.time_slots = list(TimeSlot.objects.order_by('start_time'))
+        self.today = date.today()
+        self.last_day = Booking.objects.aggregate(last_day=Max('date'))['last_day']
+        self.rng = random.Random(0)
+
+    async def auser(self):
+        # request.auser() as AuthenticationMiddleware sets it
+        return self.player
+
+    def random_date(self):
+        # A date in the busiest stretch: the last 60 days with bookings
+        return self.last_day - timedelta(days=self.rng.randrange(60))
+
+
+def bench_availability(context):
+    facility_sport = context.rng.choice(context.facility_sports)
+    request = context.factory.get('/bookings/api/slots/', {
+        'date': context.random_date().isoformat(),
+        'facility_id': facility_sport.facility_id,
+    })
+    request.user = context.player
+    request.auser = context.auser
+    # get_slots is an async view; run it the way the ASGI handler would
+    check(async_to_sync(booking_api.get_slots)(request))
+
+
+def bench_booking_pricing(context):
+    # New bookings after the dataset's last day, rolled back afterwards
+    with transaction.atomic():
+        for offset in range(10):
+            Booking(
+                user=context.player,
+                facility_sport=context.rng.choice(context.facility_sports),
+                time_slot=context.time_slots[offset % 2],  # Early bird slots take the offer path
+                date=context.today + timedelta(days=31 + offset),
+            ).save()
+        transaction.set_rollback(True)
+
+
+def bench_offer_resolution(context):
+    # The lookup Booking.save makes
+    for _ in range(10):
+        day = context.random_date()
+        Offer.objects.filter(
+            facility=context.rng.choice(context.facility_sports).facility,
+            start_date__lte=day,
+            end_date__gte=day,
+            is_active=True
+        ).first()
+
+
+def bench_admin_dashboard(context):
+    request = context.factory.get('/accounts/admin/dashboard/')
+    request.user = context.admin
+    check(admin_dashboard(request))
+
+
+def bench_review_serialization(context):
+    # One page of the review API
+    reviews = ReviewViewSet().serializer_queryset().filter(is_approved=True)[:settings.REST_FRAMEWORK['PAGE_SIZE']]
+    ReviewSerializer(reviews, many=True).data
+
+
+def bench_home(context):
+    request = context.factory.get('/')
+    request.user = AnonymousUser()
+    check(home(request))
+
+
+BENCHMARKS = [
+    ('availability', bench_availability),
+    ('booking_pricing', bench_booking_pricing),
+    ('offer_resolution', bench_offer_resolution),
+    ('admin_dashboard', bench_admin_dashboard),
+    ('review_serialization', bench_review_serialization),
+    ('home', bench_home),
+]
+
+
+def summarize(timings):
+    timings = sorted(timings)
+    return {
+        'runs': len(timings),
+        'min_ms': round(timings[0] * 1000, 3),
+        'median_ms': round(statistics.median(timings) * 1000, 3),
+        'mean_ms': round(statistics.fmean(timings) * 1000, 3),
+        'p95_ms': round(timings[min(len(timings) - 1, int(len(timings) * 0.95))] * 1000, 3),
+    }
+
+
+def compare(summary, baseline, size, name, threshold):
+    """('slower' | 'faster' | 'same' | None, median ratio) against the baseline run"""
+    previous = baseline.get('results', {}).get(size, {}).get(name)
+    if not previous or not previous['median_ms']:
+        return None, None
+    ratio = summary['median_ms'] / previous['median_ms']
+    if ratio > 1 + threshold:
+        return 'slower', ratio
+    if ratio < 1 - threshold:
+        return 'faster', ratio
+    return 'same', ratio
@@ -0,0 +1,82 @@
+import json
+import os
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+class Command(BaseCommand):
+    help = 'Report the query shapes in the slow query log that took the most total time'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=10, help='Number of query shapes to show')
+        parser.add_argument('--hours', type=float,
+                            help='Only count queries logged in the last N hours')
+        parser.add_argument('--view', help='Only count queries run by this URL name')
+        parser.add_argument('--file', default=settings.SLOW_QUERY_LOG_FILE,
+                            help='Slow query log to read; its rotated files (.1, .2, ...) are read too')
+        parser.add_argument('--no-plans', action='store_true', help="Leave out the EXPLAIN plans")
+
+    def handle(self, *args, **options):
+        paths = [options['file']] + [f"{options['file']}.{index}" for index in range(1, settings.SLOW_QUERY_LOG_BACKUPS + 1)]
+        paths = [path for path in paths if os.path.exists(path)]
+        if not paths:
+            raise CommandError(f"No slow query log at {options['file']}")
+        since = None
+        if options['hours'] is not None:
+            since = datetime.now(timezone.utc) - timedelta(hours=options['hours'])
+
+        shapes = {}
+        for path in paths:
+            with open(path, encoding='utf-8') as log_file:
+                for line in log_file:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if entry.get('logger') != 'turfzone.slow_sql' or 'fingerprint' not in entry:
+                        continue
+                    if options['view'] and entry.get('view') != options['view']:
+                        continue
+                    logged_at = datetime.fromisoformat(entry['time'])
+                    if since is not None and logged_at < since:
+                        continue
+
+                    shape = shapes.setdefault(entry['fingerprint'], {
+                        'count': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'views': Counter(),
+                        'plan': None, 'plan_time': None,
+                    })
+                    shape['count'] += 1
+                    shape['total_ms'] += entry['sql_ms']
+                    shape['max_ms'] = max(shape['max_ms'], entry['sql_ms'])
+                    shape['views'][entry.get('view') or '-'] += 1
+                    # Keep the newest plan, from whichever file it is in
+                    if entry.get('plan') and (shape['plan_time'] is None or logged_at > shape['plan_time']):
+                        shape['plan'], shape['plan_time'] = entry['plan'], logged_at
+
+        if not shapes:
+            self.stdout.write('No slow queries logged')
+            return
+
+        ranked = sorted(shapes.items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        total_ms = sum(shape['total_ms'] for shape in shapes.values())
+        self.stdout.write(
+            f"{sum(shape['count'] for shape in shapes.values())} slow queries, {len(shapes)} shapes, "
+            f"{total_ms / 1000:.1f} s in total\n"
+        )
+        for rank, (fingerprint, shape) in enumerate(ranked[:options['top']], start=1):
+            share = shape['total_ms'] / total_ms if total_ms else 0
+            self.stdout.write(self.style.WARNING(
+                f"#{rank}  {shape['total_ms']:.1f} ms total ({share:.0%}), "
+                f"{shape['count']} runs, avg {shape['total_ms'] / shape['count']:.1f} ms, "
+                f"max {shape['max_ms']:.1f} ms"
+            ))
+            views = ', '.join(f'{view} ({count})' for view, count in shape['views'].most_common(5))
+            self.stdout.write(f'    views: {views}')
+            self.stdout.write(f'    {fingerprint}')
+            if not options['no_plans']:
+                plan = shape['plan'] or '(no plan captured)'
+                self.stdout.write('    plan:')
+                for line in plan.splitlines():
+                    self.stdout.write(f'      {line}')
+            self.stdout.write('')
@@ -0,0 +1,40 @@
+import sqlite3
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from turfzone.db_routers import REPLICA_DB_ALIAS
+
+class Command(BaseCommand):
+    help = 'Copy the primary SQLite database to the read replica file (for local replica testing)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--interval', type=float, default=0,
+                            help='Keep syncing every N seconds instead of copying once')
+
+    def handle(self, *args, **options):
+        if REPLICA_DB_ALIAS not in settings.DATABASES:
+            raise CommandError('No replica configured. Set TURFZONE_REPLICA_DB first.')
+
+        primary = settings.DATABASES['default']
+        replica = settings.DATABASES[REPLICA_DB_ALIAS]
+        if 'sqlite3' not in primary['ENGINE'] or 'sqlite3' not in replica['ENGINE']:
+            raise CommandError('sync_replica only supports SQLite; use the database\'s own replication otherwise.')
+
+        while True:
+            started = time.perf_counter()
+            # The online backup API gives a consistent snapshot even while
+            # the primary is being written to
+            source = sqlite3.connect(str(primary['NAME']))
+            target = sqlite3.connect(str(replica['NAME']))
+            try:
+                source.backup(target)
+            finally:
+                target.close()
+                source.close()
+            self.stdout.write(self.style.SUCCESS(
+                f"Synced replica in {(time.perf_counter() - started) * 1000:.0f} ms"
+            ))
+
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,405 @@
+"""
+Runtime metrics in the Prometheus text format, served at /metrics.
+
+Metrics live in process memory and each update holds that metric's lock
+only for a couple of arithmetic operations. Under gunicorn, set
+TURFZONE_METRICS_DIR (settings.METRICS_MULTIPROC_DIR). Each worker then
+writes a snapshot of its metrics to <dir>/<pid>.json at most every
+METRICS_FLUSH_SECONDS, and a scrape merges every worker's snapshot:
+- Counters and histograms are summed over all files, including workers that
+  have exited, so totals never go backwards.
+- Gauges are only summed over workers that are still running.
+Empty the directory when the service is redeployed. Values read from the
+database, such as the job queue depth, are the same in every worker; their
+collectors run once per scrape instead (register_collector(per_process=False)).
+
+The endpoint needs "Authorization: Bearer <METRICS_TOKEN>", or a site
+admin's login when no token is set.
+"""
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack, contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from turfzone.middleware import request_connections
+
+# Latency buckets in seconds, tuned for page and API response times
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_registry = {}
+_collectors = []
+_scrape_collectors = []
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry[name] = self
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def snapshot(self):
+        with self._lock:
+            samples = [[list(key), self._copy(value)] for key, value in self._values.items()]
+        return {
+            'kind': self.kind,
+            'help': self.documentation,
+            'labelnames': list(self.labelnames),
+            'samples': samples,
+        }
+
+    def _copy(self, value):
+        return value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            # [per-bucket counts (last one is +Inf), sum, count]
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def _copy(self, value):
+        return [list(value[0]), value[1], value[2]]
+
+    def snapshot(self):
+        data = super().snapshot()
+        data['buckets'] = list(self.buckets)
+        return data
+
+
+def register_collector(collect=None, per_process=True):
+    """
+    Register a callable for values that are cheaper to read on demand than
+    to track, e.g. cache statistics. It yields (name, kind, documentation,
+    labelnames, samples) with samples as [(label_values, value), ...].
+
+    A per-process collector is called whenever a snapshot is taken, and its
+    values are merged over workers like the other metrics. With
+    per_process=False it is only called by the worker serving the scrape,
+    for values that are the same in every process (e.g. database counts).
+    """
+    if collect is None:
+        return lambda collect: register_collector(collect, per_process)
+    (_collectors if per_process else _scrape_collectors).append(collect)
+    return collect
+
+
+def _collected(collectors):
+    snapshot = {}
+    for collect in collectors:
+        for name, kind, documentation, labelnames, samples in collect():
+            data = snapshot.setdefault(name, {
+                'kind': kind,
+                'help': documentation,
+                'labelnames': list(labelnames),
+                'samples': [],
+            })
+            data['samples'].extend([list(labels), value] for labels, value in samples)
+    return snapshot
+
+
+# HTTP and database
+REQUEST_LATENCY = Histogram(
+    'turfzone_http_request_duration_seconds', 'Request latency by URL name', ['view', 'method']
+)
+RESPONSES = Counter('turfzone_http_responses_total', 'Responses by URL name and status code', ['view', 'status'])
+REQUEST_DB_TIME = Histogram(
+    'turfzone_http_request_db_seconds', 'Time spent in SQL per request by URL name', ['view']
+)
+REQUEST_QUERIES = Counter('turfzone_db_queries_total', 'SQL queries executed by URL name', ['view'])
+# Queries over SLOW_QUERY_THRESHOLD_MS (turfzone.slow_queries); view is
+# empty outside requests
+SLOW_QUERIES = Counter('turfzone_db_slow_queries_total', 'Slow SQL queries by URL name', ['view'])
+
+# In-process and HTTP caches by name. Collectors (e.g. the booking
+# partition lookup cache) add their own caches' samples. http_etag counts
+# conditional GETs (If-None-Match): answered 304 is a hit, anything else a
+# miss
+CACHE_HITS = Counter('turfzone_cache_hits_total', 'Lookups served from a cache', ['cache'])
+CACHE_MISSES = Counter('turfzone_cache_misses_total', 'Lookups that missed a cache', ['cache'])
+
+# Booking funnel: initiated -> payment_pending -> confirmed / expired / cancelled
+BOOKING_TRANSITIONS = Counter(
+    'turfzone_booking_transitions_total', 'Bookings entering each status', ['status']
+)
+
+# Sends in progress, in web requests or job workers
+NOTIFICATIONS_IN_FLIGHT = Gauge(
+    'turfzone_notifications_in_flight', 'Notifications currently being sent', ['channel']
+)
+NOTIFICATIONS = Counter('turfzone_notifications_total', 'Notifications sent by channel and result', ['channel', 'result'])
+
+# Single-flight (turfzone.singleflight): leader computed the result, shared
+# means a waiting caller got the leader's, fallback that it computed its own
+SINGLE_FLIGHT = Counter(
+    'turfzone_single_flight_total', 'Coalesced computations by flight and outcome', ['flight', 'outcome']
+)
+
+# Background jobs (jobs.queue): done, retry (failed, will run again) or dead
+JOBS = Counter('turfzone_jobs_total', 'Background jobs run by task and outcome', ['task', 'outcome'])
+JOB_DURATION = Histogram('turfzone_job_duration_seconds', 'Background job run time by task', ['task'])
+
+
+@contextmanager
+def track_notification(channel):
+    """
+    Count a notification send. Set the yielded dict's 'sent' key to False
+    when the send fails without raising.
+    """
+    outcome = {'sent': True}
+    NOTIFICATIONS_IN_FLIGHT.inc(channel=channel)
+    try:
+        yield outcome
+    except Exception:
+        outcome['sent'] = False
+        raise
+    finally:
+        NOTIFICATIONS_IN_FLIGHT.dec(channel=channel)
+        NOTIFICATIONS.inc(channel=channel, result='sent' if outcome['sent'] else 'failed')
+
+
+# Multiprocess support
+
+_last_flush = 0.0
+
+
+def _snapshot():
+    snapshot = {name: metric.snapshot() for name, metric in _registry.items()}
+    for name, data in _collected(_collectors).items():
+        if name in snapshot:
+            snapshot[name]['samples'].extend(data['samples'])
+        else:
+            snapshot[name] = data
+    return snapshot
+
+
+def flush(force=False):
+    """Write this process's snapshot for other workers' scrapes to merge"""
+    global _last_flush
+    directory = settings.METRICS_MULTIPROC_DIR
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - _last_flush < settings.METRICS_FLUSH_SECONDS:
+        return
+    _last_flush = now
+
+    os.makedirs(directory, exist_ok=True)
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'w') as temp_file:
+        json.dump(_snapshot(), temp_file)
+    os.replace(temp_path, os.path.join(directory, f'{os.getpid()}.json'))
+
+
+@atexit.register
+def _flush_at_exit():
+    if settings.configured:
+        flush(force=True)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _merged_snapshots():
+    """This process's live values merged with every other worker's last flush"""
+    snapshots = [_snapshot(), _collected(_scrape_collectors)]
+    directory = settings.METRICS_MULTIPROC_DIR
+    if directory and os.path.isdir(directory):
+        for filename in os.listdir(directory):
+            if not filename.endswith('.json'):
+                continue
+            pid = int(filename[:-5])
+            if pid == os.getpid():
+                continue
+            try:
+                with open(os.path.join(directory, filename)) as snapshot_file:
+                    snapshot = json.load(snapshot_file)
+            except (OSError, ValueError):
+                continue
+            if not _pid_alive(pid):
+                snapshot = {name: data for name, data in snapshot.items() if data['kind'] != 'gauge'}
+            snapshots.append(snapshot)
+
+    merged = {}
+    for snapshot in snapshots:
+        for name, data in snapshot.items():
+            if name not in merged:
+                merged[name] = {**data, 'samples': {}}
+            samples = merged[name]['samples']
+            for labels, value in data['samples']:
+                key = tuple(labels)
+                if data['kind'] == 'histogram':
+                    if key in samples:
+                        current = samples[key]
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                        current[2] += value[2]
+                    else:
+                        samples[key] = [list(value[0]), value[1], value[2]]
+                else:
+                    samples[key] = samples.get(key, 0) + value
+    return merged
+
+
+# Text exposition
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def render():
+    """All metrics in the Prometheus text exposition format (version 0.0.4)"""
+    lines = []
+    for name, data in _merged_snapshots().items():
+        lines.append(f'# HELP {name} {data["help"]}')
+        lines.append(f'# TYPE {name} {data["kind"]}')
+        for key, value in sorted(data['samples'].items()):
+            labels = list(zip(data['labelnames'], key))
+            if data['kind'] == 'histogram':
+                cumulative = 0
+                for bound, count in zip(data['buckets'] + [float('inf')], value[0]):
+                    cumulative += count
+                    bucket_labels = labels + [('le', _format_value(float(bound)))]
+                    lines.append(f'{name}_bucket{_format_labels(bucket_labels)} {cumulative}')
+                lines.append(f'{name}_sum{_format_labels(labels)} {_format_value(value[1])}')
+                lines.append(f'{name}_count{_format_labels(labels)} {value[2]}')
+            else:
+                lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+    return '\n'.join(lines) + '\n'
+
+
+# Request instrumentation
+
+class _QueryTimer:
+    __slots__ = ('count', 'duration')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+
+
+class MetricsMiddleware:
+    """Record latency, status and SQL time for every request, keyed by URL name"""
+
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(timer))
+            response = self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in await request_connections():
+                stack.enter_context(connection.execute_wrapper(timer))
+            response = await self.get_response(request)
+        self.record(request, response, timer, time.perf_counter() - started)
+        return response
+
+    def record(self, request, response, timer, elapsed):
+        match = request.resolver_match
+        view = (match.url_name or match.view_name) if match else 'unresolved'
+        REQUEST_LATENCY.observe(elapsed, view=view, method=request.method)
+        RESPONSES.inc(view=view, status=response.status_code)
+        REQUEST_DB_TIME.observe(timer.duration, view=view)
+        if timer.count:
+            REQUEST_QUERIES.inc(timer.count, view=view)
+        if request.method in ('GET', 'HEAD') and 'If-None-Match' in request.headers:
+            (CACHE_HITS if response.status_code == 304 else CACHE_MISSES).inc(cache='http_etag')
+        flush()
@@ -0,0 +1,165 @@
+"""
+Per-request SQL instrumentation.
+
+QueryInstrumentationMiddleware samples SQL_INSTRUMENTATION_SAMPLE_RATE of
+requests. For each sampled request it records the query count, total SQL
+time and how often each query shape (fingerprint) ran. A shape that runs
+SQL_N_PLUS_ONE_THRESHOLD times or more is reported as an N+1 pattern on the
+'turfzone.sql' logger. With SQL_SERVER_TIMING on, the totals are also
+returned in a Server-Timing header so they show up in the browser devtools.
+
+Requests that aren't sampled only pay for one random() call. Every request
+is kept in current_request while it runs, for the slow query log
+(turfzone.slow_queries).
+"""
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('turfzone.sql')
+
+# The request being served, so a slow query can be put down to its view
+current_request = ContextVar('current_request', default=None)
+
+# Collapse IN (%s, %s, ...) lists so different list lengths share a shape
+_IN_LIST_RE = re.compile(r'IN \((?:%s, )*%s\)')
+# Inline literals, for SQL that wasn't parameterized
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+
+
+def fingerprint(sql):
+    """The shape of a query: the SQL with values and IN-list lengths removed"""
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    sql = _STRING_RE.sub('?', sql)
+    return _NUMBER_RE.sub('?', sql)
+
+
+async def request_connections():
+    """
+    The connections an async request's queries will run on. The async ORM
+    runs queries in the request's sync_to_async thread, which has its own
+    connection objects, so execute_wrapper() must be installed on those.
+    """
+    return await sync_to_async(lambda: [connections[alias] for alias in connections])()
+
+
+class QueryStats:
+    __slots__ = ('count', 'duration', 'shapes')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        # fingerprint -> [executions, total seconds, sample sql]
+        self.shapes = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.count += 1
+            self.duration += elapsed
+            shape = self.shapes.setdefault(fingerprint(sql), [0, 0.0, sql])
+            shape[0] += 1
+            shape[1] += elapsed
+
+    def repeated(self, threshold):
+        """Query shapes run at least threshold times, most frequent first"""
+        return sorted(
+            ((shape, executions, duration, sql) for shape, (executions, duration, sql) in self.shapes.items()
+             if executions >= threshold),
+            key=lambda row: row[1],
+            reverse=True
+        )
+
+
+class QueryInstrumentationMiddleware:
+    async_capable = True
+    sync_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = current_request.set(request)
+        try:
+            return self.instrument(request)
+        finally:
+            current_request.reset(token)
+
+    async def __acall__(self, request):
+        # The async ORM's sync_to_async threads run in a copy of this
+        # context, so they see the request too
+        token = current_request.set(request)
+        try:
+            return await self.ainstrument(request)
+        finally:
+            current_request.reset(token)
+
+    def instrument(self, request):
+        sample_rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        if not sample_rate or random.random() >= sample_rate:
+            return self.get_response(request)
+
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(stats))
+            response = self.get_response(request)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    async def ainstrument(self, request):
+        sample_rate = settings.SQL_INSTRUMENTATION_SAMPLE_RATE
+        if not sample_rate or random.random() >= sample_rate:
+            return await self.get_response(request)
+
+        stats = QueryStats()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in await request_connections():
+                stack.enter_context(connection.execute_wrapper(stats))
+            response = await self.get_response(request)
+        return self.finish(request, response, stats, time.perf_counter() - started)
+
+    def finish(self, request, response, stats, elapsed):
+        self.report(request, response, stats, elapsed)
+        if settings.SQL_SERVER_TIMING:
+            response['Server-Timing'] = (
+                f'sql;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+                f'total;dur={elapsed * 1000:.1f}'
+            )
+        return response
+
+    def report(self, request, response, stats, elapsed):
+        path = request.path
+        logger.debug(
+            'sql_request path=%s status=%s queries=%d sql_ms=%.1f total_ms=%.1f',
+            path, response.status_code, stats.count, stats.duration * 1000, elapsed * 1000,
+            extra={'path': path, 'queries': stats.count, 'sql_ms': round(stats.duration * 1000, 1)}
+        )
+        for shape, executions, duration, sql in stats.repeated(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            logger.warning(
+                'n_plus_one path=%s executions=%d sql_ms=%.1f shape=%s',
+                path, executions, duration * 1000, shape,
+                extra={
+                    'path': path,
+                    'executions': executions,
+                    'sql_ms': round(duration * 1000, 1),
+                    'fingerprint': shape,
+                    'example_sql': sql,
+                }
+            )
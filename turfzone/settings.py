@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -48,6 +49,7 @@ INSTALLED_APPS = [
     'facilities.apps.FacilitiesConfig',
     'payments.apps.PaymentsConfig',
     'reviews.apps.ReviewsConfig',
+    'jobs.apps.JobsConfig',
 ]
 
 # Custom user model
@@ -55,10 +57,14 @@ AUTH_USER_MODEL = 'accounts.User'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'turfzone.metrics.MetricsMiddleware',
+    'turfzone.middleware.QueryInstrumentationMiddleware',
+    'turfzone.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'turfzone.db_routers.ReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -84,17 +90,228 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'turfzone.wsgi.application'
 
+# Served by uvicorn in production; see turfzone/asgi.py
+ASGI_APPLICATION = 'turfzone.asgi.application'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# SQLite tuned for concurrent web traffic. WAL lets readers run alongside the
+# single writer, BEGIN IMMEDIATE takes the write lock when a transaction starts
+# so writers queue on the busy timeout instead of failing with "database is
+# locked" on lock upgrade, and connections are reused across requests.
+# Compare with the stock settings using `manage.py benchmark_sqlite`.
+SQLITE_OPTIONS = {
+    'timeout': 20,  # busy timeout in seconds (sqlite3_busy_timeout)
+    'transaction_mode': 'IMMEDIATE',
+    'init_command': (
+        'PRAGMA journal_mode=WAL;'
+        'PRAGMA synchronous=NORMAL;'
+        'PRAGMA mmap_size=134217728;'
+        'PRAGMA cache_size=-20000;'
+        'PRAGMA temp_store=MEMORY;'
+    ),
+}
+
+SQLITE_DATABASE = {
+    'ENGINE': 'django.db.backends.sqlite3',
+    'CONN_MAX_AGE': int(os.environ.get('TURFZONE_DB_CONN_MAX_AGE', 600)),
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': SQLITE_OPTIONS,
+}
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        **SQLITE_DATABASE,
         'NAME': BASE_DIR / 'db.sqlite3',
     }
 }
 
+# Optional read replica. Set TURFZONE_REPLICA_DB to a second SQLite file (kept
+# in sync with `manage.py sync_replica`) to serve read-heavy views from it.
+REPLICA_DB_NAME = os.environ.get('TURFZONE_REPLICA_DB')
+if REPLICA_DB_NAME:
+    DATABASES['replica'] = {
+        **SQLITE_DATABASE,
+        'NAME': BASE_DIR / REPLICA_DB_NAME,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+# Optional facility partitioning of booking data. TURFZONE_BOOKING_PARTITIONS=N
+# keeps bookings, payments and live activities in N extra SQLite files
+# (bookings_0 .. bookings_N-1); facility F's rows live in partition F % N.
+# Run `manage.py setup_booking_partitions` after enabling it.
+BOOKING_PARTITION_COUNT = int(os.environ.get('TURFZONE_BOOKING_PARTITIONS') or 0)
+BOOKING_PARTITION_ALIASES = [f'bookings_{index}' for index in range(BOOKING_PARTITION_COUNT)]
+for alias in BOOKING_PARTITION_ALIASES:
+    DATABASES[alias] = {
+        **SQLITE_DATABASE,
+        'NAME': BASE_DIR / f'{alias}.sqlite3',
+    }
+
+# Archiving (bookings.archive): `manage.py archive_bookings`, run daily from
+# cron, moves finished bookings older than this many months, with their
+# payments and activity, into the archive tables. Reports read them back
+# with ?archived=1.
+BOOKING_ARCHIVE_AFTER_MONTHS = 6
+# Confirmed counts as finished once its date is this old: nothing moves a
+# played booking on to completed
+BOOKING_ARCHIVE_STATUSES = ['confirmed', 'completed', 'cancelled', 'expired', 'rejected']
+BOOKING_ARCHIVE_BATCH_SIZE = 500  # Bookings moved per transaction
+
+DATABASE_ROUTERS = [
+    'turfzone.db_routers.BookingPartitionRouter',
+    'turfzone.db_routers.ReplicaRouter',
+]
+
+# URL names whose GET requests may read from the replica, in addition to
+# views marked with read_from_replica / ReplicaReadMixin
+DATABASE_REPLICA_VIEWS = [
+    'home',
+    'review-list',
+    'admin-dashboard',
+    'admin-bookings',
+    'admin-users',
+]
+
+# After a client writes, keep its reads on the primary for this long
+DATABASE_REPLICA_STICKY_SECONDS = 10
+
+# SQL instrumentation (turfzone.middleware.QueryInstrumentationMiddleware).
+# Fraction of requests to instrument; 0 turns it off.
+SQL_INSTRUMENTATION_SAMPLE_RATE = float(os.environ.get('TURFZONE_SQL_SAMPLE_RATE', 1.0 if DEBUG else 0))
+
+# A query shape repeated this many times in one request is logged as N+1
+SQL_N_PLUS_ONE_THRESHOLD = 5
+
+# Add Server-Timing headers with the SQL totals to instrumented responses
+SQL_SERVER_TIMING = DEBUG
+
+# Slow query log (turfzone.slow_queries): queries slower than this, from any
+# request, job or command, are written with their EXPLAIN plan, view and
+# fingerprint to SLOW_QUERY_LOG_FILE. `manage.py slow_queries` reports the
+# worst. 0 turns it off.
+SLOW_QUERY_THRESHOLD_MS = float(os.environ.get('TURFZONE_SLOW_QUERY_MS', 100))
+SLOW_QUERY_EXPLAIN_INTERVAL = 300  # Seconds before the same query shape is EXPLAINed again
+SLOW_QUERY_LOG_FILE = os.environ.get('TURFZONE_SLOW_QUERY_LOG') or str(BASE_DIR / 'slow_queries.log')
+# Rotated to slow_queries.log.1 .. .5 at this size. Each process rotates on
+# its own, so give processes that share a host their own file.
+SLOW_QUERY_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 5
+
+# Logging (turfzone.log): JSON lines written by a background thread, so
+# request threads never wait on log I/O. Project loggers propagate to the
+# root logger, whose handlers configure() moves behind a queue.
+LOGGING_CONFIG = 'turfzone.log.configure'
+LOG_LEVEL = os.environ.get('TURFZONE_LOG_LEVEL', 'INFO')
+
+# Fraction of records below WARNING to keep, by logger name
+LOG_SAMPLE_RATES = {
+    'bookings.api': 1.0 if DEBUG else 0.1,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'turfzone.log.JsonFormatter'},
+    },
+    'filters': {
+        'slow_queries': {'name': 'turfzone.slow_sql'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+        'slow_queries': {
+            'class': 'logging.handlers.RotatingFileHandler',
+            'filename': SLOW_QUERY_LOG_FILE,
+            'maxBytes': SLOW_QUERY_LOG_MAX_BYTES,
+            'backupCount': SLOW_QUERY_LOG_BACKUPS,
+            'delay': True,
+            'formatter': 'json',
+            'filters': ['slow_queries'],
+        },
+    },
+    'root': {'handlers': ['console', 'slow_queries'], 'level': 'WARNING'},
+    'loggers': {
+        # Drop Django's own console handler so its records come through the
+        # queue as JSON like everything else
+        'django': {'handlers': [], 'level': 'WARNING'},
+        **{
+            name: {'level': LOG_LEVEL}
+            for name in ('accounts', 'bookings', 'facilities', 'jobs', 'payments', 'reviews', 'sport_teams', 'turfzone')
+        },
+    },
+}
+
+# Cold-start import budget in milliseconds, checked by
+# `manage.py profile_startup --target server|command`. 0 disables the check.
+STARTUP_IMPORT_BUDGET_MS = {
+    'server': 700,
+    'command': 550,
+}
+
+# Prometheus metrics at /metrics (turfzone.metrics). With several worker
+# processes, point TURFZONE_METRICS_DIR at a directory they share so a
+# scrape of any worker reports totals for all of them.
+METRICS_MULTIPROC_DIR = os.environ.get('TURFZONE_METRICS_DIR')
+
+# How often each worker writes its metrics to METRICS_MULTIPROC_DIR
+METRICS_FLUSH_SECONDS = 1
+
+# Scrapers send "Authorization: Bearer <token>". Unset, only logged-in
+# site admins (User.is_admin) can read /metrics
+METRICS_TOKEN = os.environ.get('TURFZONE_METRICS_TOKEN')
+
+# Response compression (turfzone.compression). JSON responses smaller than
+# COMPRESSION_MIN_SIZE bytes go out as they are: below about a kilobyte the
+# saving doesn't cover the CPU. HTML isn't compressed (BREACH).
+COMPRESSION_CONTENT_TYPES = ['application/json']
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_BROTLI_QUALITY = 5  # 0-11; above 5 costs a lot more CPU for a little less size
+
+# Batch API (turfzone.batch): the URL names a batch may call, all read-only
+# JSON endpoints, and how many calls one batch may make
+BATCH_VIEWS = [
+    'api-slots',
+    'api-slots-v2',
+    'get-slots',
+    'get-activities',
+    'get-weather',
+    'facility-api-list',
+    'facility-api-detail',
+    'review-list',
+    'review-facility-reviews',
+]
+BATCH_MAX_REQUESTS = 10
+
+# Single-flight (turfzone.singleflight): concurrent identical computations
+# of slot availability, facility pages and slot grids run once. Followers
+# wait this long for the leader before computing it themselves.
+SINGLE_FLIGHT_TIMEOUT = 5
+SINGLE_FLIGHT_POLL_INTERVAL = 0.05  # Seconds between checks for another worker's result
+# Alias in CACHES of a cache shared by all workers (e.g. Redis) to coalesce
+# across workers as well; unset, each worker coalesces on its own
+SINGLE_FLIGHT_CACHE = os.environ.get('TURFZONE_SINGLE_FLIGHT_CACHE')
+
+# Background jobs (jobs app): email, WhatsApp and other slow work queued in
+# the database. Run `manage.py run_workers` next to the web server; jobs
+# queued while no worker is running wait for one.
+JOBS_WORKER_THREADS = 4
+JOBS_POLL_INTERVAL = 1  # Seconds an idle worker waits before looking for jobs again
+JOBS_MAX_ATTEMPTS = 5  # Default for tasks that don't set their own
+JOBS_RETRY_BACKOFF = 30  # Seconds before the first retry, doubling after each failure
+JOBS_RETRY_BACKOFF_MAX = 3600
+# A job still running after this many seconds is taken to have lost its
+# worker and is queued again. Keep it above the slowest task's run time.
+JOBS_LOCK_TIMEOUT = 600
+JOBS_MAINTENANCE_INTERVAL = 60  # Seconds between checks for such jobs
+JOBS_KEEP_DONE_DAYS = 7  # Finished jobs are deleted after this; dead ones are kept
+
+# Part of every ETag (turfzone.conditional). Set a new value on each deploy
+# so pages clients cached under the old templates are rendered again.
+ETAG_RELEASE = os.environ.get('TURFZONE_RELEASE', '')
+
 
 # Password change/reset functionality is disabled
 AUTH_PASSWORD_VALIDATORS = []
@@ -123,6 +340,29 @@ STATIC_URL = 'static/'
 STATICFILES_DIRS = [BASE_DIR / 'static']
 STATIC_ROOT = BASE_DIR / 'staticfiles'
 
+# Static asset pipeline (turfzone.staticfiles). collectstatic bundles,
+# minifies, fingerprints and precompresses the files, and WhiteNoise serves
+# them with immutable caching. In development the source files are served
+# as they are.
+STATIC_PIPELINE = os.environ.get('TURFZONE_STATIC_PIPELINE', '0' if DEBUG else '1') == '1'
+
+# Scripts a page loads together, served as one file with the pipeline on.
+# Link them with {% bundle %} from the assets tag library.
+STATIC_BUNDLES = {
+    'bundles/booking.js': ['js/slots_debug.js', 'js/slots_v2.js'],
+    'bundles/admin-settings.js': ['js/admin-settings.js', 'js/facility-sports.js'],
+}
+
+if STATIC_PIPELINE:
+    STORAGES = {
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+        'staticfiles': {'BACKEND': 'turfzone.staticfiles.PipelineStorage'},
+    }
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index('django.middleware.security.SecurityMiddleware') + 1,
+        'whitenoise.middleware.WhiteNoiseMiddleware'
+    )
+
 # Media files
 MEDIA_URL = 'media/'
 MEDIA_ROOT = BASE_DIR / 'media'
@@ -138,6 +378,11 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
+    # orjson for JSON responses; see turfzone.fastjson
+    'DEFAULT_RENDERER_CLASSES': [
+        'turfzone.fastjson.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
 }
 
 # Default primary key field type
@@ -160,6 +405,24 @@ WHATSAPP_PHONE_NUMBER_ID = 'your-phone-number-id'  # Get this from WhatsApp Busi
 WHATSAPP_BUSINESS_ACCOUNT_ID = 'your-business-account-id'  # Get this from WhatsApp Business API dashboard
 WHATSAPP_ACCESS_TOKEN = 'your-access-token'  # Get this from WhatsApp Business API dashboard
 WHATSAPP_API_VERSION = 'v18.0'  # WhatsApp Graph API version
+WHATSAPP_TIMEOUT = 10  # Seconds before a WhatsApp API call is given up
+
+# Phone number normalization (E.164)
+PHONE_DEFAULT_COUNTRY_CODE = '91'  # Used when a number is entered without a country code
+PHONE_NATIONAL_NUMBER_LENGTH = 10
+PHONE_SEARCH_MIN_DIGITS = 4  # Typeahead search starts after this many digits
+PHONE_SEARCH_MAX_RESULTS = 10
+
+# Match scheduling
+MATCH_SLOT_SEARCH_DAYS = 21  # How far ahead common free slots are searched
+
+# Team ratings (Elo)
+TEAM_RATING_INITIAL = 1500.0  # Must match the Team.rating field default
+TEAM_RATING_K_FACTOR = 32
+
+# Payment status long-polling (payments.views.payment_status)
+PAYMENT_STATUS_MAX_WAIT = 25  # Seconds a request may wait; keep under the proxy read timeout
+PAYMENT_STATUS_POLL_INTERVAL = 1  # Seconds between checks while waiting
 
 # Booking notification settings
 ADMIN_EMAIL = 'admin@turfzone.com'  # Replace with admin email
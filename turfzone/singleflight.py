@@ -0,0 +1,176 @@
+"""
+Single-flight: identical computations that overlap run only once.
+
+When many requests need the same result at the same moment, e.g. everyone
+opening a popular facility's slots as they go on sale, the first caller for
+a key (the leader) computes it and the others wait for the leader's result
+instead of running the same queries. Nothing is kept once the flight
+lands: a call that starts after the leader has finished computes afresh,
+so this coalesces concurrent work without becoming a cache.
+
+A response sent with an ETag must not be built from data older than the
+ETag, or clients keep getting 304s for a stale copy. Compute the ETag
+first and put it (or the data version it is made of) in the flight key,
+so a flight that started before a write is not joined after it.
+
+Within a worker, threads (sync views) and tasks (async views) wait on the
+leader directly. When SINGLE_FLIGHT_CACHE names a cache the workers share
+(Redis, Memcached or the database cache), the leader also holds a lock
+there and publishes its result, so workers coalesce with each other too.
+Results must then be picklable.
+
+Followers wait up to SINGLE_FLIGHT_TIMEOUT seconds and then compute the
+result themselves, as they do straight away if the leader fails.
+"""
+import asyncio
+import hashlib
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import caches
+from .metrics import SINGLE_FLIGHT
+
+_MISSING = object()
+
+
+class _Flight:
+    __slots__ = ('done', 'result', 'failed')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.failed = False
+
+
+def _shared_cache():
+    alias = settings.SINGLE_FLIGHT_CACHE
+    return caches[alias] if alias else None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._tasks = {}
+
+    def _cache_key(self, key):
+        digest = hashlib.md5(repr(key).encode(), usedforsecurity=False).hexdigest()
+        return f'singleflight:{self.name}:{digest}'
+
+    def do(self, key, compute):
+        """Return compute(), sharing one call among concurrent callers with the same key"""
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if flight.done.wait(settings.SINGLE_FLIGHT_TIMEOUT) and not flight.failed:
+                SINGLE_FLIGHT.inc(flight=self.name, outcome='shared')
+                return flight.result
+            SINGLE_FLIGHT.inc(flight=self.name, outcome='fallback')
+            return compute()
+
+        try:
+            flight.result = self._across_workers(key, compute)
+            return flight.result
+        except BaseException:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+
+    async def ado(self, key, compute):
+        """do() for async callers; compute is a coroutine function"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._aacross_workers(key, compute))
+            self._tasks[key] = task
+            task.add_done_callback(lambda _: self._land(key, task))
+            # Shielded, so the followers still get a result if the leader's
+            # request is cancelled
+            return await asyncio.shield(task)
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(task), settings.SINGLE_FLIGHT_TIMEOUT)
+        except Exception:
+            SINGLE_FLIGHT.inc(flight=self.name, outcome='fallback')
+            return await compute()
+        SINGLE_FLIGHT.inc(flight=self.name, outcome='shared')
+        return result
+
+    def _land(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    def _across_workers(self, key, compute):
+        cache = _shared_cache()
+        if cache is None:
+            SINGLE_FLIGHT.inc(flight=self.name, outcome='leader')
+            return compute()
+
+        lock_key = self._cache_key(key)
+        token = uuid.uuid4().hex
+        timeout = settings.SINGLE_FLIGHT_TIMEOUT
+        if cache.add(lock_key, token, timeout):
+            SINGLE_FLIGHT.inc(flight=self.name, outcome='leader')
+            outcome = (False, None)
+            try:
+                result = compute()
+                outcome = (True, result)
+                return result
+            finally:
+                cache.set(f'{lock_key}:{token}', outcome, timeout)
+                cache.delete(lock_key)
+
+        # Another worker is computing it
+        leader_token = cache.get(lock_key)
+        deadline = time.monotonic() + timeout
+        while leader_token and time.monotonic() < deadline:
+            outcome = cache.get(f'{lock_key}:{leader_token}', _MISSING)
+            if outcome is not _MISSING:
+                if outcome[0]:
+                    SINGLE_FLIGHT.inc(flight=self.name, outcome='shared')
+                    return outcome[1]
+                break
+            time.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+        SINGLE_FLIGHT.inc(flight=self.name, outcome='fallback')
+        return compute()
+
+    async def _aacross_workers(self, key, compute):
+        cache = _shared_cache()
+        if cache is None:
+            SINGLE_FLIGHT.inc(flight=self.name, outcome='leader')
+            return await compute()
+
+        lock_key = self._cache_key(key)
+        token = uuid.uuid4().hex
+        timeout = settings.SINGLE_FLIGHT_TIMEOUT
+        if await cache.aadd(lock_key, token, timeout):
+            SINGLE_FLIGHT.inc(flight=self.name, outcome='leader')
+            outcome = (False, None)
+            try:
+                result = await compute()
+                outcome = (True, result)
+                return result
+            finally:
+                await cache.aset(f'{lock_key}:{token}', outcome, timeout)
+                await cache.adelete(lock_key)
+
+        leader_token = await cache.aget(lock_key)
+        deadline = time.monotonic() + timeout
+        while leader_token and time.monotonic() < deadline:
+            outcome = await cache.aget(f'{lock_key}:{leader_token}', _MISSING)
+            if outcome is not _MISSING:
+                if outcome[0]:
+                    SINGLE_FLIGHT.inc(flight=self.name, outcome='shared')
+                    return outcome[1]
+                break
+            await asyncio.sleep(settings.SINGLE_FLIGHT_POLL_INTERVAL)
+        SINGLE_FLIGHT.inc(flight=self.name, outcome='fallback')
+        return await compute()
@@ -0,0 +1,125 @@
+"""
+Slow query log.
+
+Every query slower than SLOW_QUERY_THRESHOLD_MS, on any connection, in web
+requests, job workers and management commands alike, is logged on the
+'turfzone.slow_sql' logger. Each record holds:
+- the query's fingerprint (turfzone.middleware.fingerprint)
+- its SQL with placeholders (parameters are left out, as they may hold
+  personal data)
+- the URL name of the request that ran it
+- its EXPLAIN plan
+LOGGING sends these records to the rotating SLOW_QUERY_LOG_FILE, and
+`manage.py slow_queries` reports the worst shapes by total time.
+
+The plan is captured by running EXPLAIN (EXPLAIN QUERY PLAN on SQLite) for
+a SELECT right after it finished, on the same connection and with the same
+parameters. It is run at most once per shape every
+SLOW_QUERY_EXPLAIN_INTERVAL seconds, so a query that is slow because the
+database is busy does not get run again on every execution.
+
+The hook is added to each connection as it opens (connection_created). A
+query under the threshold only pays for two perf_counter() calls.
+"""
+import logging
+import threading
+import time
+from django.conf import settings
+from .metrics import SLOW_QUERIES
+from .middleware import current_request, fingerprint
+
+logger = logging.getLogger('turfzone.slow_sql')
+
+# (alias, fingerprint) -> time.monotonic() of the last EXPLAIN
+_explained = {}
+_explained_lock = threading.Lock()
+
+
+def install(sender, connection, **kwargs):
+    """connection_created receiver"""
+    # Outermost, as the connection often opens inside an execute_wrapper()
+    # block (the request middlewares), and that block pops the last wrapper
+    # on exit
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, log_slow_queries)
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    # connection.execute_wrapper hook
+    threshold = settings.SLOW_QUERY_THRESHOLD_MS
+    if not threshold:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if elapsed_ms >= threshold:
+        try:
+            record(context['connection'], sql, params, many, elapsed_ms)
+        except Exception:
+            logger.exception('Recording a slow query failed')
+    return result
+
+
+def request_view():
+    request = current_request.get()
+    match = request.resolver_match if request is not None else None
+    if match is None:
+        return None
+    return match.url_name or match.view_name
+
+
+def record(connection, sql, params, many, elapsed_ms):
+    shape = fingerprint(sql)
+    view = request_view()
+    plan = None if many else explain(connection, shape, sql, params)
+    SLOW_QUERIES.inc(view=view or '')
+    logger.warning(
+        'slow_query view=%s sql_ms=%.1f shape=%s',
+        view, elapsed_ms, shape,
+        extra={
+            'view': view,
+            'database': connection.alias,
+            'sql_ms': round(elapsed_ms, 1),
+            'fingerprint': shape,
+            'example_sql': sql,
+            'executemany': many,
+            'plan': plan,
+        }
+    )
+
+
+def explain(connection, shape, sql, params):
+    """The query's plan as text, or None if it is not a SELECT or was explained recently"""
+    statement = sql.lstrip()[:6].upper()
+    if not (statement == 'SELECT' or statement.startswith('WITH')):
+        return None
+    key = (connection.alias, shape)
+    now = time.monotonic()
+    with _explained_lock:
+        last = _explained.get(key)
+        if last is not None and now - last < settings.SLOW_QUERY_EXPLAIN_INTERVAL:
+            return None
+        _explained[key] = now
+
+    try:
+        with connection.cursor() as cursor:
+            # The driver's cursor, so the EXPLAIN skips the execute wrappers
+            # and isn't itself timed, counted or logged
+            cursor.cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+            rows = cursor.cursor.fetchall()
+    except Exception:
+        logger.debug('EXPLAIN failed for %s', shape, exc_info=True)
+        return None
+    return format_plan(connection.vendor, rows)
+
+
+def format_plan(vendor, rows):
+    if vendor == 'sqlite':
+        # (id, parent, notused, detail); indent each step under its parent
+        depths = {0: -1}
+        lines = []
+        for node_id, parent, _, detail in rows:
+            depths[node_id] = depths.get(parent, -1) + 1
+            lines.append('  ' * depths[node_id] + detail)
+        return '\n'.join(lines)
+    return '\n'.join(' | '.join(str(value) for value in row) for row in rows)
@@ -0,0 +1,16 @@
+from django import template
+from django.conf import settings
+from django.templatetags.static import static
+from django.utils.html import format_html_join
+
+register = template.Library()
+
+@register.simple_tag
+def bundle(name):
+    """Link a STATIC_BUNDLES entry: the bundle itself with the pipeline on, its source files without"""
+    paths = [name] if settings.STATIC_PIPELINE else settings.STATIC_BUNDLES[name]
+    if name.endswith('.css'):
+        tag = '<link rel="stylesheet" href="{}">'
+    else:
+        tag = '<script src="{}"></script>'
+    return format_html_join('\n', tag, ((static(path),) for path in paths))
@@ -0,0 +1,223 @@
+"""
+Query budgets for the endpoint tests.
+
+QueryBudgetTestCase builds a synthetic dataset with build_dataset() and
+assertQueryBudget() runs a request against it twice: once as built and once
+after grow_dataset() has added several times more bookings, reviews, teams
+and match requests. The request must stay within the same number of
+queries and rows fetched both times, so a budget only holds if it doesn't
+depend on how much data there is.
+"""
+from contextlib import ExitStack, contextmanager
+from datetime import date, time, timedelta
+from unittest import mock
+from django.db import connections
+from django.db.backends.utils import CursorWrapper
+from django.test import TestCase
+from accounts.models import PlayerProfile, User
+from bookings.models import Booking, LiveActivity
+from facilities.models import Facility, FacilityImage, FacilitySport, Offer, SportType, TimeSlot
+from payments.models import Payment
+from reviews.models import Reply, Review
+from sport_teams.models import MatchRequest, Team, TeamMember
+
+# (slot_time, start hour, end hour), the same slots as production
+SLOTS = [
+    ('06:00-08:00', 6, 8),
+    ('08:00-10:00', 8, 10),
+    ('10:00-12:00', 10, 12),
+    ('14:00-16:00', 14, 16),
+    ('16:00-18:00', 16, 18),
+    ('18:00-20:00', 18, 20),
+    ('20:00-22:00', 20, 22),
+]
+
+BOOKING_STATUSES = ['confirmed', 'payment_pending', 'cancelled', 'completed']
+
+
+class QueryBudget:
+    """Counts queries and fetched rows on every connection while active"""
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        self.queries += 1
+        self.statements.append(sql)
+        return execute(sql, params, many, context)
+
+    @contextmanager
+    def capture(self):
+        budget = self
+
+        def fetchone(cursor):
+            row = cursor.cursor.fetchone()
+            if row is not None:
+                budget.rows += 1
+            return row
+
+        def fetchmany(cursor, size=None):
+            rows = cursor.cursor.fetchmany() if size is None else cursor.cursor.fetchmany(size)
+            budget.rows += len(rows)
+            return rows
+
+        def fetchall(cursor):
+            rows = cursor.cursor.fetchall()
+            budget.rows += len(rows)
+            return rows
+
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(self))
+            # CursorWrapper forwards fetch*() to the driver cursor through
+            # __getattr__, so class attributes take precedence
+            for name, method in (('fetchone', fetchone), ('fetchmany', fetchmany), ('fetchall', fetchall)):
+                stack.enter_context(mock.patch.object(CursorWrapper, name, method, create=True))
+            yield self
+
+
+def build_dataset(scale, prefix='base', anchor_team=None):
+    """
+    Users, bookings, payments, reviews, teams and match requests in
+    proportion to scale. Facilities, sports and time slots are created once
+    and shared, like in production. New users also join anchor_team and new
+    teams exchange match requests with it, so pages about that team grow
+    along with the dataset.
+    """
+    facility = Facility.objects.first()
+    if facility is None:
+        facility = Facility.objects.create(name='Budget Turf', location='Coimbatore')
+        FacilityImage.objects.create(facility=facility, image='facility_images/budget.jpg', is_primary=True)
+        for name in ('Cricket', 'Football'):
+            FacilitySport.objects.create(
+                facility=facility, sport=SportType.objects.create(name=name), price_per_slot=1000
+            )
+        Offer.objects.create(
+            facility=facility, title='Early bird', description='Mornings', discount_percentage=10,
+            start_date=date.today() - timedelta(days=30), end_date=date.today() + timedelta(days=30)
+        )
+        for slot_time, start, end in SLOTS:
+            TimeSlot.objects.create(slot_time=slot_time, start_time=time(start), end_time=time(end))
+        User.objects.create_user('budget_admin', password=None, is_admin=True, is_staff=True)
+
+    facility_sports = list(FacilitySport.objects.filter(facility=facility))
+    time_slots = list(TimeSlot.objects.order_by('start_time'))
+    admin = User.objects.get(username='budget_admin')
+
+    users = []
+    for index in range(scale):
+        user = User.objects.create_user(
+            f'{prefix}_player_{index}', password=None, first_name='Player', last_name=str(index),
+            email=f'{prefix}_{index}@example.com'
+        )
+        PlayerProfile.objects.create(
+            user=user, preferred_sport='cricket', playing_side='right', batting_style='top_order'
+        )
+        users.append(user)
+
+    # Bookings spread over the next days so every slot lookup finds some
+    offset = Booking.objects.count()
+    for index in range(scale * 4):
+        position = offset + index
+        facility_sport = facility_sports[position % len(facility_sports)]
+        booking = Booking.objects.create(
+            user=users[index % len(users)],
+            facility_sport=facility_sport,
+            date=date.today() + timedelta(days=position // (len(time_slots) * len(facility_sports)) % 60),
+            time_slot=time_slots[position // len(facility_sports) % len(time_slots)],
+            status=BOOKING_STATUSES[index % len(BOOKING_STATUSES)],
+        )
+        LiveActivity.objects.create(booking=booking, action='New Booking')
+        if booking.status == 'confirmed':
+            Payment.objects.create(
+                user=booking.user, booking=booking, amount=booking.total_price, payment_method='upi',
+                transaction_id=f'{prefix}-{index}', status='completed'
+            )
+        if index % 2 == 0:
+            review = Review.objects.create(
+                user=booking.user, facility=facility, booking=booking, rating=index % 5 + 1,
+                review_text='Good turf', is_approved=True
+            )
+            Reply.objects.create(review=review, user=admin, reply_text='Thanks!', is_approved=True)
+
+    teams = []
+    for index in range(max(2, scale // 2)):
+        captain = users[index % len(users)]
+        team = Team.objects.create(name=f'{prefix} Team {index}', captain=captain)
+        for member in users[index::max(2, scale // 2)][:5]:
+            TeamMember.objects.get_or_create(team=team, user=member)
+        teams.append(team)
+    pairs = []
+    for index, team in enumerate(teams):
+        for opponent in (teams[(index + 1) % len(teams)], teams[(index + 2) % len(teams)]):
+            if opponent != team:
+                pairs.append((team, opponent))
+    if anchor_team is not None:
+        for user in users:
+            TeamMember.objects.create(team=anchor_team, user=user)
+        for team in teams:
+            pairs.extend([(team, anchor_team), (anchor_team, team)])
+    for challenger, opponent in pairs:
+        MatchRequest.objects.create(
+            challenger=challenger, opponent=opponent, preferred_date=date.today() + timedelta(days=7),
+            preferred_facility=facility, preferred_time=time_slots[0], message='Fancy a game?'
+        )
+    return users, teams
+
+
+class QueryBudgetTestCase(TestCase):
+    # Size of the initial dataset, and how many times that grow_dataset() adds
+    scale = 4
+    growth = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users, cls.teams = build_dataset(cls.scale)
+        cls.facility = Facility.objects.get()
+        cls.admin = User.objects.get(username='budget_admin')
+        # A user with bookings, reviews and a team they captain
+        cls.player = cls.users[0]
+        cls.team = cls.teams[0]
+
+    def grow_dataset(self):
+        build_dataset(self.scale * self.growth, prefix='grown', anchor_team=self.team)
+
+    def measure(self, request):
+        budget = QueryBudget()
+        with budget.capture():
+            response = request()
+        self.assertLess(response.status_code, 400, getattr(response, 'content', b'')[:500])
+        return budget
+
+    def assertQueryBudget(self, request, queries, rows):
+        """
+        Run request() before and after grow_dataset() and check both runs
+        stay within the query and row budgets.
+        """
+        for label in ('dataset', 'grown dataset'):
+            if label == 'grown dataset':
+                self.grow_dataset()
+            budget = self.measure(request)
+            self.assertLessEqual(
+                budget.queries, queries,
+                f'{budget.queries} queries on the {label}, budget {queries}:\n' + '\n'.join(budget.statements)
+            )
+            self.assertLessEqual(budget.rows, rows, f'{budget.rows} rows fetched on the {label}, budget {rows}')
+
+    def assertNotModified(self, url, queries, data=None):
+        """
+        Fetch url, then revalidate it with the ETag it came with: the second
+        request must get a 304 within the query budget.
+        """
+        etag = self.client.get(url, data)['ETag']
+        budget = QueryBudget()
+        with budget.capture():
+            response = self.client.get(url, data, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertLessEqual(
+            budget.queries, queries,
+            f'{budget.queries} queries to revalidate, budget {queries}:\n' + '\n'.join(budget.statements)
+        )
@@ -0,0 +1,124 @@
+import os
+import tempfile
+import threading
+from datetime import timedelta
+from io import StringIO
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from accounts.models import User
+from jobs.models import Job
+from . import slow_queries
+from .db_routers import REPLICA_DB_ALIAS, ReplicaRouter
+from .log import JsonFormatter
+from .testing import build_dataset
+
+
+class SlowQueryLogTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_dataset(2)
+
+    def setUp(self):
+        slow_queries._explained.clear()
+        self.client.force_login(User.objects.get(username='budget_admin'))
+
+    def log_every_query(self):
+        return self.settings(SLOW_QUERY_THRESHOLD_MS=0.000001, SLOW_QUERY_EXPLAIN_INTERVAL=300)
+
+    def test_logs_view_fingerprint_and_plan(self):
+        with self.log_every_query(), self.assertLogs('turfzone.slow_sql', 'WARNING') as logs:
+            self.client.get(reverse('admin-users'))
+            self.client.get(reverse('admin-users'))
+
+        records = [record for record in logs.records if record.view == 'admin-users']
+        self.assertTrue(records)
+        counts = [record for record in records if 'COUNT(' in record.fingerprint]
+        self.assertEqual(len(counts), 2)
+        # EXPLAINed once per shape, not on every run
+        self.assertIn('bookings_booking', counts[0].plan)
+        self.assertIsNone(counts[1].plan)
+        self.assertNotIn('EXPLAIN', ' '.join(record.example_sql for record in logs.records))
+
+    def test_report_ranks_shapes(self):
+        with self.log_every_query(), self.assertLogs('turfzone.slow_sql', 'WARNING') as logs:
+            self.client.get(reverse('admin-dashboard'))
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'slow_queries.log')
+            with open(path, 'w') as log_file:
+                for record in logs.records:
+                    log_file.write(JsonFormatter().format(record) + '\n')
+            output = StringIO()
+            call_command('slow_queries', file=path, top=2, view='admin-dashboard', stdout=output)
+
+        report = output.getvalue()
+        self.assertIn('#1 ', report)
+        self.assertIn('#2 ', report)
+        self.assertNotIn('#3 ', report)
+        self.assertIn('views: admin-dashboard', report)
+        self.assertIn('plan:', report)
+
+
+class SlowQueryHookTests(TransactionTestCase):
+    def test_hook_survives_connection_opened_in_middleware(self):
+        # A new thread has its own connection, which first opens inside
+        # the middlewares' execute_wrapper() blocks
+        wrappers = []
+
+        def request():
+            self.client.get(reverse('home'))
+            self.client.get(reverse('home'))
+            wrappers.extend(connection.execute_wrappers)
+            connection.close()
+
+        thread = threading.Thread(target=request)
+        thread.start()
+        thread.join()
+        self.assertEqual(wrappers, [slow_queries.log_slow_queries])
+
+
+class ReplicaRouterTests(TestCase):
+    def test_writes_never_go_to_the_replica(self):
+        router = ReplicaRouter()
+        user = User(username='replica-read')
+        self.assertEqual(router.db_for_write(User), DEFAULT_DB_ALIAS)
+        self.assertEqual(router.db_for_write(User, instance=user), DEFAULT_DB_ALIAS)
+        user._state.db = REPLICA_DB_ALIAS
+        self.assertEqual(router.db_for_write(User, instance=user), DEFAULT_DB_ALIAS)
+        user._state.db = 'other'
+        self.assertEqual(router.db_for_write(User, instance=user), 'other')
+
+
+class MetricsEndpointTests(TestCase):
+    def test_denied_by_default(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        self.client.force_login(User.objects.create_user('metrics-user'))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+        # Django staff who aren't site admins can't read it either
+        self.client.force_login(User.objects.create_user('metrics-staff', is_staff=True))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    def test_site_admins(self):
+        self.client.force_login(User.objects.create_user('metrics-admin', is_admin=True))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    def test_token(self):
+        with self.settings(METRICS_TOKEN='secret'):
+            # With a token set, even a site admin needs it
+            self.client.force_login(User.objects.create_user('metrics-admin', is_admin=True))
+            self.assertEqual(self.client.get(reverse('metrics')).status_code, 401)
+            response = self.client.get(reverse('metrics'), headers={'Authorization': 'Bearer secret'})
+            self.assertEqual(response.status_code, 200)
+
+    def test_pending_jobs(self):
+        Job.objects.create(task='jobs.tests.noop')
+        Job.objects.create(task='jobs.tests.noop', run_at=timezone.now() + timedelta(hours=1))
+        Job.objects.create(task='jobs.tests.noop', status='done')
+        self.client.force_login(User.objects.create_user('metrics-admin', is_admin=True))
+        body = self.client.get(reverse('metrics')).content.decode()
+        self.assertIn('turfzone_jobs_pending{task="jobs.tests.noop",state="due"} 1\n', body)
+        self.assertIn('turfzone_jobs_pending{task="jobs.tests.noop",state="scheduled"} 1\n', body)
+        self.assertIn('turfzone_jobs_pending{task="jobs.tests.noop",state="running"} 0\n', body)
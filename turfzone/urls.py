@@ -9,11 +9,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from facilities import views as facility_views
-from . import views
+from . import batch, views
 
 urlpatterns = [
     path('', views.home, name='home'),
     path('admin/', admin.site.urls),
+    path('metrics', views.metrics, name='metrics'),
+    path('api/batch/', batch.batch, name='api-batch'),
     path('admin/offer/<int:offer_id>/toggle/', facility_views.toggle_offer_active, name='toggle-offer-active'),
     path('admin/review/<int:review_id>/toggle-featured/', facility_views.toggle_review_featured, name='toggle-review-featured'),
     path('admin/review/<int:review_id>/toggle-approved/', facility_views.toggle_review_approved, name='toggle-review-approved'),
@@ -1,11 +1,69 @@
 from django.shortcuts import render
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
 from django.utils import timezone
 from django.db.models import Avg
 from facilities.models import Facility, FacilitySport, TimeSlot
 from facilities.models import SportType, Offer
 from bookings.models import Booking
+from bookings.partitioning import fan_out_list
 from reviews.models import Review
-import pytz
+from .metrics import render as render_metrics
+from .singleflight import SingleFlight
+from zoneinfo import ZoneInfo
+
+home_slot_flights = SingleFlight('home_slots')
+
+def home_slot_grid(dates, now_ist):
+    today = now_ist.date()
+    # Get slots for each date
+    all_slots = TimeSlot.objects.all()
+    date_slots = {}
+    
+    for date in dates:
+        # Get booked slots for the date
+        booked_slots = fan_out_list(Booking.objects.filter(
+            date=date,
+            status__in=['confirmed', 'pending'],
+        ).values_list('time_slot_id', flat=True))
+        
+        booked_slot_ids = set(booked_slots)
+        
+        # Get current time for checking past slots
+        current_time = now_ist.time() if date == today else None
+        # Filter available slots
+        available_slots = []
+        for slot in all_slots:
+            # For today's slots, check if the slot's start time has passed
+            is_past = False
+            if date == today:
+                current_hour = current_time.hour
+                current_minute = current_time.minute
+                slot_hour = slot.start_time.hour
+                slot_minute = slot.start_time.minute
+                
+                # Convert both times to minutes for easier comparison
+                current_minutes = current_hour * 60 + current_minute
+                slot_minutes = slot_hour * 60 + slot_minute
+                
+                is_past = slot_minutes <= current_minutes
+                
+            is_available = slot.id not in booked_slot_ids and not is_past
+            slot_data = {
+                'id': slot.id,
+                'slot_time': slot.slot_time,
+                'display_time': slot.get_slot_time_display(),
+                'start_time': slot.start_time.strftime('%H:%M'),
+                'end_time': slot.end_time.strftime('%H:%M'),
+                'is_available': is_available,
+                'is_past': is_past
+            }
+            available_slots.append(slot_data)
+        
+        date_slots[date] = available_slots
+    
+    return date_slots
 
 def home(request):
     # Get the featured facility with all related data
@@ -16,7 +74,7 @@ def home(request):
     ).first()
     
     # Use IST timezone for all slot logic
-    ist = pytz.timezone('Asia/Kolkata')
+    ist = ZoneInfo('Asia/Kolkata')
     now_ist = timezone.now().astimezone(ist)
     today = now_ist.date()
     dates = [today + timezone.timedelta(days=x) for x in range(3)]
@@ -66,52 +124,12 @@ def home(request):
         'humidity': int(humidity)
     }
     
-    # Get slots for each date
-    all_slots = TimeSlot.objects.all()
-    date_slots = {}
-    
-    for date in dates:
-        # Get booked slots for the date
-        booked_slots = Booking.objects.filter(
-            date=date,
-            status__in=['confirmed', 'pending'],
-        ).values_list('time_slot_id', flat=True)
-        
-        booked_slot_ids = set(booked_slots)
-        
-        # Get current time for checking past slots
-        current_time = now_ist.time() if date == today else None
-        # Filter available slots
-        available_slots = []
-        for slot in all_slots:
-            # For today's slots, check if the slot's start time has passed
-            is_past = False
-            if date == today:
-                current_hour = current_time.hour
-                current_minute = current_time.minute
-                slot_hour = slot.start_time.hour
-                slot_minute = slot.start_time.minute
-                
-                # Convert both times to minutes for easier comparison
-                current_minutes = current_hour * 60 + current_minute
-                slot_minutes = slot_hour * 60 + slot_minute
-                
-                is_past = slot_minutes <= current_minutes
-                
-            is_available = slot.id not in booked_slot_ids and not is_past
-            slot_data = {
-                'id': slot.id,
-                'slot_time': slot.slot_time,
-                'display_time': slot.get_slot_time_display(),
-                'start_time': slot.start_time.strftime('%H:%M'),
-                'end_time': slot.end_time.strftime('%H:%M'),
-                'is_available': is_available,
-                'is_past': is_past
-            }
-            available_slots.append(slot_data)
-        
-        date_slots[date] = available_slots
-    
+    # Slots only turn past on the minute, so requests in the same minute
+    # share one grid
+    date_slots = home_slot_flights.do(
+        (today, now_ist.strftime('%H:%M')), lambda: home_slot_grid(dates, now_ist)
+    )
+
     # Get available sports with prices
     facility_sports = FacilitySport.objects.filter(facility=facility, is_available=True).select_related('sport')
     
@@ -186,4 +204,16 @@ def faq(request):
     return render(request, 'pages/faq.html')
 
 def careers(request):
-    return render(request, 'pages/careers.html')
\ No newline at end of file
+    return render(request, 'pages/careers.html')
+
+def metrics(request):
+    """Prometheus scrape endpoint, for the METRICS_TOKEN bearer or site admins"""
+    if settings.METRICS_TOKEN:
+        authorization = request.headers.get('Authorization', '')
+        if not constant_time_compare(authorization, f'Bearer {settings.METRICS_TOKEN}'):
+            return HttpResponse('Unauthorized', status=401)
+    elif not (request.user.is_authenticated and request.user.is_admin):
+        # Same check as accounts.decorators.admin_required, without the
+        # redirect, which would only confuse a scraper
+        return HttpResponse('Forbidden', status=403)
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')